@@ -1,13 +1,20 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 import os
 import asyncio
+import logging
 from dotenv import load_dotenv
 from .slack_bot import SlackWordCountBot
+from .metrics import CONTENT_TYPE, render_metrics
 
 # Load environment variables
 load_dotenv()
 
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
 app = FastAPI()
 
 # Disable CORS. Do not remove this for full-stack development.
@@ -26,13 +33,33 @@ slack_app_token = os.getenv("SLACK_APP_TOKEN")
 if not slack_bot_token or not slack_app_token:
     raise ValueError("Missing required Slack tokens in .env file")
 
-slack_bot = SlackWordCountBot(slack_bot_token, slack_app_token)
+slack_bot = SlackWordCountBot(
+    slack_bot_token,
+    slack_app_token,
+    workers=int(os.getenv("SLACK_BOT_WORKERS", "4")),
+    max_queue_size=int(os.getenv("SLACK_BOT_QUEUE_SIZE", "100"))
+)
 
 @app.on_event("startup")
 async def startup_event():
     """Start the Slack bot when the FastAPI app starts."""
     slack_bot.start()
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the Slack bot and drain queued events when the FastAPI app stops."""
+    await asyncio.to_thread(slack_bot.stop)
+
 @app.get("/healthz")
 async def healthz():
     return {"status": "ok"}
+
+@app.get("/stats")
+async def stats():
+    """Event dispatcher queue depth, counters and per-stage latency."""
+    return slack_bot.stats()
+
+@app.get("/metrics")
+async def metrics():
+    """Per-stage latency histograms, event counters and in-flight gauges in Prometheus text format."""
+    return Response(render_metrics(slack_bot), media_type=CONTENT_TYPE)
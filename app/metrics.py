@@ -0,0 +1,149 @@
+"""Prometheus text exposition of the bot's latency histograms, counters and gauges.
+
+``render_metrics(bot)`` builds the body served at ``/metrics`` (text format
+0.0.4) from the bot's LatencyRecorders and ``stats()``, so no client library
+is needed. ``invocation_counters`` and ``counters_since`` turn the same
+numbers into a per-invocation record for the Lambda handler.
+"""
+from typing import Any, Dict, List, Optional
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: Any) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+class _Exposition:
+    """Accumulates metric families as lines of the Prometheus text format."""
+
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def family(self, name: str, kind: str, help_text: str):
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+
+    def sample(self, name: str, value: Any, **labels):
+        if labels:
+            label_text = ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+            self.lines.append(f"{name}{{{label_text}}} {_number(value)}")
+        else:
+            self.lines.append(f"{name} {_number(value)}")
+
+    def histogram(self, name: str, help_text: str, recorder: Any):
+        histograms = recorder.histograms()
+        if not histograms:
+            return
+        self.family(name, "histogram", help_text)
+        bounds = [_number(bound) for bound in recorder.buckets] + ["+Inf"]
+        for stage, (cumulative, count, total) in sorted(histograms.items()):
+            for bound, bucket_count in zip(bounds, cumulative):
+                self.sample(f"{name}_bucket", bucket_count, stage=stage, le=bound)
+            self.sample(f"{name}_sum", total, stage=stage)
+            self.sample(f"{name}_count", count, stage=stage)
+
+    def labelled(self, name: str, kind: str, help_text: str, label: str, values: Dict[str, Any]):
+        self.family(name, kind, help_text)
+        for key, value in values.items():
+            self.sample(name, value, **{label: key})
+
+    def text(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def render_metrics(bot: Any) -> str:
+    """Render every metric the bot exposes in the Prometheus text format."""
+    stats = bot.stats()
+    out = _Exposition()
+
+    out.histogram("slackbot_stage_duration_seconds", "Time spent in each stage of event handling.", bot.latency)
+    outbound = getattr(bot, "outbound", None)
+    if outbound is not None:
+        out.histogram("slackbot_outbound_duration_seconds", "Reply queueing and chat.postMessage time.",
+                      outbound.latency)
+
+    out.family("slackbot_events_in_flight", "gauge", "Events currently being handled.")
+    out.sample("slackbot_events_in_flight", stats["in_flight"])
+    if "queue_depth" in stats:
+        out.family("slackbot_event_queue_depth", "gauge", "Acknowledged events waiting for a worker.")
+        out.sample("slackbot_event_queue_depth", stats["queue_depth"])
+        out.family("slackbot_event_queue_capacity", "gauge", "Maximum dispatcher queue size.")
+        out.sample("slackbot_event_queue_capacity", stats["queue_capacity"])
+    if "submitted" in stats:
+        out.labelled("slackbot_events_total", "counter", "Events by dispatcher outcome.", "outcome",
+                     {key: stats[key] for key in ("submitted", "completed", "failed", "rejected")})
+
+    dedup = stats.get("dedup")
+    if dedup is not None:
+        out.labelled("slackbot_dedup_events_total", "counter", "Events seen by the deduplicator by result.",
+                     "result", dedup)
+
+    cache = stats.get("profile_cache")
+    if cache is not None:
+        out.labelled("slackbot_profile_cache_lookups_total", "counter", "User profile cache lookups by result.",
+                     "result", {"hit": cache["hits"], "negative_hit": cache["negative_hits"],
+                                "miss": cache["misses"], "coalesced": cache["coalesced"]})
+        out.family("slackbot_profile_cache_hit_ratio", "gauge", "Share of profile lookups answered from the cache.")
+        out.sample("slackbot_profile_cache_hit_ratio", cache["hit_rate"])
+        out.family("slackbot_profile_cache_entries", "gauge", "Display names currently cached.")
+        out.sample("slackbot_profile_cache_entries", cache["size"])
+        out.labelled("slackbot_profile_cache_removals_total", "counter", "Cache entries dropped by reason.",
+                     "reason", {"evicted": cache["evictions"], "expired": cache["expirations"]})
+
+    outbound_stats = stats.get("outbound")
+    web_api_errors = {}
+    if cache is not None:
+        web_api_errors["users.info"] = cache["fetch_errors"]
+    if outbound_stats is not None:
+        web_api_errors["chat.postMessage"] = outbound_stats["failed"]
+        out.labelled("slackbot_outbound_messages_total", "counter", "Replies by outbound scheduler outcome.",
+                     "outcome", {key: outbound_stats[key] for key in ("enqueued", "sent", "coalesced", "throttled")})
+        out.family("slackbot_outbound_queue_depth", "gauge", "Replies waiting for a rate limit token.")
+        out.sample("slackbot_outbound_queue_depth", outbound_stats["queue_depth"])
+        out.labelled("slackbot_web_api_retries_total", "counter", "Web API calls retried after a failure.",
+                     "method", {"chat.postMessage": outbound_stats["retries"]})
+        out.labelled("slackbot_web_api_rate_limited_total", "counter", "Web API calls answered with HTTP 429.",
+                     "method", {"chat.postMessage": outbound_stats["rate_limited"]})
+    if web_api_errors:
+        out.labelled("slackbot_web_api_errors_total", "counter", "Web API calls that failed for good.",
+                     "method", web_api_errors)
+    return out.text()
+
+
+def invocation_counters(bot: Optional[Any]) -> Dict[str, Dict[str, float]]:
+    """Cumulative stage times (ms) and cache/Web API counters, for diffing around one invocation."""
+    if bot is None:
+        return {}
+    stages = {stage: total * 1000 for stage, (_, total) in bot.latency.totals().items()}
+    stages.update({stage: total * 1000 for stage, (_, total) in bot.outbound.latency.totals().items()})
+    cache = bot.profile_cache.stats()
+    outbound = bot.outbound.stats()
+    return {
+        "stages_ms": stages,
+        "profile_cache": {"hits": cache["hits"] + cache["negative_hits"],
+                          "misses": cache["misses"] + cache["coalesced"]},
+        "web_api": {"errors": cache["fetch_errors"] + outbound["failed"],
+                    "retries": outbound["retries"],
+                    "rate_limited": outbound["rate_limited"]},
+    }
+
+
+def counters_since(before: Dict[str, Dict[str, float]], after: Dict[str, Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+    """Per-group differences between two invocation_counters results, leaving out unchanged stages."""
+    result = {}
+    for group, values in after.items():
+        previous = before.get(group, {})
+        deltas = {key: round(value - previous.get(key, 0), 3) for key, value in values.items()}
+        if group == "stages_ms":
+            deltas = {key: value for key, value in deltas.items() if value}
+        result[group] = deltas
+    return result
@@ -1,40 +1,54 @@
 import asyncio
 import logging
+import threading
 from slack_sdk import WebClient
 from slack_sdk.socket_mode import SocketModeClient
 from slack_sdk.socket_mode.response import SocketModeResponse
 from slack_sdk.socket_mode.request import SocketModeRequest
 from slack_sdk.errors import SlackApiError
+from .dispatcher import EventDispatcher
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Handlers and level are set up by the entry point (see main.py), not on import
 logger = logging.getLogger('SlackWordCountBot')
 
 class SlackWordCountBot:
-    def __init__(self, bot_token: str, app_token: str):
+    def __init__(self, bot_token: str, app_token: str, workers: int = 4, max_queue_size: int = 100):
         """Initialize the bot with both bot token and app-level token."""
         logger.info("[SlackBot] Initializing bot with provided tokens")
         self.client = WebClient(token=bot_token)
+        self._bot_user_id_lock = threading.Lock()
+        # Socket Mode events are acked on the listener thread and handled by this pool
+        self.dispatcher = EventDispatcher(
+            self.handle_event,
+            workers=workers,
+            max_queue_size=max_queue_size
+        )
         self.socket_client = SocketModeClient(
             app_token=app_token,
             web_client=self.client
         )
         logger.info("[SlackBot] Initialization complete")
         
+    @property
+    def latency(self):
+        """Per-stage latency recorder shared by the dispatcher and the message handler."""
+        return self.dispatcher.latency
+
+    def stats(self) -> dict:
+        """Event dispatcher queue depth, counters and per-stage latency."""
+        return self.dispatcher.stats()
+
     def count_words(self, text: str) -> int:
         """Count words in a message."""
         return len(text.split())
     
     async def handle_message(self, channel: str, user: str, text: str):
         """Handle incoming message and respond with word count."""
-        logger.info(f"[SlackBot] Processing message: '{text[:50]}...' from user {user}")
+        logger.info("[SlackBot] Processing %s-character message from user %s", len(text), user)
         word_count = self.count_words(text)
         try:
             response = f"Your message contains {word_count} words."
-            logger.info(f"[SlackBot] Sending response to channel {channel}")
+            logger.info("[SlackBot] Sending response to channel %s", channel)
             await self.client.chat_postMessage(
                 channel=channel,
                 text=response,
@@ -43,70 +57,92 @@ class SlackWordCountBot:
             logger.info("[SlackBot] Response sent successfully")
         except SlackApiError as e:
             error_msg = e.response['error']
-            logger.error(f"[SlackBot] Error sending message: {error_msg}")
+            logger.error("[SlackBot] Error sending message: %s", error_msg)
             raise  # Re-raise to allow proper error handling
             
     def process_event(self, client: SocketModeClient, req: SocketModeRequest):
         """Process incoming Socket Mode events."""
-        logger.info(f"[SlackBot] Received event: {req.type}")
-        logger.debug(f"[SlackBot] Full event payload: {req.payload}")
+        logger.info("[SlackBot] Received event: %s", req.type)
+        logger.debug("[SlackBot] Full event payload: %s", req.payload)
         
         if req.type == "events_api":
             # Acknowledge the request
-            response = SocketModeResponse(envelope_id=req.envelope_id)
-            client.send_socket_mode_response(response)
+            with self.latency.time("ack"):
+                response = SocketModeResponse(envelope_id=req.envelope_id)
+                client.send_socket_mode_response(response)
             logger.info("[SlackBot] Acknowledged event request")
             
-            # Process the event
-            event = req.payload["event"]
-            logger.info(f"[SlackBot] Event type: {event.get('type')}")
-            
-            if event["type"] == "message" and "subtype" not in event:
-                channel = event.get("channel")
-                user = event.get("user")
-                text = event.get("text")
-                
-                # Get bot's own user ID if we haven't stored it yet
-                if not hasattr(self, 'bot_user_id'):
-                    try:
-                        auth_response = self.client.auth_test()
-                        self.bot_user_id = auth_response["user_id"]
-                        logger.info(f"[SlackBot] Bot user ID: {self.bot_user_id}")
-                    except Exception as e:
-                        logger.error(f"[SlackBot] Error getting bot user ID: {str(e)}")
-                        self.bot_user_id = None
+            # Hand the event to the worker pool so the listener is free for the next one
+            self.dispatcher.submit(req.payload["event"])
 
-                # Ignore messages from the bot itself
-                if user == self.bot_user_id:
-                    logger.info("[SlackBot] Ignoring message from self")
-                    return
-                
-                if channel and user and text:
-                    logger.info(f"[SlackBot] Processing message: '{text}' from user {user} in channel {channel}")
-                    # Run handle_message directly without create_task
+    def handle_event(self, event: dict):
+        """Handle a single acknowledged Events API event on a dispatcher worker."""
+        logger.info("[SlackBot] Event type: %s", event.get('type'))
+        
+        if event["type"] == "message" and "subtype" not in event:
+            channel = event.get("channel")
+            user = event.get("user")
+            text = event.get("text")
+            
+            # Ignore messages from the bot itself
+            with self.latency.time("self_check"):
+                from_self = user == self.get_bot_user_id()
+            if from_self:
+                logger.info("[SlackBot] Ignoring message from self")
+                return
+            
+            if channel and user and text:
+                logger.info("[SlackBot] Processing %s-character message from user %s in channel %s",
+                            len(text), user, channel)
+                with self.latency.time("analysis"):
                     word_count = self.count_words(text)
-                    response = f"Your message contains {word_count} words."
-                    try:
+                response = f"Your message contains {word_count} words."
+                try:
+                    with self.latency.time("chat_postMessage"):
                         self.client.chat_postMessage(
                             channel=channel,
                             text=response
                         )
-                        logger.info(f"[SlackBot] Sent response: {response}")
-                    except Exception as e:
-                        logger.error(f"[SlackBot] Error sending response: {str(e)}")
-                else:
-                    logger.warning(f"[SlackBot] Incomplete message event received: channel={channel}, user={user}, has_text={bool(text)}")
+                    logger.info("[SlackBot] Sent response: %s", response)
+                except Exception as e:
+                    logger.error("[SlackBot] Error sending response: %s", e)
             else:
-                logger.info(f"[SlackBot] Skipping non-message event or message with subtype: {event.get('subtype', 'no subtype')}")
+                logger.warning("[SlackBot] Incomplete message event received: channel=%s, user=%s, has_text=%s",
+                               channel, user, bool(text))
+        else:
+            logger.info("[SlackBot] Skipping non-message event or message with subtype: %s",
+                        event.get('subtype', 'no subtype'))
                     
     def start(self):
         """Start the Socket Mode client."""
         logger.info("[SlackBot] Starting Socket Mode client...")
         try:
+            self.dispatcher.start()
             self.socket_client.socket_mode_request_listeners.append(self.process_event)
             logger.info("[SlackBot] Added event listener")
             self.socket_client.connect()
             logger.info("[SlackBot] Socket Mode connection initiated")
         except Exception as e:
-            logger.error(f"[SlackBot] Failed to start Socket Mode client: {str(e)}")
+            logger.error("[SlackBot] Failed to start Socket Mode client: %s", e)
             raise
+
+    def stop(self, drain: bool = True, timeout: float = 10.0):
+        """Close the Socket Mode connection and drain queued events."""
+        logger.info("[SlackBot] Closing Socket Mode client...")
+        self.socket_client.close()
+        self.dispatcher.shutdown(drain=drain, timeout=timeout)
+
+    def get_bot_user_id(self):
+        """Return the bot's own user ID, calling auth.test once and caching the result."""
+        if not hasattr(self, 'bot_user_id'):
+            with self._bot_user_id_lock:
+                if not hasattr(self, 'bot_user_id'):
+                    try:
+                        with self.latency.time("auth_test"):
+                            auth_response = self.client.auth_test()
+                        self.bot_user_id = auth_response["user_id"]
+                        logger.info("[SlackBot] Bot user ID: %s", self.bot_user_id)
+                    except Exception as e:
+                        logger.error("[SlackBot] Error getting bot user ID: %s", e)
+                        self.bot_user_id = None
+        return self.bot_user_id
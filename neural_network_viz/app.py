@@ -1,7 +1,10 @@
 import streamlit as st
 import numpy as np
 from neural_network import NeuralNetwork
-import matplotlib.pyplot as plt
+from network_diagram import NetworkDiagram
+from data_loading import DataFormatError, load_file, parse_text, split_targets
+from training_session import TrainingSession
+import io
 import time
 import pandas as pd
 
@@ -18,142 +21,80 @@ if 'nn' not in st.session_state:
 # Function to parse input data
 def parse_input_data(input_text, output_text):
     try:
-        # Parse input data
-        input_rows = [row.strip().split(',') for row in input_text.strip().split('\n')]
-        X = np.array([[float(val) for val in row] for row in input_rows])
-
-        # Parse output data
-        output_rows = [row.strip() for row in output_text.strip().split('\n')]
-        y = np.array([[float(val)] for val in output_rows])
-
-        if X.shape[1] != 2:
-            st.error("Input data must have exactly 2 features per row")
-            return None, None
-        if X.shape[0] != y.shape[0]:
-            st.error("Number of input and output rows must match")
-            return None, None
-
-        return X, y
-    except:
-        st.error("Invalid data format. Please check your input.")
+        X = parse_text(input_text)
+        y = parse_text(output_text)
+    except DataFormatError as e:
+        st.error(f"Invalid data format: {e}")
         return None, None
 
-def create_network_plot():
-    fig, ax = plt.subplots(figsize=(10, 6))
-    ax.set_xlim(-0.5, 3.5)
-    ax.set_ylim(-0.5, 3.5)
-    ax.axis('off')
-    return fig, ax
-
-def create_loss_plot():
-    """Create a plot showing loss over epochs"""
-    fig, ax = plt.subplots(figsize=(10, 4))
-
-    # Plot only final loss for each epoch
-    epochs = range(1, len(st.session_state.nn.loss_history) + 1)
-    ax.plot(epochs, st.session_state.nn.loss_history,
-            'b-', label='Loss', linewidth=2)
-
-    ax.set_xlabel('Epoch')
-    ax.set_ylabel('Loss')
-    ax.set_title('Training Loss Over Time')
-    ax.grid(True, alpha=0.3)
-    ax.legend()
-
-    return fig
-
-def draw_network(ax, nn):
-    ax.clear()
-    ax.set_xlim(-0.5, 3.5)
-    ax.set_ylim(-0.5, 3.5)
-    ax.axis('off')
-
-    # Add legend at the top right
-    legend_elements = [
-        plt.Line2D([0], [0], color='black', label='Old Value'),
-        plt.Line2D([0], [0], color='blue', label='New Value')
-    ]
-    ax.legend(handles=legend_elements, loc='upper right')
-
-    # Node positions
-    input_pos = [(0, 0.5), (0, 2.5)]
-    hidden_pos = [(1.5, i) for i in [0.5, 1.5, 2.5]]
-    output_pos = [(3, 1.5)]
-
-    node_radius = 0.2  # Radius of the nodes
-
-    # Draw nodes with labels
-    for i, pos in enumerate(input_pos):
-        ax.add_patch(plt.Circle(pos, node_radius, color='lightblue'))
-        ax.text(pos[0] - 0.3, pos[1], f'Input {i+1}', fontsize=12)
-
-    for i, pos in enumerate(hidden_pos):
-        ax.add_patch(plt.Circle(pos, node_radius, color='lightgreen'))
-        if hasattr(nn, 'previous_bias1'):
-            ax.text(pos[0] - 0.1, pos[1] - 0.3, f'b: {nn.previous_bias1[i]:.2f}',
-                   fontsize=12, color='black')
-            ax.text(pos[0] - 0.1, pos[1] - 0.5, f'b: {nn.bias1[i]:.2f}',
-                   fontsize=12, color='blue')
-        else:
-            ax.text(pos[0] - 0.1, pos[1] - 0.3, f'b: {nn.bias1[i]:.2f}', fontsize=12)
-
-    for pos in output_pos:
-        ax.add_patch(plt.Circle(pos, node_radius, color='lightcoral'))
-        if hasattr(nn, 'previous_bias2'):
-            ax.text(pos[0] - 0.1, pos[1] - 0.3, f'b: {nn.previous_bias2[0]:.2f}',
-                   fontsize=12, color='black')
-            ax.text(pos[0] - 0.1, pos[1] - 0.5, f'b: {nn.bias2[0]:.2f}',
-                   fontsize=12, color='blue')
-        else:
-            ax.text(pos[0] - 0.1, pos[1] - 0.3, f'b: {nn.bias2[0]:.2f}', fontsize=12)
-
-    # Function to calculate edge point
-    def calculate_edge_point(p1, p2, radius):
-        dx, dy = p2[0] - p1[0], p2[1] - p1[1]
-        dist = (dx**2 + dy**2)**0.5
-        if dist == 0:
-            return p1  # Avoid division by zero
-        scale = radius / dist
-        return (p1[0] + dx * scale, p1[1] + dy * scale)
-
-    # Draw connections with weights and changes
-    for i, input_p in enumerate(input_pos):
-        for j, hidden_p in enumerate(hidden_pos):
-            start = calculate_edge_point(input_p, hidden_p, node_radius)
-            end = calculate_edge_point(hidden_p, input_p, node_radius)
-            weight = nn.weights1[i, j]
-            ax.arrow(start[0], start[1], end[0]-start[0], end[1]-start[1],
-                     color='gray', linewidth=2, head_width=0.05, head_length=0.1, length_includes_head=True)
-            if hasattr(nn, 'previous_weights1'):
-                ax.text((start[0] + end[0]) / 2,
-                        (start[1] + end[1]) / 2,
-                        f'w: {nn.previous_weights1[i, j]:.2f}', fontsize=12, color='black')
-                ax.text((start[0] + end[0]) / 2,
-                        (start[1] + end[1]) / 2 - 0.2,
-                        f'w: {weight:.2f}', fontsize=12, color='blue')
-            else:
-                ax.text((start[0] + end[0]) / 2,
-                        (start[1] + end[1]) / 2,
-                        f'w: {weight:.2f}', fontsize=12)
-
-    for i, hidden_p in enumerate(hidden_pos):
-        for j, output_p in enumerate(output_pos):
-            start = calculate_edge_point(hidden_p, output_p, node_radius)
-            end = calculate_edge_point(output_p, hidden_p, node_radius)
-            weight = nn.weights2[i, j]
-            ax.arrow(start[0], start[1], end[0]-start[0], end[1]-start[1],
-                     color='gray', linewidth=2, head_width=0.05, head_length=0.1, length_includes_head=True)
-            if hasattr(nn, 'previous_weights2'):
-                ax.text((start[0] + end[0]) / 2,
-                        (start[1] + end[1]) / 2,
-                        f'w: {nn.previous_weights2[i, j]:.2f}', fontsize=12, color='black')
-                ax.text((start[0] + end[0]) / 2,
-                        (start[1] + end[1]) / 2 - 0.2,
-                        f'w: {weight:.2f}', fontsize=12, color='blue')
-            else:
-                ax.text((start[0] + end[0]) / 2,
-                        (start[1] + end[1]) / 2,
-                        f'w: {weight:.2f}', fontsize=12)
+    if X.shape[0] != y.shape[0]:
+        st.error("Number of input and output rows must match")
+        return None, None
+
+    return X, y
+
+def load_uploaded_data(uploaded_file, n_targets):
+    """Load an uploaded table whose last n_targets columns are the outputs."""
+    try:
+        return split_targets(load_file(uploaded_file.getvalue(), uploaded_file.name), n_targets)
+    except DataFormatError as e:
+        st.error(f"Could not load {uploaded_file.name}: {e}")
+        return None, None
+
+def parse_hidden_layers(text):
+    """Hidden layer widths from a comma-separated list such as "8,4" (empty for none)."""
+    try:
+        sizes = [int(val) for val in text.replace(' ', '').split(',') if val]
+    except ValueError:
+        st.sidebar.error("Hidden layers must be comma-separated integers")
+        return None
+    if any(size <= 0 for size in sizes):
+        st.sidebar.error("Hidden layer sizes must be positive")
+        return None
+    return sizes
+
+def stop_session():
+    """Stop any background training so the network can be used (or replaced) directly."""
+    session = st.session_state.get('session')
+    if session is not None:
+        session.stop()
+        st.session_state.epoch = session.nn.epoch
+        st.session_state.session = None
+
+def checkpoint_bytes(nn):
+    """The network saved as .npz bytes, rebuilt only when the network or its epoch changes."""
+    cached = st.session_state.get('checkpoint_cache')
+    if cached is None or cached[0] is not nn or cached[1] != nn.epoch:
+        buffer = io.BytesIO()
+        nn.save(buffer)
+        cached = st.session_state.checkpoint_cache = (nn, nn.epoch, buffer.getvalue())
+    return cached[2]
+
+def build_network(weights_init=None):
+    """Create a network matching the current data and sidebar architecture settings."""
+    config = st.session_state.architecture
+    return NeuralNetwork(
+        weights_init=weights_init,
+        layer_sizes=config['layer_sizes'],
+        hidden_activation=config['hidden_activation'],
+        output_activation=config['output_activation'],
+        dtype=config['dtype']
+    )
+
+def render_network(nn):
+    """SVG diagram of the network; the layout is computed once per architecture."""
+    diagram = st.session_state.get('diagram')
+    if diagram is None or not diagram.matches(nn):
+        diagram = st.session_state.diagram = NetworkDiagram(nn.layer_sizes)
+    st.markdown(diagram.render(nn), unsafe_allow_html=True)
+
+def render_loss_chart(epochs, losses):
+    """Loss over epochs, drawn client-side by Streamlit's chart component.
+
+    Takes the history's fixed-size min/max/last summary (LossHistory.downsampled),
+    so the chart costs the same after a million epochs as after a hundred.
+    """
+    st.line_chart(pd.DataFrame({'Loss': losses}, index=pd.Index(epochs, name='Epoch')))
 
 def display_results_table(X, y_actual, y_pred):
     import pandas as pd
@@ -162,9 +103,9 @@ def display_results_table(X, y_actual, y_pred):
     error = y_actual - y_pred
     results_df = pd.DataFrame({
         'Input X': [list(x) for x in X],
-        'Y Predicted': y_pred.flatten(),
-        'Y Actual': y_actual.flatten(),
-        'Error': error.flatten()
+        'Y Predicted': [list(row) if len(row) > 1 else row[0] for row in y_pred],
+        'Y Actual': [list(row) if len(row) > 1 else row[0] for row in y_actual],
+        'Error': [list(row) if len(row) > 1 else row[0] for row in error]
     })
 
     st.subheader("Results")
@@ -179,8 +120,8 @@ st.session_state.show_weight_changes = st.sidebar.checkbox("Show Weight Changes"
 st.sidebar.header("Training Data Input")
 st.sidebar.markdown("""
 Input Format:
-- Input data: Two comma-separated values per line
-- Output data: One value per line
+- Input data: Comma-separated feature values, one row per line
+- Output data: One value (or comma-separated values) per line
 """)
 
 # Example data
@@ -194,37 +135,163 @@ output_data = st.sidebar.text_area("Output Data (y)",
                                   value=example_output,
                                   height=150)
 
-# Parse input data when provided
-X, y = parse_input_data(input_data, output_data)
+uploaded_file = st.sidebar.file_uploader("Or upload a table (last column(s) are y)",
+                                         type=["csv", "txt", "npy", "parquet"])
+n_targets = st.sidebar.number_input("Output columns in file", min_value=1, value=1, step=1)
+
+# Parse input data when provided (an uploaded file takes precedence over the text boxes)
+if uploaded_file is not None:
+    X, y = load_uploaded_data(uploaded_file, int(n_targets))
+else:
+    X, y = parse_input_data(input_data, output_data)
+
+# Network architecture
+st.sidebar.header("Network Architecture")
+hidden_text = st.sidebar.text_input("Hidden layer sizes", value="3",
+                                    help="Comma-separated widths, e.g. 8,4")
+hidden_activation = st.sidebar.selectbox("Hidden activation", ["sigmoid", "tanh", "relu"])
+output_activation = st.sidebar.selectbox("Output activation", ["linear", "sigmoid", "tanh", "relu"],
+                                         help="Use linear for regression targets outside 0..1")
+dtype_name = st.sidebar.selectbox("Precision", ["float64", "float32"])
+hidden_sizes = parse_hidden_layers(hidden_text)
+if hidden_sizes is None:
+    X, y = None, None
+
+if hidden_sizes is not None and X is not None and y is not None:
+    architecture = {
+        'layer_sizes': tuple([X.shape[1]] + hidden_sizes + [y.shape[1]]),
+        'hidden_activation': hidden_activation,
+        'output_activation': output_activation,
+        'dtype': dtype_name
+    }
+    # A different architecture (or data shape) needs a fresh network
+    if st.session_state.get('architecture') != architecture:
+        stop_session()
+        st.session_state.architecture = architecture
+        st.session_state.nn = build_network()
+        st.session_state.epoch = 0
+        st.session_state.training = False
 
 
+# Background training settings
+st.sidebar.header("Background Training")
+max_epochs = st.sidebar.number_input("Epochs to run (0 = until stopped)", min_value=0, value=0, step=1000)
+snapshots_per_second = st.sidebar.slider("Updates per second", min_value=1, max_value=20, value=4)
+checkpoint_path = st.sidebar.text_input("Checkpoint file (optional)", value="",
+                                        help="Saved every minute during background training and when it ends")
+
+session = st.session_state.get('session')
+session_active = session is not None and session.active
+data_missing = X is None or y is None
+
+# Checkpoint download/resume (not while the worker owns the network)
+st.sidebar.header("Checkpoint")
+if not session_active:
+    st.sidebar.download_button("Download checkpoint", data=checkpoint_bytes(st.session_state.nn),
+                               file_name=f"network-epoch{st.session_state.nn.epoch}.npz")
+checkpoint_file = st.sidebar.file_uploader("Resume from checkpoint", type=["npz"])
+if st.sidebar.button("Load checkpoint", disabled=checkpoint_file is None or session_active):
+    try:
+        loaded = NeuralNetwork.load(io.BytesIO(checkpoint_file.getvalue()))
+    except (ValueError, KeyError, OSError) as e:
+        st.sidebar.error(f"Could not load checkpoint: {e}")
+    else:
+        current = st.session_state.get('architecture')
+        if current is not None and (loaded.layer_sizes, loaded.hidden_activation, loaded.output_activation,
+                                    loaded.dtype.name) != (current['layer_sizes'], current['hidden_activation'],
+                                                           current['output_activation'], current['dtype']):
+            st.sidebar.error(f"Checkpoint is a {loaded.layer_sizes} {loaded.hidden_activation}/"
+                             f"{loaded.output_activation} {loaded.dtype.name} network; "
+                             "match the architecture settings and data first")
+        else:
+            stop_session()
+            session = None
+            st.session_state.nn = loaded
+            st.session_state.epoch = loaded.epoch
+            st.session_state.training = False
+
 trainingCount=0
 
 # Training controls
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    if st.button("Train One Epoch", disabled=X is None or y is None):
+    if st.button("Train One Epoch", disabled=data_missing or session_active):
         st.session_state.training = True
         trainingCount=1
 
 
 with col2:
-    if st.button("Train Ten Epochs", disabled=X is None or y is None):
+    if st.button("Train Ten Epochs", disabled=data_missing or session_active):
         st.session_state.training = True
         trainingCount=10
 
 with col3:
-    if st.button("Train 100 Epochs", disabled=X is None or y is None):
+    if st.button("Train 100 Epochs", disabled=data_missing or session_active):
         st.session_state.training = True
         trainingCount=100
 
 with col4:
     if st.button("Reset Network"):
-        st.session_state.nn = NeuralNetwork(weights_init=0.0)  # Initialize weights to zero
+        stop_session()
+        session = None
+        if 'architecture' in st.session_state:
+            st.session_state.nn = build_network(weights_init=0.0)  # Initialize weights to zero
+        else:
+            st.session_state.nn = NeuralNetwork(weights_init=0.0)
         st.session_state.epoch = 0
         st.session_state.training = False
 
+# A manual training step replaces the view of a finished background session
+if trainingCount:
+    st.session_state.session = None
+
+# Background training controls
+bg_col1, bg_col2, bg_col3 = st.columns(3)
+
+with bg_col1:
+    if st.button("Start Background Training", disabled=data_missing or session_active):
+        session = st.session_state.session = TrainingSession(
+            st.session_state.nn, X, y,
+            max_epochs=int(max_epochs) or None,
+            snapshot_interval=1.0 / snapshots_per_second,
+            checkpoint_path=checkpoint_path or None
+        )
+        session.start()
+        st.session_state.training = False
+
+with bg_col2:
+    if session is not None and session.state == 'paused':
+        if st.button("Resume"):
+            session.resume()
+    elif st.button("Pause", disabled=session is None or not session.active):
+        session.pause()
+
+with bg_col3:
+    if st.button("Stop", disabled=session is None or not session.active):
+        stop_session()
+
+session = st.session_state.get('session')
+if session is not None:
+    # Show the latest snapshot published by the worker; the network itself
+    # belongs to the worker thread until the session is stopped
+    snapshot = session.snapshot()
+    st.session_state.epoch = snapshot.epoch
+    st.write(f"Background training: {snapshot.state}, {snapshot.epochs_per_second:,.0f} epochs/s")
+    if snapshot.error:
+        st.error(f"Training failed: {snapshot.error}")
+    net_col, loss_col = st.columns([3, 2])
+    with net_col:
+        st.subheader("Network State")
+        if snapshot.loss is not None:
+            st.write(f"Loss: {snapshot.loss:.4f}")
+        render_network(snapshot)
+    with loss_col:
+        st.subheader("Training Progress")
+        render_loss_chart(snapshot.loss_epochs, snapshot.loss_values)
+        if snapshot.predictions is not None and not data_missing and len(snapshot.predictions) == len(X):
+            display_results_table(X, y, snapshot.predictions)
+
 # Display current epoch
 st.write(f"Current Epoch: {st.session_state.epoch}")
 
@@ -235,13 +302,11 @@ if st.session_state.training and X is not None and y is not None:
 
     with net_col:
         st.subheader("Network State")
-        fig, ax = create_network_plot()
-
-        # Forward pass
+        # Run all requested epochs in one call; the diagram only shows the
+        # last epoch's previous/new parameters, which fit() snapshots at the end
         final_loss = None
-        for _ in range(trainingCount):
-            output = st.session_state.nn.forward(X)
-            initial_loss, final_loss, error = st.session_state.nn.backward(X, y)
+        if trainingCount:
+            final_loss = st.session_state.nn.fit(X, y, trainingCount)['loss']
 
         # Display metrics
         metrics_col1, metrics_col2 = st.columns(2)
@@ -252,15 +317,11 @@ if st.session_state.training and X is not None and y is not None:
                 st.write(f"Loss: {final_loss:.4f}")
 
         # Update visualization
-        draw_network(ax, st.session_state.nn)
-        st.pyplot(fig)
-        plt.close(fig)
+        render_network(st.session_state.nn)
 
     with loss_col:
         st.subheader("Training Progress")
-        loss_fig = create_loss_plot()
-        st.pyplot(loss_fig)
-        plt.close(loss_fig)
+        render_loss_chart(*st.session_state.nn.loss_history.downsampled())
         # Show the results table
         y_pred = st.session_state.nn.forward(X)  # Predicted outputs
         display_results_table(X, y, y_pred)     # Call the results table function
@@ -268,3 +329,8 @@ if st.session_state.training and X is not None and y is not None:
 
     # Increment epoch
     st.session_state.epoch += trainingCount
+
+# Poll for the next snapshot while the worker is running
+if session is not None and session.state == 'running':
+    time.sleep(1.0 / snapshots_per_second)
+    st.rerun()
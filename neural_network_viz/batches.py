@@ -0,0 +1,127 @@
+"""Mini-batch sources for NeuralNetwork.fit_batches.
+
+ArrayBatches splits (X, y) arrays into shuffled batches. The arrays can be
+ordinary in-memory arrays or memory-mapped .npy files (see load_npy), in which
+case rows are read chunk by chunk and only the current chunk is resident.
+Prefetcher moves batch loading onto a background thread so reading and
+converting the next batches overlaps with training on the current one.
+"""
+import queue
+import threading
+
+import numpy as np
+
+
+def load_npy(path):
+    """Open a .npy file as a read-only memory map, without reading it into RAM."""
+    return np.load(path, mmap_mode='r')
+
+
+class ArrayBatches:
+    """Re-iterable (X_batch, y_batch) batches over a pair of row-aligned arrays.
+
+    Each iteration is a new epoch with a new shuffle. In-memory arrays get a
+    full random permutation. Memory-mapped arrays are shuffled in two levels
+    so reads stay sequential: the order of contiguous chunks of chunk_size
+    rows is shuffled, then the rows inside each loaded chunk. chunk_size
+    defaults to 64 batches for memmaps and the whole array otherwise.
+    """
+
+    def __init__(self, X, y, batch_size=32, shuffle=True, seed=None, chunk_size=None):
+        if len(X) != len(y):
+            raise ValueError("X and y must have the same number of rows")
+        if batch_size <= 0:
+            raise ValueError("batch_size must be positive")
+        self.X = X
+        self.y = y
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.rng = np.random.default_rng(seed)
+        if chunk_size is None:
+            chunk_size = batch_size * 64 if isinstance(X, np.memmap) or isinstance(y, np.memmap) else len(X)
+        self.chunk_size = max(chunk_size, batch_size)
+
+    def __len__(self):
+        """Number of batches per epoch."""
+        return -(-len(self.X) // self.batch_size)
+
+    def __iter__(self):
+        n_rows = len(self.X)
+        batch_size = self.batch_size
+        if self.chunk_size >= n_rows:
+            # Whole dataset is one chunk: permute row indices directly
+            order = self.rng.permutation(n_rows) if self.shuffle else None
+            for start in range(0, n_rows, batch_size):
+                if order is None:
+                    yield self.X[start:start + batch_size], self.y[start:start + batch_size]
+                else:
+                    index = order[start:start + batch_size]
+                    yield self.X[index], self.y[index]
+            return
+
+        starts = np.arange(0, n_rows, self.chunk_size)
+        if self.shuffle:
+            self.rng.shuffle(starts)
+        for chunk_start in starts:
+            # Contiguous read of one chunk, then shuffle within it
+            X_chunk = np.asarray(self.X[chunk_start:chunk_start + self.chunk_size])
+            y_chunk = np.asarray(self.y[chunk_start:chunk_start + self.chunk_size])
+            if self.shuffle:
+                order = self.rng.permutation(len(X_chunk))
+                X_chunk, y_chunk = X_chunk[order], y_chunk[order]
+            for start in range(0, len(X_chunk), batch_size):
+                yield X_chunk[start:start + batch_size], y_chunk[start:start + batch_size]
+
+
+class Prefetcher:
+    """Iterates over a batch source on a background thread, keeping up to `depth` batches ready.
+
+    Exceptions raised by the source are re-raised in the consumer. close()
+    stops the thread early, e.g. when training is interrupted.
+    """
+
+    _DONE = object()
+
+    def __init__(self, source, depth=2):
+        self._queue = queue.Queue(maxsize=max(1, depth))
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._fill, args=(source,), name="BatchPrefetcher", daemon=True)
+        self._thread.start()
+
+    def _fill(self, source):
+        try:
+            for item in source:
+                if not self._put(item):
+                    return
+            self._put(self._DONE)
+        except BaseException as e:
+            self._put(e)
+
+    def _put(self, item):
+        # Poll so close() can interrupt a producer blocked on a full queue
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def __iter__(self):
+        while True:
+            item = self._queue.get()
+            if item is self._DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+    def close(self):
+        """Stop the background thread and drop any batches still queued."""
+        self._stop.set()
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        self._thread.join()
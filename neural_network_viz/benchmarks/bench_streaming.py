@@ -0,0 +1,67 @@
+"""Mini-batch training over a memory-mapped dataset larger than the batch buffers.
+
+Writes X/y .npy files of n_samples rows to a temporary directory, then trains
+one epoch from np.load(..., mmap_mode='r') with fit_minibatch. Reports rows per
+second and the tracemalloc peak, which should stay roughly flat as n_samples
+grows (only the current chunk and the prefetched batches are resident).
+
+Usage (from neural_network_viz/):
+    python benchmarks/bench_streaming.py [n_samples ...]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from batches import load_npy
+from neural_network import NeuralNetwork
+
+FEATURES = 16
+BATCH_SIZE = 512
+
+
+def write_dataset(directory, n_samples):
+    x_path = os.path.join(directory, "X.npy")
+    y_path = os.path.join(directory, "y.npy")
+    X = np.lib.format.open_memmap(x_path, mode="w+", dtype=np.float32, shape=(n_samples, FEATURES))
+    y = np.lib.format.open_memmap(y_path, mode="w+", dtype=np.float32, shape=(n_samples, 1))
+    rng = np.random.default_rng(0)
+    weights = np.arange(FEATURES, dtype=np.float32) / FEATURES
+    for start in range(0, n_samples, 100_000):
+        rows = rng.random((min(100_000, n_samples - start), FEATURES), dtype=np.float32)
+        X[start:start + len(rows)] = rows
+        y[start:start + len(rows), 0] = rows @ weights
+    X.flush()
+    y.flush()
+    return x_path, y_path
+
+
+def measure(x_path, y_path):
+    np.random.seed(0)
+    nn = NeuralNetwork(layer_sizes=(FEATURES, 32, 1), hidden_activation="relu",
+                       output_activation="linear", dtype=np.float32)
+    X, y = load_npy(x_path), load_npy(y_path)
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = nn.fit_minibatch(X, y, epochs=1, batch_size=BATCH_SIZE, learning_rate=0.01 / BATCH_SIZE, seed=0)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(X) / elapsed, peak, result["loss"]
+
+
+def main(sizes):
+    print(f"{'samples':>10} {'rows/s':>12} {'peak MB':>9} {'loss':>10}")
+    for n_samples in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            x_path, y_path = write_dataset(directory, n_samples)
+            rate, peak, loss = measure(x_path, y_path)
+        print(f"{n_samples:>10} {rate:>12.0f} {peak / 1e6:>9.2f} {loss:>10.5f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000, 4_000_000])
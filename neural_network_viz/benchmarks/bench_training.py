@@ -0,0 +1,79 @@
+"""Compare the allocating forward()/backward() loop with NeuralNetwork.train_step.
+
+Reports time per epoch and the transient memory (tracemalloc peak above the
+steady state) allocated inside each epoch. train_step should stay at a small
+constant regardless of the number of samples; the script exits non-zero if it
+does not.
+
+Usage (from neural_network_viz/):
+    python benchmarks/bench_training.py [n_samples ...]
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from neural_network import NeuralNetwork
+
+EPOCHS = 200
+# Bytes of per-epoch scratch allowed for train_step (Python floats, array views)
+TRAIN_STEP_BUDGET = 4096
+
+
+def legacy_epoch(nn, X, y):
+    nn.forward(X)
+    nn.backward(X, y, learning_rate=0.1 / len(X))
+
+
+def fast_epoch(nn, X, y):
+    nn.train_step(X, y, learning_rate=0.1 / len(X))
+
+
+def measure(epoch_fn, X, y):
+    np.random.seed(0)
+    nn = NeuralNetwork()
+    # Warm up so buffers and previous-parameter arrays exist
+    for _ in range(3):
+        epoch_fn(nn, X, y)
+    nn.reset_history()
+
+    start = time.perf_counter()
+    for _ in range(EPOCHS):
+        epoch_fn(nn, X, y)
+    elapsed = (time.perf_counter() - start) / EPOCHS
+
+    tracemalloc.start()
+    worst = 0
+    for _ in range(EPOCHS):
+        nn.reset_history()
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        epoch_fn(nn, X, y)
+        _, peak = tracemalloc.get_traced_memory()
+        worst = max(worst, peak - baseline)
+    tracemalloc.stop()
+    return elapsed, worst
+
+
+def main(sizes):
+    ok = True
+    print(f"{'samples':>10} {'engine':>10} {'us/epoch':>12} {'peak bytes/epoch':>18}")
+    for n in sizes:
+        rng = np.random.default_rng(0)
+        X = rng.random((n, 2))
+        y = (2 * X[:, :1] + 3 * X[:, 1:]) / 5
+        for name, fn in (("legacy", legacy_epoch), ("train_step", fast_epoch)):
+            elapsed, peak = measure(fn, X, y)
+            print(f"{n:>10} {name:>10} {elapsed * 1e6:>12.1f} {peak:>18}")
+            if fn is fast_epoch and peak > TRAIN_STEP_BUDGET:
+                ok = False
+    if not ok:
+        print(f"train_step allocated more than {TRAIN_STEP_BUDGET} bytes in an epoch")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [4, 1000, 100000])
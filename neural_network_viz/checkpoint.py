@@ -0,0 +1,77 @@
+"""Uncompressed .npz checkpoints that can be opened with memory-mapping.
+
+np.load ignores mmap_mode for .npz archives. Because save_npz writes members
+uncompressed (ZIP_STORED), each one is a plain .npy file at a fixed offset in
+the archive, so load_npz can np.memmap it in place instead of reading it.
+"""
+import os
+import zipfile
+
+import numpy as np
+
+
+def save_npz(path_or_file, arrays):
+    """Write a dict of arrays as an uncompressed .npz.
+
+    When given a path, the file is written to a temporary name and renamed,
+    so a crash mid-save never leaves a truncated checkpoint behind.
+    """
+    if not isinstance(path_or_file, (str, os.PathLike)):
+        np.savez(path_or_file, **arrays)
+        return
+    tmp_path = f"{os.fspath(path_or_file)}.tmp"
+    # Pass a file object: np.savez would append ".npz" to a bare path
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path_or_file)
+
+
+def _member_offset(f, info):
+    """Offset of a stored member's data, from its local file header."""
+    f.seek(info.header_offset)
+    header = f.read(30)
+    if header[:4] != b'PK\x03\x04':
+        raise ValueError(f"Corrupt archive member {info.filename}")
+    name_length = int.from_bytes(header[26:28], 'little')
+    extra_length = int.from_bytes(header[28:30], 'little')
+    return info.header_offset + 30 + name_length + extra_length
+
+
+def load_npz(path_or_file, mmap_mode='c'):
+    """Load every array in an .npz into a dict.
+
+    With a path and mmap_mode set, uncompressed members are memory-mapped
+    ('c', the default, maps copy-on-write: arrays are writable but changes
+    never reach the file). Compressed members, object arrays and file-like
+    inputs fall back to a normal read.
+    """
+    if mmap_mode is None or not isinstance(path_or_file, (str, os.PathLike)):
+        with np.load(path_or_file, allow_pickle=False) as data:
+            return {name: data[name] for name in data.files}
+
+    arrays = {}
+    with zipfile.ZipFile(path_or_file) as archive, open(path_or_file, 'rb') as f:
+        for info in archive.infolist():
+            name = info.filename[:-4] if info.filename.endswith('.npy') else info.filename
+            if info.compress_type != zipfile.ZIP_STORED:
+                with archive.open(info) as member:
+                    arrays[name] = np.lib.format.read_array(member, allow_pickle=False)
+                continue
+            f.seek(_member_offset(f, info))
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            elif version == (2, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            else:
+                with archive.open(info) as member:
+                    arrays[name] = np.lib.format.read_array(member, allow_pickle=False)
+                continue
+            if dtype.hasobject:
+                raise ValueError(f"Checkpoint member {name} holds Python objects")
+            if 0 in shape:
+                arrays[name] = np.empty(shape, dtype=dtype)
+                continue
+            arrays[name] = np.memmap(path_or_file, dtype=dtype, mode=mmap_mode, offset=f.tell(),
+                                     shape=shape, order='F' if fortran_order else 'C')
+    return arrays
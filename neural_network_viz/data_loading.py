@@ -0,0 +1,141 @@
+"""Bulk loading of training data from pasted text or uploaded files.
+
+Text and CSV are parsed with np.loadtxt, which runs in C, so a paste of 100k
+rows is parsed in one call. Only when that fails is the text rescanned line
+by line to find the row and column of the first bad value. Results are
+cached on a hash of the content, so Streamlit reruns with the same data skip
+parsing entirely.
+"""
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Parsed arrays kept for the most recently seen contents
+CACHE_SIZE = 8
+_cache = OrderedDict()
+# Streamlit runs each session's script in its own thread
+_cache_lock = threading.Lock()
+
+
+class DataFormatError(ValueError):
+    """Bad training data; row and column are 1-based (None when not applicable)."""
+
+    def __init__(self, message, row=None, column=None):
+        super().__init__(message)
+        self.row = row
+        self.column = column
+
+
+def _cached(kind, content, parse):
+    key = (kind, hashlib.sha256(content).hexdigest())
+    with _cache_lock:
+        array = _cache.get(key)
+        if array is not None:
+            _cache.move_to_end(key)
+            return array
+    # Parsed outside the lock so a large upload does not hold up other sessions
+    array = parse()
+    # Shared between callers, so make sure nobody modifies it in place
+    array.setflags(write=False)
+    with _cache_lock:
+        _cache[key] = array
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return array
+
+
+def _locate_error(text, delimiter):
+    """Slow path: find the first row/column that np.loadtxt rejected."""
+    n_columns = None
+    for row, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        values = line.split(delimiter)
+        for column, value in enumerate(values, start=1):
+            try:
+                float(value)
+            except ValueError:
+                raise DataFormatError(f"Invalid number {value.strip()!r} at row {row}, column {column}",
+                                      row=row, column=column)
+        if n_columns is None:
+            n_columns = len(values)
+        elif len(values) != n_columns:
+            raise DataFormatError(f"Row {row} has {len(values)} values, expected {n_columns}",
+                                  row=row, column=min(len(values), n_columns) + 1)
+    return None
+
+
+def parse_text(text, delimiter=','):
+    """Parse delimited numbers (one row per line) into a 2-D float64 array."""
+    def parse():
+        if not text.strip():
+            raise DataFormatError("No data")
+        try:
+            return np.loadtxt(io.StringIO(text), delimiter=delimiter, dtype=np.float64, ndmin=2)
+        except ValueError as e:
+            _locate_error(text, delimiter)
+            raise DataFormatError(f"Invalid data: {e}")
+    return _cached(('text', delimiter), text.encode(), parse)
+
+
+def _read_npy(content):
+    try:
+        array = np.load(io.BytesIO(content), allow_pickle=False)
+    except ValueError as e:
+        raise DataFormatError(f"Not a valid .npy file: {e}")
+    if array.ndim == 1:
+        array = array.reshape(-1, 1)
+    if array.ndim != 2:
+        raise DataFormatError(f".npy data must be 1-D or 2-D, got shape {array.shape}")
+    try:
+        return array.astype(np.float64, copy=False)
+    except (TypeError, ValueError):
+        raise DataFormatError(f".npy data must be numeric, got dtype {array.dtype}")
+
+
+def _read_parquet(content):
+    # Optional dependency: only needed for Parquet uploads
+    try:
+        import pandas as pd
+        frame = pd.read_parquet(io.BytesIO(content))
+    except ImportError:
+        raise DataFormatError("Reading Parquet files requires pandas and pyarrow")
+    for column, dtype in enumerate(frame.dtypes, start=1):
+        # Also accepts pandas' nullable extension dtypes (Int64, Float64, boolean)
+        if not pd.api.types.is_numeric_dtype(dtype):
+            raise DataFormatError(f"Column {column} ({frame.columns[column - 1]!r}) is not numeric",
+                                  column=column)
+    array = frame.to_numpy(dtype=np.float64, na_value=np.nan)
+    missing = np.argwhere(np.isnan(array))
+    if len(missing):
+        row, column = missing[0] + 1
+        raise DataFormatError(f"Missing value at row {row}, column {column}", row=int(row), column=int(column))
+    return array
+
+
+def load_file(content, filename):
+    """Load an uploaded .csv/.txt, .npy or .parquet file into a 2-D float64 array."""
+    extension = os.path.splitext(filename)[1].lower()
+    if extension in ('.csv', '.txt'):
+        try:
+            text = content.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise DataFormatError("CSV files must be UTF-8 text")
+        return parse_text(text)
+    if extension == '.npy':
+        return _cached('npy', content, lambda: _read_npy(content))
+    if extension in ('.parquet', '.pq'):
+        return _cached('parquet', content, lambda: _read_parquet(content))
+    raise DataFormatError(f"Unsupported file type '{extension}', expected .csv, .npy or .parquet")
+
+
+def split_targets(data, n_targets=1):
+    """Split a table whose last n_targets columns are the targets into (X, y)."""
+    if not 0 < n_targets < data.shape[1]:
+        raise DataFormatError(f"Need at least one feature column and {n_targets} target column(s), "
+                              f"got {data.shape[1]} columns")
+    return data[:, :-n_targets], data[:, -n_targets:]
@@ -0,0 +1,159 @@
+"""Micro-batching of concurrent prediction requests.
+
+Requests that arrive within max_wait seconds of each other (up to
+max_batch_rows rows) are stacked into one array and answered by a single
+vectorized predict call on a thread pool, so the event loop never runs the
+matrix maths and many small requests cost about as much as one large one.
+"""
+import asyncio
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+class InferenceStats:
+    """Request latency percentiles and batch-size histograms over the most recent requests."""
+
+    def __init__(self, window=10000):
+        self.latencies = deque(maxlen=window)
+        self.queue_waits = deque(maxlen=window)
+        self.batch_requests = Counter()
+        self.batch_rows = Counter()
+        self.requests = 0
+        self.batches = 0
+        self.errors = 0
+
+    @staticmethod
+    def _bucket(n):
+        """Power-of-two histogram bucket label: 1, 2, 4, 8, ... (upper bound)."""
+        return str(1 << max(0, int(n - 1).bit_length()))
+
+    def record_batch(self, n_requests, n_rows):
+        self.batches += 1
+        self.batch_requests[self._bucket(n_requests)] += 1
+        self.batch_rows[self._bucket(n_rows)] += 1
+
+    def record_request(self, latency, queue_wait):
+        self.requests += 1
+        self.latencies.append(latency)
+        self.queue_waits.append(queue_wait)
+
+    @staticmethod
+    def _percentiles_ms(samples):
+        if not samples:
+            return {"p50_ms": None, "p99_ms": None}
+        p50, p99 = np.percentile(np.fromiter(samples, dtype=float, count=len(samples)), [50, 99])
+        return {"p50_ms": round(float(p50) * 1000, 3), "p99_ms": round(float(p99) * 1000, 3)}
+
+    def snapshot(self):
+        by_bound = lambda counter: dict(sorted(counter.items(), key=lambda item: int(item[0])))
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "errors": self.errors,
+            "avg_requests_per_batch": round(self.requests / self.batches, 2) if self.batches else None,
+            "latency": self._percentiles_ms(self.latencies),
+            "queue_wait": self._percentiles_ms(self.queue_waits),
+            "batch_requests_histogram": by_bound(self.batch_requests),
+            "batch_rows_histogram": by_bound(self.batch_rows),
+        }
+
+
+class MicroBatcher:
+    """Collects concurrent predict() calls into batched calls of predict_fn.
+
+    predict_fn takes a 2-D array and returns one output row per input row;
+    it runs on a pool of `workers` threads, so it must be thread-safe when
+    workers > 1 (NeuralNetwork.predict is). Must be started and used on one
+    running event loop.
+    """
+
+    def __init__(self, predict_fn, max_batch_rows=1024, max_wait=0.002, workers=1):
+        self.predict_fn = predict_fn
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait
+        self.workers = workers
+        self.stats = InferenceStats()
+        self._executor = None
+        self._queue = None
+        self._slots = None
+        self._collector = None
+        self._batch_tasks = set()
+
+    async def start(self):
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="Inference")
+        self._queue = asyncio.Queue()
+        # One slot per worker thread: collection pauses while every worker is busy,
+        # letting the next batch grow instead of queueing tiny ones
+        self._slots = asyncio.Semaphore(self.workers)
+        self._collector = asyncio.create_task(self._collect())
+
+    async def stop(self):
+        if self._collector:
+            self._collector.cancel()
+            try:
+                await self._collector
+            except asyncio.CancelledError:
+                pass
+        if self._batch_tasks:
+            await asyncio.gather(*self._batch_tasks, return_exceptions=True)
+        if self._executor:
+            self._executor.shutdown(wait=True)
+
+    async def predict(self, rows):
+        """Queue a (n, features) array and wait for its (n, outputs) predictions."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((rows, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._slots.acquire()
+            batch = [await self._queue.get()]
+            n_rows = len(batch[0][0])
+            deadline = loop.time() + self.max_wait
+            while n_rows < self.max_batch_rows:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                n_rows += len(item[0])
+            # Take anything else already waiting without another timer
+            while n_rows < self.max_batch_rows and not self._queue.empty():
+                item = self._queue.get_nowait()
+                batch.append(item)
+                n_rows += len(item[0])
+            task = loop.create_task(self._run_batch(batch, n_rows))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _run_batch(self, batch, n_rows):
+        try:
+            dispatched = time.perf_counter()
+            inputs = batch[0][0] if len(batch) == 1 else np.concatenate([rows for rows, _, _ in batch])
+            try:
+                outputs = await asyncio.get_running_loop().run_in_executor(self._executor, self.predict_fn, inputs)
+            except Exception as e:
+                self.stats.errors += len(batch)
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            self.stats.record_batch(len(batch), n_rows)
+            finished = time.perf_counter()
+            start = 0
+            for rows, future, queued in batch:
+                end = start + len(rows)
+                if not future.done():
+                    future.set_result(outputs[start:end])
+                self.stats.record_request(finished - queued, dispatched - queued)
+                start = end
+        finally:
+            self._slots.release()
@@ -0,0 +1,136 @@
+"""SVG rendering of a NeuralNetwork for the Streamlit app.
+
+All geometry is computed once per architecture: node positions, the clipped
+edge endpoints and every static element are baked into a template string with
+placeholders. Rendering an epoch fills in only the weight/bias labels and the
+edge colours and widths, then the browser draws the vector image. Nothing is
+rasterized on the server.
+"""
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+# Layout units (one unit between hidden nodes), scaled to pixels
+SCALE = 110
+NODE_RADIUS = 0.2
+LAYER_SPACING = 1.5
+MARGIN = 0.6
+# Per-edge weight labels are only readable on small networks
+MAX_LABELLED_EDGES = 40
+NODE_COLORS = {'input': 'lightblue', 'hidden': 'lightgreen', 'output': 'lightcoral'}
+POSITIVE_COLOR = '#1f77b4'
+NEGATIVE_COLOR = '#d62728'
+
+
+def _column_positions(layer, size, height):
+    spacing = 2.0 if size <= 2 else 1.0
+    bottom = (height - spacing * (size - 1)) / 2
+    return [(LAYER_SPACING * layer, bottom + spacing * i) for i in range(size)]
+
+
+def _edge_point(p1, p2, radius):
+    dx, dy = p2[0] - p1[0], p2[1] - p1[1]
+    dist = (dx**2 + dy**2)**0.5
+    if dist == 0:
+        return p1  # Avoid division by zero
+    scale = radius / dist
+    return (p1[0] + dx * scale, p1[1] + dy * scale)
+
+
+def _format_values(values):
+    return [f'{v:.2f}' for v in values.ravel().tolist()]
+
+
+class NetworkDiagram:
+    """Precomputed SVG template for one network architecture.
+
+    Create once per layer_sizes (see matches()) and call render(nn) after
+    each training step.
+    """
+
+    def __init__(self, layer_sizes):
+        self.layer_sizes = tuple(layer_sizes)
+        height = max(3.0, max(self.layer_sizes) - 1.0)
+        positions = [_column_positions(layer, size, height) for layer, size in enumerate(self.layer_sizes)]
+        width = LAYER_SPACING * (len(self.layer_sizes) - 1)
+        self.label_edges = sum(a * b for a, b in zip(self.layer_sizes, self.layer_sizes[1:])) <= MAX_LABELLED_EDGES
+
+        def px(point):
+            # SVG y grows downwards; keep the first node at the bottom like the old plot
+            return ((point[0] + MARGIN) * SCALE, (height - point[1] + MARGIN) * SCALE)
+
+        parts = [
+            f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {(width + 2 * MARGIN) * SCALE:.0f} '
+            f'{(height + 2 * MARGIN) * SCALE:.0f}" font-family="sans-serif" font-size="13">'
+            '<defs><marker id="arrow" viewBox="0 0 10 10" refX="10" refY="5" markerWidth="6" markerHeight="6" '
+            'orient="auto-start-reverse"><path d="M 0 0 L 10 5 L 0 10 z" fill="gray"/></marker></defs>'
+            '<text x="100%" y="16" text-anchor="end" dx="-8">'
+            '<tspan fill="black">old value</tspan> / <tspan fill="blue">new value</tspan></text>'
+        ]
+
+        # Edges first so nodes are drawn on top: colour and width are filled per render
+        for layer in range(len(self.layer_sizes) - 1):
+            for from_p in positions[layer]:
+                for to_p in positions[layer + 1]:
+                    (x1, y1), (x2, y2) = px(_edge_point(from_p, to_p, NODE_RADIUS)), px(_edge_point(to_p, from_p, NODE_RADIUS))
+                    parts.append(f'<line x1="{x1:.1f}" y1="{y1:.1f}" x2="{x2:.1f}" y2="{y2:.1f}" '
+                                 'stroke="{}" stroke-width="{}" marker-end="url(#arrow)"/>')
+                    if self.label_edges:
+                        mx, my = (x1 + x2) / 2, (y1 + y2) / 2
+                        parts.append(f'<text x="{mx:.1f}" y="{my:.1f}">{{}}</text>')
+
+        for layer, column in enumerate(positions):
+            if layer == 0:
+                kind = 'input'
+            elif layer == len(positions) - 1:
+                kind = 'output'
+            else:
+                kind = 'hidden'
+            for i, pos in enumerate(column):
+                x, y = px(pos)
+                parts.append(f'<circle cx="{x:.1f}" cy="{y:.1f}" r="{NODE_RADIUS * SCALE:.1f}" '
+                             f'fill="{NODE_COLORS[kind]}"/>')
+                if layer == 0:
+                    parts.append(f'<text x="{x - 0.3 * SCALE:.1f}" y="{y:.1f}" text-anchor="end">'
+                                 f'{escape(f"Input {i + 1}")}</text>')
+                else:
+                    parts.append(f'<text x="{x - 0.1 * SCALE:.1f}" y="{y + 0.35 * SCALE:.1f}">{{}}</text>')
+        parts.append('</svg>')
+        # Only the {} placeholders vary between renders
+        self._template = ''.join(parts)
+
+    def matches(self, nn):
+        return nn.layer_sizes == self.layer_sizes
+
+    def render(self, nn):
+        """Return the SVG markup for the network's current (and previous) parameters.
+
+        nn can be a NeuralNetwork or anything with the same layer_sizes,
+        weights, biases, previous_weights and previous_biases attributes, such
+        as a TrainingSnapshot.
+        """
+        has_previous = nn.previous_weights is not None
+        values = []
+        magnitude = max(float(np.abs(w).max()) for w in nn.weights) or 1.0
+        for layer, weights in enumerate(nn.weights):
+            flat = weights.ravel()
+            colors = np.where(flat >= 0, POSITIVE_COLOR, NEGATIVE_COLOR).tolist()
+            widths = [f'{w:.1f}' for w in (0.5 + 3.5 * np.abs(flat) / magnitude).tolist()]
+            if self.label_edges:
+                labels = self._labels(weights, nn.previous_weights[layer] if has_previous else None, 'w')
+                for color, width, label in zip(colors, widths, labels):
+                    values += (color, width, label)
+            else:
+                for color, width in zip(colors, widths):
+                    values += (color, width)
+        for layer, bias in enumerate(nn.biases):
+            values += self._labels(bias, nn.previous_biases[layer] if has_previous else None, 'b')
+        return self._template.format(*values)
+
+    @staticmethod
+    def _labels(current, previous, prefix):
+        if previous is None:
+            return [f'{prefix}: {v}' for v in _format_values(current)]
+        return [f'<tspan fill="black">{prefix}: {old}</tspan>'
+                f'<tspan fill="blue" dx="6">{prefix}: {new}</tspan>'
+                for old, new in zip(_format_values(previous), _format_values(current))]
@@ -1,26 +1,294 @@
 import numpy as np
 
-class NeuralNetwork:
-    def __init__(self, weights_init=None):
-        if weights_init is not None:
-            self.weights1 = np.full((2, 3), weights_init)
-            self.weights2 = np.full((3, 1), weights_init)
-            self.bias1 = np.full(3, weights_init)
-            self.bias2 = np.full(1, weights_init)
+from batches import ArrayBatches, Prefetcher
+from checkpoint import load_npz, save_npz
+
+# Bumped when the checkpoint layout changes incompatibly
+CHECKPOINT_VERSION = 1
+
+class LossHistory:
+    """Append-only (epoch, loss) record backed by NumPy arrays.
+
+    Storage grows geometrically (or can be reserved up front), so long runs
+    cost one float and one int per recorded epoch instead of a Python list
+    of float objects. Behaves like a read-only sequence of losses.
+
+    Alongside the full record, a plotting summary of at most max_points
+    points is kept up to date on every append: records are grouped into
+    equal-width buckets, each keeping its minimum, maximum and last loss, and
+    when the buckets run out adjacent pairs are merged and the width doubles.
+    downsampled() therefore costs O(max_points) however long training runs,
+    and spikes are never smoothed away.
+    """
+
+    # Bucket columns: epoch and value of the minimum, the maximum and the last record
+    _MIN_EPOCH, _MIN, _MAX_EPOCH, _MAX, _LAST_EPOCH, _LAST = range(6)
+
+    def __init__(self, capacity=64, max_points=1500):
+        self._epochs = np.empty(capacity, dtype=np.int64)
+        self._losses = np.empty(capacity, dtype=np.float64)
+        self._size = 0
+        # Closed buckets; an even count so pairs can always be merged
+        self._buckets = np.empty((max(2, max_points // 3) // 2 * 2, 6))
+        self._n_buckets = 0
+        self._bucket_width = 1
+        # The open bucket is kept as Python scalars: [min_epoch, min, max_epoch, max, last_epoch, last]
+        self._current = None
+        self._current_count = 0
+
+    def reserve(self, extra):
+        """Make room for at least `extra` more records."""
+        needed = self._size + extra
+        if needed > len(self._losses):
+            capacity = max(needed, 2 * len(self._losses), 64)
+            epochs = np.empty(capacity, dtype=np.int64)
+            losses = np.empty(capacity, dtype=np.float64)
+            epochs[:self._size] = self._epochs[:self._size]
+            losses[:self._size] = self._losses[:self._size]
+            self._epochs, self._losses = epochs, losses
+
+    def append(self, loss, epoch=None):
+        if self._size == len(self._losses):
+            self.reserve(1)
+        if epoch is None:
+            epoch = int(self._epochs[self._size - 1]) + 1 if self._size else 1
+        loss = float(loss)
+        self._epochs[self._size] = epoch
+        self._losses[self._size] = loss
+        self._size += 1
+        self._summarize(epoch, loss)
+
+    def _summarize(self, epoch, loss):
+        current = self._current
+        if current is None:
+            self._current = [epoch, loss, epoch, loss, epoch, loss]
+            self._current_count = 1
         else:
-            self.weights1 = np.random.randn(2, 3)
-            self.weights2 = np.random.randn(3, 1)
-            self.bias1 = np.random.randn(3)
-            self.bias2 = np.random.randn(1)
-
-        self.loss_history = []
-        self.weight_changes = {
-            "weights1": None,
-            "weights2": None,
-            "bias1": None,
-            "bias2": None,
+            if loss < current[1]:
+                current[0] = epoch
+                current[1] = loss
+            if loss > current[3]:
+                current[2] = epoch
+                current[3] = loss
+            current[4] = epoch
+            current[5] = loss
+            self._current_count += 1
+        if self._current_count == self._bucket_width:
+            self._close_bucket()
+
+    def _close_bucket(self):
+        self._buckets[self._n_buckets] = self._current
+        self._n_buckets += 1
+        self._current = None
+        self._current_count = 0
+        # Merge as soon as the buckets fill up, so the next open bucket already has the new width
+        if self._n_buckets == len(self._buckets):
+            self._merge_buckets()
+
+    def _merge_buckets(self):
+        """Halve the number of closed buckets by combining neighbours."""
+        first, second = self._buckets[0::2], self._buckets[1::2]
+        merged = second.copy()
+        use_first_min = first[:, self._MIN] <= second[:, self._MIN]
+        merged[use_first_min, self._MIN_EPOCH:self._MIN + 1] = first[use_first_min, self._MIN_EPOCH:self._MIN + 1]
+        use_first_max = first[:, self._MAX] >= second[:, self._MAX]
+        merged[use_first_max, self._MAX_EPOCH:self._MAX + 1] = first[use_first_max, self._MAX_EPOCH:self._MAX + 1]
+        self._n_buckets = len(merged)
+        self._buckets[:self._n_buckets] = merged
+        self._bucket_width *= 2
+
+    def downsampled(self):
+        """(epochs, losses) of at most max_points points covering the whole history, in epoch order."""
+        buckets = self._buckets[:self._n_buckets]
+        if self._current is not None:
+            buckets = np.vstack([buckets, self._current])
+        # Each bucket contributes its min, max and last record, in epoch order, without duplicates
+        epochs = buckets[:, [self._MIN_EPOCH, self._MAX_EPOCH, self._LAST_EPOCH]]
+        values = buckets[:, [self._MIN, self._MAX, self._LAST]]
+        order = np.argsort(epochs, axis=1, kind='stable')
+        epochs = np.take_along_axis(epochs, order, axis=1).ravel()
+        values = np.take_along_axis(values, order, axis=1).ravel()
+        keep = np.ones(len(epochs), dtype=bool)
+        keep[1:] = epochs[1:] != epochs[:-1]
+        return epochs[keep].astype(np.int64), values[keep]
+
+    def to_arrays(self):
+        """The full record and the plotting summary as a dict of arrays (for checkpoints)."""
+        current = self._current if self._current is not None else [np.nan] * 6
+        return {
+            'epochs': self.epochs,
+            'losses': self.losses,
+            'buckets': self._buckets,
+            'summary': np.array([self._n_buckets, self._bucket_width, self._current_count], dtype=np.int64),
+            'current': np.array(current, dtype=np.float64),
         }
 
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Rebuild a history from to_arrays() output.
+
+        The epoch and loss arrays are used as-is (so memory-mapped arrays stay
+        mapped); they are only copied when the first new record is appended.
+        """
+        history = cls(capacity=0, max_points=len(arrays['buckets']) * 3)
+        history._epochs = arrays['epochs']
+        history._losses = arrays['losses']
+        history._size = len(arrays['losses'])
+        history._buckets = np.array(arrays['buckets'])
+        history._n_buckets, history._bucket_width, history._current_count = (int(v) for v in arrays['summary'])
+        if history._current_count:
+            current = [float(v) for v in arrays['current']]
+            # Epoch columns are kept as ints, like the records appended live
+            current[0::2] = [int(v) for v in current[0::2]]
+            history._current = current
+        return history
+
+    @property
+    def epochs(self):
+        """Epoch number of each recorded loss (a view, not a copy)."""
+        return self._epochs[:self._size]
+
+    @property
+    def losses(self):
+        """Recorded losses (a view, not a copy)."""
+        return self._losses[:self._size]
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, index):
+        return self.losses[index]
+
+    def __iter__(self):
+        return iter(self.losses)
+
+    def __array__(self, dtype=None, copy=None):
+        return np.asarray(self.losses, dtype=dtype)
+
+# Activation functions as (forward in place, derivative in place). Derivatives
+# are written in terms of the activation's output a, which is what the
+# backward pass keeps around: derivative(a, out) stores f'(z) in out.
+def _sigmoid_inplace(z):
+    np.negative(z, out=z)
+    np.exp(z, out=z)
+    np.add(z, 1, out=z)
+    np.reciprocal(z, out=z)
+    return z
+
+def _sigmoid_derivative(a, out):
+    np.subtract(1, a, out=out)
+    return np.multiply(out, a, out=out)
+
+def _tanh_inplace(z):
+    return np.tanh(z, out=z)
+
+def _tanh_derivative(a, out):
+    np.multiply(a, a, out=out)
+    return np.subtract(1, out, out=out)
+
+def _relu_inplace(z):
+    return np.maximum(z, 0, out=z)
+
+def _relu_derivative(a, out):
+    return np.greater(a, 0, out=out, casting='unsafe')
+
+def _linear_inplace(z):
+    return z
+
+def _linear_derivative(a, out):
+    out.fill(1)
+    return out
+
+ACTIVATIONS = {
+    'sigmoid': (_sigmoid_inplace, _sigmoid_derivative),
+    'tanh': (_tanh_inplace, _tanh_derivative),
+    'relu': (_relu_inplace, _relu_derivative),
+    'linear': (_linear_inplace, _linear_derivative),
+}
+
+# Variance gain for the scaled random initialisation of each activation
+_INIT_GAIN = {'sigmoid': 1.0, 'tanh': 1.0, 'relu': 2.0, 'linear': 1.0}
+
+
+class NeuralNetwork:
+    """Fully connected network trained with mean squared error.
+
+    layer_sizes lists the width of every layer, input first and output last;
+    the default (2, 3, 1) is the network shown in the app. Hidden layers use
+    hidden_activation and the output layer output_activation ('sigmoid',
+    'tanh', 'relu' or 'linear' - use 'linear' for unbounded regression
+    targets). dtype selects float64 or float32 for parameters and compute;
+    inputs are converted to it.
+
+    Parameters live in the weights/biases lists. weights1, bias1, weights2,
+    bias2, ... are aliases for the layers by position, as used by the app.
+    """
+
+    def __init__(self, weights_init=None, layer_sizes=(2, 3, 1), hidden_activation='sigmoid',
+                 output_activation='sigmoid', dtype=np.float64):
+        if len(layer_sizes) < 2:
+            raise ValueError("layer_sizes needs at least an input and an output size")
+        for name in (hidden_activation, output_activation):
+            if name not in ACTIVATIONS:
+                raise ValueError(f"Unknown activation '{name}', expected one of {sorted(ACTIVATIONS)}")
+        self.dtype = np.dtype(dtype)
+        if self.dtype not in (np.float32, np.float64):
+            raise ValueError("dtype must be float32 or float64")
+        self.layer_sizes = tuple(int(size) for size in layer_sizes)
+        self.hidden_activation = hidden_activation
+        self.output_activation = output_activation
+        self.activations = [hidden_activation] * (len(self.layer_sizes) - 2) + [output_activation]
+
+        self.weights = []
+        self.biases = []
+        for fan_in, fan_out, activation in zip(self.layer_sizes, self.layer_sizes[1:], self.activations):
+            if weights_init is not None:
+                self.weights.append(np.full((fan_in, fan_out), weights_init, dtype=self.dtype))
+                self.biases.append(np.full(fan_out, weights_init, dtype=self.dtype))
+            else:
+                scale = np.sqrt(_INIT_GAIN[activation] / fan_in)
+                self.weights.append((np.random.randn(fan_in, fan_out) * scale).astype(self.dtype))
+                self.biases.append(np.zeros(fan_out, dtype=self.dtype))
+        self.previous_weights = None
+        self.previous_biases = None
+
+        self.loss_history = LossHistory()
+        self.epoch = 0
+        self.weight_changes = {}
+        for i in range(self.n_layers):
+            self.weight_changes[f"weights{i + 1}"] = None
+            self.weight_changes[f"bias{i + 1}"] = None
+        # Scratch arrays reused by train_step/fit: allocated for the largest
+        # batch seen, with views sized for the last batch
+        self._workspace_base = None
+        self._workspace = None
+        # Input whose forward activations are currently in the workspace
+        self._activations_input = None
+
+    @property
+    def n_layers(self):
+        """Number of weight layers (hidden layers plus the output layer)."""
+        return len(self.weights)
+
+    # weights1/bias1/... and previous_weights1/... name layers by position
+    def __getattr__(self, name):
+        for prefix, attr in (('previous_weights', 'previous_weights'), ('previous_bias', 'previous_biases'),
+                             ('weights', 'weights'), ('bias', 'biases')):
+            if name.startswith(prefix) and name[len(prefix):].isdigit():
+                params = self.__dict__.get(attr)
+                index = int(name[len(prefix):]) - 1
+                if params is not None and 0 <= index < len(params):
+                    return params[index]
+                break
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    def __setattr__(self, name, value):
+        for prefix, attr in (('weights', 'weights'), ('bias', 'biases')):
+            if name.startswith(prefix) and name[len(prefix):].isdigit():
+                index = int(name[len(prefix):]) - 1
+                self.__dict__[attr][index] = np.asarray(value, dtype=self.dtype)
+                return
+        object.__setattr__(self, name, value)
 
     def sigmoid(self, x):
         return 1 / (1 + np.exp(-x))
@@ -31,51 +299,476 @@ class NeuralNetwork:
     def calculate_loss(self, y_true, y_pred):
         return np.mean(np.square(y_true - y_pred))
 
+    def _as_compute(self, a):
+        """View or convert input data to the network's dtype, 2-D."""
+        a = np.asarray(a, dtype=self.dtype)
+        return a.reshape(-1, 1) if a.ndim == 1 else a
+
     def store_previous_parameters(self):
-        self.previous_weights1 = self.weights1.copy()
-        self.previous_weights2 = self.weights2.copy()
-        self.previous_bias1 = self.bias1.copy()
-        self.previous_bias2 = self.bias2.copy()
+        if self.previous_weights is None:
+            self.previous_weights = [w.copy() for w in self.weights]
+            self.previous_biases = [b.copy() for b in self.biases]
+            return
+        # Reuse the existing arrays instead of allocating new copies
+        for previous, current in zip(self.previous_weights + self.previous_biases, self.weights + self.biases):
+            np.copyto(previous, current)
 
     def calculate_parameter_changes(self):
-        self.weight_changes['weights1'] = self.weights1 - self.previous_weights1
-        self.weight_changes['weights2'] = self.weights2 - self.previous_weights2
-        self.weight_changes['bias1'] = self.bias1 - self.previous_bias1
-        self.weight_changes['bias2'] = self.bias2 - self.previous_bias2
+        for i in range(self.n_layers):
+            self.weight_changes[f'weights{i + 1}'] = self.weights[i] - self.previous_weights[i]
+            self.weight_changes[f'bias{i + 1}'] = self.biases[i] - self.previous_biases[i]
 
     def forward(self, X):
-        self.layer1 = self.sigmoid(np.dot(X, self.weights1) + self.bias1)
-        self.output = self.sigmoid(np.dot(self.layer1, self.weights2) + self.bias2)
+        a = self._as_compute(X)
+        self.layer_outputs = []
+        for weights, bias, activation in zip(self.weights, self.biases, self.activations):
+            a = ACTIVATIONS[activation][0](np.dot(a, weights) + bias)
+            self.layer_outputs.append(a)
+        self.layer1 = self.layer_outputs[0]
+        self.output = a
         return self.output
 
+    def predict(self, X):
+        """Forward pass that stores nothing on the network, so concurrent calls are safe."""
+        a = self._as_compute(X)
+        for weights, bias, activation in zip(self.weights, self.biases, self.activations):
+            a = ACTIVATIONS[activation][0](np.dot(a, weights) + bias)
+        return a
+
     def backward(self, X, y, learning_rate=0.1):
+        # Parameters are about to change, so cached train_step activations are stale
+        self._activations_input = None
+        X = self._as_compute(X)
+        y = self._as_compute(y)
+
         # Store previous parameters
         self.store_previous_parameters()
 
         # Calculate initial loss
         initial_loss = self.calculate_loss(y, self.output)
 
-        # Backward propagation
+        # Backward propagation, output layer first
         self.error = y - self.output
-        delta_output = self.error * self.sigmoid_derivative(self.output)
-
-        delta_hidden = np.dot(delta_output, self.weights2.T) * self.sigmoid_derivative(self.layer1)
-
-        # Update weights and biases
-        self.weights2 += learning_rate * np.dot(self.layer1.T, delta_output)
-        self.weights1 += learning_rate * np.dot(X.T, delta_hidden)
-        self.bias2 += learning_rate * np.sum(delta_output, axis=0)
-        self.bias1 += learning_rate * np.sum(delta_hidden, axis=0)
+        inputs = [X] + self.layer_outputs[:-1]
+        delta = self.error * ACTIVATIONS[self.activations[-1]][1](self.output, np.empty_like(self.output))
+        for i in reversed(range(self.n_layers)):
+            grad_weights = np.dot(inputs[i].T, delta)
+            grad_bias = np.sum(delta, axis=0)
+            if i > 0:
+                delta = np.dot(delta, self.weights[i].T) * ACTIVATIONS[self.activations[i - 1]][1](
+                    inputs[i], np.empty_like(inputs[i]))
+            # Update weights and biases
+            self.weights[i] += learning_rate * grad_weights
+            self.biases[i] += learning_rate * grad_bias
 
         # Calculate parameter changes
         self.calculate_parameter_changes()
 
         # Calculate final loss
         final_loss = self.calculate_loss(y, self.forward(X))
-        self.loss_history.append(final_loss)
+        self.epoch += 1
+        self.loss_history.append(final_loss, self.epoch)
 
         return initial_loss, final_loss, self.error
 
     def reset_history(self):
         """Reset all training history"""
-        self.loss_history = []
+        self.loss_history = LossHistory()
+
+    def save(self, path_or_file):
+        """Write parameters, previous parameters, loss history and epoch to an uncompressed .npz.
+
+        Paths are written atomically, so this is safe to call on a schedule
+        during long runs.
+        """
+        arrays = {
+            'version': np.array(CHECKPOINT_VERSION),
+            'layer_sizes': np.array(self.layer_sizes, dtype=np.int64),
+            'activations': np.array([self.hidden_activation, self.output_activation]),
+            'dtype': np.array(self.dtype.name),
+            'epoch': np.array(self.epoch, dtype=np.int64),
+        }
+        for i in range(self.n_layers):
+            arrays[f'weights{i + 1}'] = self.weights[i]
+            arrays[f'bias{i + 1}'] = self.biases[i]
+            if self.previous_weights is not None:
+                arrays[f'previous_weights{i + 1}'] = self.previous_weights[i]
+                arrays[f'previous_bias{i + 1}'] = self.previous_biases[i]
+        for name, array in self.loss_history.to_arrays().items():
+            arrays[f'loss_history_{name}'] = array
+        save_npz(path_or_file, arrays)
+
+    @classmethod
+    def load(cls, path_or_file, mmap=True):
+        """Restore a network written by save().
+
+        From a path with mmap set, parameters and the loss history are
+        memory-mapped copy-on-write rather than read, so large checkpoints
+        open immediately and pages are only copied once training modifies
+        them.
+        """
+        arrays = load_npz(path_or_file, mmap_mode='c' if mmap else None)
+        version = int(arrays['version'])
+        if version != CHECKPOINT_VERSION:
+            raise ValueError(f"Unsupported checkpoint version {version}, expected {CHECKPOINT_VERSION}")
+        hidden_activation, output_activation = (str(name) for name in arrays['activations'])
+        nn = cls(weights_init=0.0, layer_sizes=tuple(int(size) for size in arrays['layer_sizes']),
+                 hidden_activation=hidden_activation, output_activation=output_activation,
+                 dtype=str(arrays['dtype']))
+        nn.weights = [arrays[f'weights{i + 1}'] for i in range(nn.n_layers)]
+        nn.biases = [arrays[f'bias{i + 1}'] for i in range(nn.n_layers)]
+        if 'previous_weights1' in arrays:
+            nn.previous_weights = [arrays[f'previous_weights{i + 1}'] for i in range(nn.n_layers)]
+            nn.previous_biases = [arrays[f'previous_bias{i + 1}'] for i in range(nn.n_layers)]
+            nn.calculate_parameter_changes()
+        prefix = 'loss_history_'
+        nn.loss_history = LossHistory.from_arrays(
+            {name[len(prefix):]: array for name, array in arrays.items() if name.startswith(prefix)})
+        nn.epoch = int(arrays['epoch'])
+        return nn
+
+    def _ensure_workspace(self, n_samples):
+        """Return scratch buffers for a batch of n_samples rows.
+
+        Buffers are allocated for the largest batch seen so far; smaller
+        batches (such as the last mini-batch of an epoch) use views of them.
+        """
+        ws = self._workspace
+        if ws is not None and ws['ones'].shape[0] == n_samples:
+            return ws
+        base = self._workspace_base
+        if base is None or base['ones'].shape[0] < n_samples:
+            widths = self.layer_sizes[1:]
+            empty = lambda *shape: np.empty(shape, dtype=self.dtype)
+            self._workspace_base = base = {
+                # Per layer: activation output, pre-activation matmul result, delta and f'(z)
+                'outputs': [empty(n_samples, width) for width in widths],
+                'pre': [empty(n_samples, width) for width in widths],
+                'deltas': [empty(n_samples, width) for width in widths],
+                'derivatives': [empty(n_samples, width) for width in widths],
+                'grad_weights': [empty(*w.shape) for w in self.weights],
+                'grad_biases': [empty(*b.shape) for b in self.biases],
+                'ones': np.ones(n_samples, dtype=self.dtype),
+                'error': empty(n_samples, widths[-1]),
+            }
+        rows = lambda arrays: [a[:n_samples] for a in arrays]
+        self._workspace = ws = {
+            'outputs': rows(base['outputs']),
+            'pre': rows(base['pre']),
+            'deltas': rows(base['deltas']),
+            'derivatives': rows(base['derivatives']),
+            'grad_weights': base['grad_weights'],
+            'grad_biases': base['grad_biases'],
+            'ones': base['ones'][:n_samples],
+            'error': base['error'][:n_samples],
+        }
+        self._activations_input = None
+        return ws
+
+    def _forward_into(self, X, ws):
+        """Forward pass writing activations into the workspace (no new arrays)."""
+        a = X
+        for weights, bias, activation, out, pre in zip(self.weights, self.biases, self.activations,
+                                                       ws['outputs'], ws['pre']):
+            # Biases are broadcast with copyto and added as same-shape arrays;
+            # a broadcasting ufunc with out= would allocate an iteration buffer
+            np.dot(a, weights, out=pre)
+            np.copyto(out, bias)
+            np.add(out, pre, out=out)
+            a = ACTIVATIONS[activation][0](out)
+        self.layer1 = ws['outputs'][0]
+        self.output = a
+        self._activations_input = X
+        return a
+
+    def train_step(self, X, y, learning_rate=0.1, track_changes=False):
+        """One epoch of full-batch training using preallocated buffers.
+
+        Does one forward and one backward pass per call: the forward pass run
+        after the update both measures the new loss and is reused by the next
+        call with the same X, so no extra forward is needed. Previous
+        parameters and weight_changes are only maintained when track_changes
+        is set; both are kept in arrays reused from step to step, and the
+        parameters are always updated in place.
+
+        Activations are reused only while the same X object is passed and the
+        parameters are changed solely through train_step/fit. Returns the loss
+        after the update, which is also appended to loss_history.
+        """
+        return self.fit(X, y, 1, learning_rate=learning_rate, track_changes=track_changes)['loss']
+
+    def fit(self, X, y, epochs, learning_rate=0.1, tol=None, record_every=1, track_changes=True):
+        """Train for up to `epochs` full-batch epochs in one call.
+
+        The loss is appended to loss_history every `record_every` epochs (and
+        for the last epoch), into storage reserved up front. Training stops
+        early once the loss is at or below `tol`. With track_changes, the
+        previous parameters and weight_changes describe only the final epoch.
+
+        Returns a dict with the number of epochs run, the final loss and
+        whether training stopped early.
+        """
+        X = self._as_compute(X)
+        y = self._as_compute(y)
+        ws = self._ensure_workspace(X.shape[0])
+        if self._activations_input is not X:
+            self._forward_into(X, ws)
+        grad_weights, grad_biases = ws['grad_weights'], ws['grad_biases']
+        error, output = ws['error'], ws['outputs'][-1]
+        history = self.loss_history
+        history.reserve(epochs // record_every + 1)
+        first_epoch = self.epoch
+
+        loss = None
+        stopped_early = False
+        tracked = False
+        epochs_run = 0
+        for epoch in range(epochs):
+            self._gradients_into(X, y, ws, learning_rate)
+
+            if track_changes and epoch == epochs - 1:
+                self._apply_update_tracked(grad_weights, grad_biases)
+                tracked = True
+            else:
+                self._apply_update(grad_weights, grad_biases)
+
+            # Forward pass with the new parameters gives this epoch's loss and the next epoch's activations
+            self._forward_into(X, ws)
+            np.subtract(y, output, out=error)
+            loss = float(np.vdot(error, error)) / error.size
+            epochs_run = epoch + 1
+            if tol is not None and loss <= tol:
+                stopped_early = True
+                break
+            if epochs_run % record_every == 0:
+                history.append(loss, first_epoch + epochs_run)
+
+        # The last epoch is always recorded
+        if epochs_run and (stopped_early or epochs_run % record_every != 0):
+            history.append(loss, first_epoch + epochs_run)
+        if track_changes and epochs_run and not tracked:
+            # Stopped before the planned last epoch: rebuild its snapshot from the last update
+            self._snapshot_from_update(grad_weights, grad_biases)
+        self.epoch += epochs_run
+        return {'epochs': epochs_run, 'loss': loss, 'stopped_early': stopped_early}
+
+    def fit_batches(self, batches, epochs=1, learning_rate=0.1, prefetch=2, track_changes=True):
+        """Mini-batch training: one parameter update per (X, y) batch.
+
+        batches is anything iterable yielding (X_batch, y_batch) pairs, such
+        as ArrayBatches (in-memory or memory-mapped arrays, shuffled each
+        epoch) or a plain generator. For more than one epoch it must be
+        re-iterable; a callable returning a fresh iterator also works. Up to
+        `prefetch` batches are loaded ahead on a background thread (0 loads
+        them inline), so only a few batches are in memory at once.
+
+        As in backward/fit, gradients are summed over the rows of a batch.
+        One loss per epoch, the row-weighted mean of the batch losses
+        measured just before each update, is appended to loss_history. With
+        track_changes, the previous parameters and weight_changes describe
+        the last batch's update.
+
+        Returns a dict with the number of epochs and batches run and the
+        final epoch's loss.
+        """
+        if epochs > 1 and not callable(batches) and iter(batches) is batches:
+            raise ValueError("A one-shot iterator can only be used for one epoch; pass a re-iterable or a callable")
+        self.loss_history.reserve(epochs)
+        loss = None
+        n_batches = 0
+        ws = None
+        for _ in range(epochs):
+            source = batches() if callable(batches) else batches
+            if prefetch:
+                source = Prefetcher(source, depth=prefetch)
+            total = 0.0
+            n_rows = 0
+            try:
+                for X_batch, y_batch in source:
+                    X_batch = self._as_compute(X_batch)
+                    y_batch = self._as_compute(y_batch)
+                    ws = self._ensure_workspace(X_batch.shape[0])
+                    self._forward_into(X_batch, ws)
+                    self._gradients_into(X_batch, y_batch, ws, learning_rate)
+                    error = ws['error']
+                    total += float(np.vdot(error, error)) / error.shape[1]
+                    n_rows += X_batch.shape[0]
+                    self._apply_update(ws['grad_weights'], ws['grad_biases'])
+                    n_batches += 1
+            finally:
+                if prefetch:
+                    source.close()
+            if n_rows == 0:
+                raise ValueError("No batches were produced for this epoch")
+            loss = total / n_rows
+            self.epoch += 1
+            self.loss_history.append(loss, self.epoch)
+        # Activations in the workspace belong to the last batch, before its update
+        self._activations_input = None
+        if track_changes and ws is not None:
+            self._snapshot_from_update(ws['grad_weights'], ws['grad_biases'])
+        return {'epochs': epochs, 'batches': n_batches, 'loss': loss}
+
+    def fit_minibatch(self, X, y, epochs=1, batch_size=32, learning_rate=0.1, shuffle=True, seed=None,
+                      prefetch=2, track_changes=True):
+        """fit_batches over arrays (or np.load(..., mmap_mode='r') memmaps) split into batches."""
+        batches = ArrayBatches(X, y, batch_size=batch_size, shuffle=shuffle, seed=seed)
+        return self.fit_batches(batches, epochs=epochs, learning_rate=learning_rate, prefetch=prefetch,
+                                track_changes=track_changes)
+
+    def _gradients_into(self, X, y, ws, learning_rate):
+        """Backward pass from the activations in the workspace, leaving scaled gradients in its grad buffers."""
+        outputs, deltas, derivatives = ws['outputs'], ws['deltas'], ws['derivatives']
+        grad_weights, grad_biases = ws['grad_weights'], ws['grad_biases']
+        ones, error, output = ws['ones'], ws['error'], outputs[-1]
+        activations = self.activations
+
+        # Output delta = (y - output) * f'(output)
+        np.subtract(y, output, out=error)
+        ACTIVATIONS[activations[-1]][1](output, derivatives[-1])
+        np.multiply(derivatives[-1], error, out=deltas[-1])
+
+        for i in range(self.n_layers - 1, -1, -1):
+            delta = deltas[i]
+            if i > 0:
+                # Hidden delta = delta @ weights.T * f'(activation)
+                np.dot(delta, self.weights[i].T, out=deltas[i - 1])
+                ACTIVATIONS[activations[i - 1]][1](outputs[i - 1], derivatives[i - 1])
+                np.multiply(deltas[i - 1], derivatives[i - 1], out=deltas[i - 1])
+            # Scaled parameter updates (bias gradients as ones @ delta to avoid reduction buffers)
+            layer_input = X if i == 0 else outputs[i - 1]
+            np.dot(layer_input.T, delta, out=grad_weights[i])
+            np.multiply(grad_weights[i], learning_rate, out=grad_weights[i])
+            np.dot(ones, delta, out=grad_biases[i])
+            np.multiply(grad_biases[i], learning_rate, out=grad_biases[i])
+
+    def _apply_update(self, grad_weights, grad_biases):
+        for param, grad in zip(self.weights, grad_weights):
+            np.add(param, grad, out=param)
+        for param, grad in zip(self.biases, grad_biases):
+            np.add(param, grad, out=param)
+
+    def _apply_update_tracked(self, grad_weights, grad_biases):
+        """Apply an update while keeping the pre-update parameters.
+
+        The parameters are updated in place, so arrays held through weights,
+        biases or weights1/bias1/... stay valid.
+        """
+        self.store_previous_parameters()
+        self._apply_update(grad_weights, grad_biases)
+        self._record_changes()
+
+    def _snapshot_from_update(self, grad_weights, grad_biases):
+        """Reconstruct the previous parameters from the current ones and the last applied update."""
+        if self.previous_weights is None:
+            self.store_previous_parameters()
+        for param, previous, grad in zip(self.weights + self.biases, self.previous_weights + self.previous_biases,
+                                         grad_weights + grad_biases):
+            np.subtract(param, grad, out=previous)
+        self._record_changes()
+
+    def _record_changes(self):
+        """Write current minus previous parameters into weight_changes.
+
+        The change arrays are owned by weight_changes and reused between
+        calls; they never alias the workspace gradient buffers.
+        """
+        for i in range(self.n_layers):
+            for key, param, previous in ((f'weights{i + 1}', self.weights[i], self.previous_weights[i]),
+                                         (f'bias{i + 1}', self.biases[i], self.previous_biases[i])):
+                change = self.weight_changes.get(key)
+                if change is None or change.shape != param.shape or change.dtype != param.dtype:
+                    change = self.weight_changes[key] = np.empty_like(param)
+                np.subtract(param, previous, out=change)
+
+
+class NeuralNetworkPopulation:
+    """N independent 2-3-1 networks trained together.
+
+    Parameters are stacked along a leading model axis (weights1 is (N, 2, 3),
+    weights2 is (N, 3, 1), bias1 is (N, 3), bias2 is (N, 1)), so one batched
+    matmul runs the forward or backward pass for every model at once. The
+    update rule is the same as NeuralNetwork.backward.
+    """
+
+    def __init__(self, n_models, weights_init=None):
+        self.n_models = n_models
+        if weights_init is not None:
+            self.weights1 = np.full((n_models, 2, 3), weights_init, dtype=float)
+            self.weights2 = np.full((n_models, 3, 1), weights_init, dtype=float)
+            self.bias1 = np.full((n_models, 3), weights_init, dtype=float)
+            self.bias2 = np.full((n_models, 1), weights_init, dtype=float)
+        else:
+            self.weights1 = np.random.randn(n_models, 2, 3)
+            self.weights2 = np.random.randn(n_models, 3, 1)
+            self.bias1 = np.random.randn(n_models, 3)
+            self.bias2 = np.random.randn(n_models, 1)
+
+    @classmethod
+    def from_networks(cls, networks):
+        """Stack the parameters of existing NeuralNetwork instances."""
+        for nn in networks:
+            if nn.layer_sizes != (2, 3, 1) or nn.activations != ['sigmoid', 'sigmoid']:
+                raise ValueError("NeuralNetworkPopulation only supports the default 2-3-1 sigmoid network")
+        population = cls(len(networks), weights_init=0.0)
+        for i, nn in enumerate(networks):
+            population.weights1[i] = nn.weights1
+            population.weights2[i] = nn.weights2
+            population.bias1[i] = nn.bias1
+            population.bias2[i] = nn.bias2
+        return population
+
+    def network(self, index):
+        """Return a standalone NeuralNetwork holding a copy of one model's parameters."""
+        nn = NeuralNetwork(weights_init=0.0)
+        nn.weights1 = self.weights1[index].copy()
+        nn.weights2 = self.weights2[index].copy()
+        nn.bias1 = self.bias1[index].copy()
+        nn.bias2 = self.bias2[index].copy()
+        return nn
+
+    def sigmoid(self, x):
+        return 1 / (1 + np.exp(-x))
+
+    def forward(self, X):
+        """Run every model on X, which is (samples, 2) shared by all models or (N, samples, 2)."""
+        self.layer1 = self.sigmoid(np.matmul(X, self.weights1) + self.bias1[:, None, :])
+        self.output = self.sigmoid(np.matmul(self.layer1, self.weights2) + self.bias2[:, None, :])
+        return self.output
+
+    def calculate_loss(self, y_true, y_pred):
+        """Mean squared error per model, shape (N,)."""
+        return np.mean(np.square(y_true - y_pred), axis=(-2, -1))
+
+    def backward(self, X, y, learning_rates=0.1):
+        """One gradient step for every model; learning_rates is a scalar or shape (N,)."""
+        lr = np.broadcast_to(np.asarray(learning_rates, dtype=float), (self.n_models,))
+
+        error = y - self.output
+        delta_output = error * self.output * (1 - self.output)
+        delta_hidden = np.matmul(delta_output, self.weights2.transpose(0, 2, 1)) * self.layer1 * (1 - self.layer1)
+
+        self.weights2 += lr[:, None, None] * np.matmul(self.layer1.transpose(0, 2, 1), delta_output)
+        if X.ndim == 2:
+            self.weights1 += lr[:, None, None] * np.einsum('si,nsj->nij', X, delta_hidden)
+        else:
+            self.weights1 += lr[:, None, None] * np.matmul(X.transpose(0, 2, 1), delta_hidden)
+        self.bias2 += lr[:, None] * delta_output.sum(axis=1)
+        self.bias1 += lr[:, None] * delta_hidden.sum(axis=1)
+        return error
+
+    def train(self, X, y, epochs, learning_rates=0.1):
+        """Train every model for the given number of epochs.
+
+        Returns the loss history as an (epochs, N) array: row e holds each
+        model's loss after its e-th update, like NeuralNetwork.loss_history.
+        """
+        X = np.asarray(X, dtype=float)
+        y = np.asarray(y, dtype=float)
+        loss_history = np.empty((epochs, self.n_models))
+        self.forward(X)
+        for epoch in range(epochs):
+            self.backward(X, y, learning_rates)
+            # The next epoch's forward pass doubles as this epoch's loss evaluation
+            loss_history[epoch] = self.calculate_loss(y, self.forward(X))
+        return loss_history
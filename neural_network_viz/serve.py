@@ -0,0 +1,73 @@
+"""Prediction service for a trained NeuralNetwork checkpoint.
+
+Run from neural_network_viz/:
+    NN_CHECKPOINT=network.npz uvicorn serve:app --port 8001
+
+POST /predict with {"inputs": [[x1, x2, ...], ...]} returns
+{"outputs": [[y, ...], ...]}. Concurrent requests are micro-batched (see
+inference.MicroBatcher); /stats reports latency percentiles and batch-size
+histograms.
+"""
+import os
+from typing import List
+
+import numpy as np
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+
+from inference import MicroBatcher
+from neural_network import NeuralNetwork
+
+app = FastAPI()
+
+checkpoint_path = os.getenv("NN_CHECKPOINT")
+if not checkpoint_path:
+    raise ValueError("Missing required NN_CHECKPOINT (path to a NeuralNetwork.save checkpoint)")
+
+network = NeuralNetwork.load(checkpoint_path)
+batcher = MicroBatcher(
+    network.predict,
+    max_batch_rows=int(os.getenv("NN_MAX_BATCH_ROWS", "1024")),
+    max_wait=float(os.getenv("NN_BATCH_WAIT_MS", "2")) / 1000,
+    workers=int(os.getenv("NN_INFERENCE_WORKERS", "1"))
+)
+
+
+class PredictRequest(BaseModel):
+    inputs: List[List[float]]
+
+
+@app.on_event("startup")
+async def startup_event():
+    """Start collecting requests into batches."""
+    await batcher.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Finish in-flight batches and stop the inference threads."""
+    await batcher.stop()
+
+@app.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+@app.post("/predict")
+async def predict(request: PredictRequest):
+    try:
+        rows = np.asarray(request.inputs, dtype=network.dtype)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Every input row must have the same number of values")
+    if rows.ndim != 2 or rows.shape[0] == 0 or rows.shape[1] != network.layer_sizes[0]:
+        raise HTTPException(status_code=422,
+                            detail=f"inputs must be a non-empty list of rows with {network.layer_sizes[0]} values")
+    outputs = await batcher.predict(rows)
+    return {"outputs": outputs.tolist()}
+
+@app.get("/stats")
+async def stats():
+    """Model shape, epoch and micro-batching statistics."""
+    return {
+        "layer_sizes": network.layer_sizes,
+        "epoch": network.epoch,
+        "batching": batcher.stats.snapshot()
+    }
@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+
+from batches import ArrayBatches, Prefetcher, load_npy
+from neural_network import NeuralNetwork
+
+X = np.array([[0, 0], [0, 1], [1, 0], [1, 1]], dtype=float)
+Y = np.array([[0], [1], [1], [0]], dtype=float)
+
+
+def rows(batches):
+    return np.concatenate([X_batch for X_batch, _ in batches])
+
+
+def test_array_batches_cover_every_row_once_per_epoch():
+    data = np.arange(20, dtype=float).reshape(10, 2)
+    targets = data[:, :1] * 10
+    batches = ArrayBatches(data, targets, batch_size=3, seed=0)
+    assert len(batches) == 4
+    first, second = list(batches), list(batches)
+    assert [len(X_batch) for X_batch, _ in first] == [3, 3, 3, 1]
+    for epoch in (first, second):
+        np.testing.assert_array_equal(np.sort(rows(epoch)[:, 0]), data[:, 0])
+        for X_batch, y_batch in epoch:
+            np.testing.assert_array_equal(y_batch, X_batch[:, :1] * 10)
+    assert not np.array_equal(rows(first), rows(second))
+
+
+def test_memmapped_arrays_are_shuffled_by_chunk(tmp_path):
+    data = np.arange(40, dtype=float).reshape(20, 2)
+    np.save(tmp_path / "X.npy", data)
+    np.save(tmp_path / "y.npy", data[:, :1])
+    X_map, y_map = load_npy(tmp_path / "X.npy"), load_npy(tmp_path / "y.npy")
+    batches = ArrayBatches(X_map, y_map, batch_size=2, seed=0)
+    assert batches.chunk_size == 128
+
+    batches = ArrayBatches(X_map, y_map, batch_size=2, seed=0, chunk_size=4)
+    seen = rows(batches)
+    np.testing.assert_array_equal(np.sort(seen[:, 0]), data[:, 0])
+    # Each run of 4 rows comes from one contiguous chunk
+    assert all(len(set(seen[i:i + 4, 0] // 8)) == 1 for i in range(0, 20, 4))
+
+
+@pytest.mark.parametrize("kwargs", [{"batch_size": 0}, {"y": Y[:3]}])
+def test_array_batches_reject_bad_arguments(kwargs):
+    arguments = {"X": X, "y": Y, **kwargs}
+    with pytest.raises(ValueError):
+        ArrayBatches(**arguments)
+
+
+def test_prefetcher_yields_in_order_and_reraises_source_errors():
+    assert list(Prefetcher(iter(range(5)), depth=2)) == [0, 1, 2, 3, 4]
+
+    def failing():
+        yield 1
+        raise RuntimeError("disk gone")
+
+    prefetcher = Prefetcher(failing())
+    with pytest.raises(RuntimeError, match="disk gone"):
+        list(prefetcher)
+
+
+def test_prefetcher_close_stops_a_blocked_producer():
+    prefetcher = Prefetcher(iter(range(1000)), depth=1)
+    assert next(iter(prefetcher)) == 0
+    prefetcher.close()
+    assert not prefetcher._thread.is_alive()
+
+
+@pytest.mark.parametrize("prefetch", [0, 2])
+def test_full_batch_fit_batches_matches_fit(prefetch):
+    np.random.seed(0)
+    nn = NeuralNetwork()
+    reference = NeuralNetwork(weights_init=0.0)
+    reference.weights = [w.copy() for w in nn.weights]
+    reference.biases = [b.copy() for b in nn.biases]
+
+    result = nn.fit_batches(lambda: iter([(X, Y)]), epochs=5, learning_rate=0.5, prefetch=prefetch)
+    reference.fit(X, Y, 5, learning_rate=0.5)
+    assert (result['epochs'], result['batches'], nn.epoch) == (5, 5, 5)
+    for ours, theirs in zip(nn.weights + nn.biases, reference.weights + reference.biases):
+        np.testing.assert_allclose(ours, theirs)
+    for i in range(nn.n_layers):
+        np.testing.assert_allclose(nn.weight_changes[f'weights{i + 1}'], nn.weights[i] - nn.previous_weights[i])
+
+
+def test_fit_minibatch_records_one_loss_per_epoch():
+    np.random.seed(0)
+    nn = NeuralNetwork()
+    result = nn.fit_minibatch(X, Y, epochs=3, batch_size=3, learning_rate=0.5, seed=0)
+    assert (result['epochs'], result['batches']) == (3, 6)
+    np.testing.assert_array_equal(nn.loss_history.epochs, [1, 2, 3])
+    assert nn.loss_history[-1] == result['loss']
+
+
+def test_one_shot_iterator_is_rejected_for_several_epochs():
+    nn = NeuralNetwork()
+    with pytest.raises(ValueError, match="one-shot iterator"):
+        nn.fit_batches(iter([(X, Y)]), epochs=2)
+    # A single epoch over a generator is fine
+    assert nn.fit_batches(iter([(X, Y)]), epochs=1)['batches'] == 1
+
+
+@pytest.mark.parametrize("prefetch", [0, 2])
+def test_empty_epoch_raises(prefetch):
+    nn = NeuralNetwork()
+    with pytest.raises(ValueError, match="No batches were produced"):
+        nn.fit_batches([], epochs=1, prefetch=prefetch)
+    assert nn.epoch == 0
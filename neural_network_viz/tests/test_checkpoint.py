@@ -0,0 +1,84 @@
+import io
+
+import numpy as np
+import pytest
+
+from checkpoint import load_npz, save_npz
+from neural_network import NeuralNetwork
+
+X = np.array([[0, 0], [0, 1], [1, 0], [1, 1]], dtype=float)
+Y = np.array([[0], [1], [1], [0]], dtype=float)
+
+
+def trained_network(**kwargs):
+    np.random.seed(0)
+    nn = NeuralNetwork(**kwargs)
+    nn.fit(X, Y, 200, learning_rate=0.5, record_every=3)
+    return nn
+
+
+def assert_same_state(loaded, nn):
+    assert (loaded.layer_sizes, loaded.activations, loaded.dtype, loaded.epoch) == \
+        (nn.layer_sizes, nn.activations, nn.dtype, nn.epoch)
+    for ours, theirs in zip(loaded.weights + loaded.biases + loaded.previous_weights + loaded.previous_biases,
+                            nn.weights + nn.biases + nn.previous_weights + nn.previous_biases):
+        np.testing.assert_array_equal(ours, theirs)
+        assert ours.dtype == theirs.dtype
+    for key, change in nn.weight_changes.items():
+        np.testing.assert_allclose(loaded.weight_changes[key], change)
+    np.testing.assert_array_equal(loaded.loss_history.epochs, nn.loss_history.epochs)
+    np.testing.assert_array_equal(loaded.loss_history.losses, nn.loss_history.losses)
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_round_trip_through_a_file(tmp_path, mmap):
+    nn = trained_network(layer_sizes=(2, 4, 3, 1), hidden_activation='tanh', dtype=np.float32)
+    path = tmp_path / "net.npz"
+    nn.save(path)
+    loaded = NeuralNetwork.load(path, mmap=mmap)
+    assert_same_state(loaded, nn)
+    assert isinstance(loaded.weights[0], np.memmap) is mmap
+
+
+def test_round_trip_through_a_buffer_and_resume():
+    nn = trained_network()
+    buffer = io.BytesIO()
+    nn.save(buffer)
+    buffer.seek(0)
+    loaded = NeuralNetwork.load(buffer)
+    assert_same_state(loaded, nn)
+
+    # Training on from the checkpoint matches training on without it
+    nn.fit(X, Y, 50, learning_rate=0.5)
+    loaded.fit(X, Y, 50, learning_rate=0.5)
+    np.testing.assert_allclose(loaded.forward(X), nn.forward(X))
+    assert loaded.epoch == nn.epoch
+
+
+def test_memory_mapped_load_never_writes_back(tmp_path):
+    path = tmp_path / "net.npz"
+    trained_network().save(path)
+    before = path.read_bytes()
+    loaded = NeuralNetwork.load(path)
+    loaded.fit(X, Y, 10)
+    assert path.read_bytes() == before
+
+
+def test_save_npz_replaces_the_file_atomically(tmp_path):
+    path = tmp_path / "arrays.npz"
+    save_npz(path, {'a': np.arange(3)})
+    save_npz(path, {'a': np.arange(5), 'empty': np.empty((0, 2))})
+    arrays = load_npz(path)
+    assert arrays['a'].tolist() == list(range(5))
+    assert arrays['empty'].shape == (0, 2)
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_unsupported_version_is_rejected(tmp_path):
+    path = tmp_path / "net.npz"
+    trained_network().save(path)
+    arrays = dict(load_npz(path, mmap_mode=None))
+    arrays['version'] = np.array(-1)
+    save_npz(path, arrays)
+    with pytest.raises(ValueError):
+        NeuralNetwork.load(path)
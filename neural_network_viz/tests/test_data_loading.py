@@ -0,0 +1,53 @@
+import io
+import threading
+
+import numpy as np
+import pytest
+
+import data_loading
+from data_loading import DataFormatError, load_file, parse_text, split_targets
+
+
+def test_parse_text_and_split():
+    data = parse_text("0,0,0\n0,1,1\n1,0,1\n")
+    X, y = split_targets(data)
+    assert X.shape == (3, 2) and y.ravel().tolist() == [0, 1, 1]
+
+
+@pytest.mark.parametrize("text, row, column", [
+    ("1,2\n3,x\n", 2, 2),
+    ("1,2\n3\n", 2, 2),
+])
+def test_bad_text_reports_its_position(text, row, column):
+    with pytest.raises(DataFormatError) as info:
+        parse_text(text)
+    assert (info.value.row, info.value.column) == (row, column)
+
+
+def test_npy_upload():
+    buffer = io.BytesIO()
+    np.save(buffer, np.arange(4, dtype=np.int32))
+    assert load_file(buffer.getvalue(), "data.npy").tolist() == [[0.0], [1.0], [2.0], [3.0]]
+
+
+def test_cache_is_shared_read_only_and_thread_safe():
+    texts = [f"{n},1\n2,3\n" for n in range(data_loading.CACHE_SIZE * 4)]
+    errors = []
+
+    def load():
+        try:
+            for text in texts:
+                parse_text(text)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=load) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert len(data_loading._cache) <= data_loading.CACHE_SIZE
+    array = parse_text(texts[-1])
+    assert array is parse_text(texts[-1])
+    assert not array.flags.writeable
@@ -0,0 +1,52 @@
+import numpy as np
+
+from neural_network import LossHistory
+
+
+def test_records_grow_past_initial_capacity():
+    history = LossHistory(capacity=2)
+    for loss in (3.0, 2.0, 1.0):
+        history.append(loss)
+    assert len(history) == 3
+    assert history.epochs.tolist() == [1, 2, 3]
+    assert list(history) == [3.0, 2.0, 1.0]
+
+
+def test_short_history_is_not_downsampled():
+    history = LossHistory(max_points=30)
+    for epoch in range(1, 11):
+        history.append(1.0 / epoch, epoch)
+    epochs, losses = history.downsampled()
+    assert epochs.tolist() == list(range(1, 11))
+    np.testing.assert_allclose(losses, history.losses)
+
+
+def test_downsampled_view_stays_within_budget_and_keeps_extremes():
+    rng = np.random.default_rng(0)
+    losses = rng.random(100_000)
+    losses[12_345] = 50.0
+    losses[67_890] = -5.0
+    history = LossHistory(max_points=300)
+    for epoch, loss in enumerate(losses, start=1):
+        history.append(loss, epoch)
+
+    epochs, values = history.downsampled()
+    assert len(epochs) <= 300
+    assert np.all(np.diff(epochs) > 0)
+    assert epochs[-1] == len(losses)
+    np.testing.assert_array_equal(values, losses[epochs - 1])
+    assert values.max() == 50.0 and values.min() == -5.0
+
+
+def test_array_round_trip_continues_the_summary():
+    history = LossHistory(max_points=30)
+    for epoch in range(1, 101):
+        history.append(float(epoch % 7), epoch)
+    restored = LossHistory.from_arrays(history.to_arrays())
+    for epoch in range(101, 151):
+        history.append(float(epoch % 7), epoch)
+        restored.append(float(epoch % 7), epoch)
+
+    np.testing.assert_array_equal(restored.losses, history.losses)
+    for ours, theirs in zip(restored.downsampled(), history.downsampled()):
+        np.testing.assert_array_equal(ours, theirs)
@@ -0,0 +1,94 @@
+import copy
+
+import numpy as np
+import pytest
+
+from neural_network import NeuralNetwork
+
+X = np.array([[0, 0], [0, 1], [1, 0], [1, 1]], dtype=float)
+Y = np.array([[0], [1], [1], [0]], dtype=float)
+
+
+def test_tracked_fit_updates_parameters_in_place():
+    np.random.seed(0)
+    nn = NeuralNetwork()
+    weights, biases = list(nn.weights), list(nn.biases)
+    for _ in range(3):
+        nn.fit(X, Y, 5, learning_rate=0.5, track_changes=True)
+    assert all(a is b for a, b in zip(nn.weights, weights))
+    assert all(a is b for a, b in zip(nn.biases, biases))
+
+
+def test_weight_changes_do_not_alias_workspace_buffers():
+    np.random.seed(0)
+    nn = NeuralNetwork()
+    nn.fit(X, Y, 3, learning_rate=0.5, track_changes=True)
+    changes = {key: value.copy() for key, value in nn.weight_changes.items()}
+    for i in range(nn.n_layers):
+        np.testing.assert_allclose(changes[f'weights{i + 1}'], nn.weights[i] - nn.previous_weights[i])
+        np.testing.assert_allclose(changes[f'bias{i + 1}'], nn.biases[i] - nn.previous_biases[i])
+
+    # Untracked training overwrites the gradient buffers but not the recorded changes
+    nn.fit(X, Y, 3, learning_rate=0.5, track_changes=False)
+    for key, value in changes.items():
+        np.testing.assert_array_equal(nn.weight_changes[key], value)
+    workspace = nn._workspace['grad_weights'] + nn._workspace['grad_biases']
+    for change in nn.weight_changes.values():
+        assert not any(np.shares_memory(change, buffer) for buffer in workspace)
+
+
+def test_early_stop_snapshot_matches_last_update():
+    np.random.seed(1)
+    nn = NeuralNetwork()
+    result = nn.fit(X, Y, 50, learning_rate=0.5, tol=1.0, track_changes=True)
+    assert result['stopped_early'] and result['epochs'] == 1
+    for i in range(nn.n_layers):
+        np.testing.assert_allclose(nn.weight_changes[f'weights{i + 1}'], nn.weights[i] - nn.previous_weights[i])
+
+
+def test_layer_sizes_and_activations_shape_the_network():
+    np.random.seed(0)
+    nn = NeuralNetwork(layer_sizes=(2, 5, 4, 1), hidden_activation='relu', output_activation='linear')
+    assert [w.shape for w in nn.weights] == [(2, 5), (5, 4), (4, 1)]
+    assert [b.shape for b in nn.biases] == [(5,), (4,), (1,)]
+    assert nn.activations == ['relu', 'relu', 'linear']
+    assert nn.weights3 is nn.weights[2] and nn.bias3 is nn.biases[2]
+    assert nn.forward(X).shape == (4, 1)
+    np.testing.assert_allclose(nn.predict(X), nn.output)
+
+
+@pytest.mark.parametrize("hidden, output", [('sigmoid', 'sigmoid'), ('tanh', 'linear'), ('relu', 'sigmoid')])
+def test_fit_matches_repeated_backward(hidden, output):
+    np.random.seed(2)
+    nn = NeuralNetwork(layer_sizes=(2, 4, 3, 1), hidden_activation=hidden, output_activation=output)
+    reference = copy.deepcopy(nn)
+    nn.fit(X, Y, 5, learning_rate=0.05)
+    for _ in range(5):
+        reference.forward(X)
+        reference.backward(X, Y, learning_rate=0.05)
+    for ours, theirs in zip(nn.weights + nn.biases, reference.weights + reference.biases):
+        np.testing.assert_allclose(ours, theirs, rtol=1e-10, atol=1e-12)
+    np.testing.assert_allclose(nn.loss_history.losses, reference.loss_history.losses)
+
+
+def test_float32_network_keeps_its_dtype():
+    np.random.seed(0)
+    nn = NeuralNetwork(layer_sizes=(2, 8, 1), dtype=np.float32)
+    nn.fit(X, Y, 10, learning_rate=0.5)
+    nn.weights1 = np.ones((2, 8))
+    assert all(p.dtype == np.float32 for p in nn.weights + nn.biases)
+    assert nn.predict(X).dtype == np.float32
+    assert nn.loss_history.losses.dtype == np.float64
+
+
+@pytest.mark.parametrize("kwargs, message", [
+    ({"layer_sizes": (2,)}, "layer_sizes"),
+    ({"layer_sizes": ()}, "layer_sizes"),
+    ({"hidden_activation": "softplus"}, "Unknown activation"),
+    ({"output_activation": "softmax"}, "Unknown activation"),
+    ({"dtype": np.int32}, "dtype"),
+    ({"dtype": np.float16}, "dtype"),
+])
+def test_invalid_configuration_raises(kwargs, message):
+    with pytest.raises(ValueError, match=message):
+        NeuralNetwork(**kwargs)
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from neural_network import NeuralNetwork, NeuralNetworkPopulation
+
+X = np.array([[0, 0], [0, 1], [1, 0], [1, 1]], dtype=float)
+Y = np.array([[0], [1], [1], [0]], dtype=float)
+
+
+def test_population_training_matches_independent_networks():
+    np.random.seed(0)
+    networks = [NeuralNetwork() for _ in range(3)]
+    learning_rates = np.array([0.1, 0.5, 1.0])
+    population = NeuralNetworkPopulation.from_networks(networks)
+    history = population.train(X, Y, 20, learning_rates=learning_rates)
+
+    assert history.shape == (20, 3)
+    for i, nn in enumerate(networks):
+        nn.forward(X)
+        for _ in range(20):
+            nn.backward(X, Y, learning_rate=learning_rates[i])
+        np.testing.assert_allclose(history[:, i], nn.loss_history.losses)
+        trained = population.network(i)
+        for ours, theirs in zip(trained.weights + trained.biases, nn.weights + nn.biases):
+            np.testing.assert_allclose(ours, theirs)
+
+
+def test_per_model_inputs_and_scalar_learning_rate():
+    np.random.seed(1)
+    population = NeuralNetworkPopulation(2)
+    stacked = np.stack([X, X[::-1]])
+    targets = np.stack([Y, Y[::-1]])
+    single = population.network(0)
+
+    output = population.forward(stacked)
+    assert output.shape == (2, 4, 1)
+    np.testing.assert_allclose(output[0], single.predict(X))
+    population.backward(stacked, targets, learning_rates=0.5)
+    assert population.calculate_loss(targets, population.forward(stacked)).shape == (2,)
+
+
+def test_network_returns_an_independent_copy():
+    population = NeuralNetworkPopulation(2, weights_init=0.5)
+    nn = population.network(1)
+    nn.weights1[:] = 0.0
+    assert np.all(population.weights1[1] == 0.5)
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"layer_sizes": (2, 4, 1)},
+    {"hidden_activation": "tanh"},
+    {"output_activation": "linear"},
+])
+def test_from_networks_rejects_other_architectures(kwargs):
+    with pytest.raises(ValueError):
+        NeuralNetworkPopulation.from_networks([NeuralNetwork(), NeuralNetwork(**kwargs)])
@@ -0,0 +1,28 @@
+import time
+
+import numpy as np
+
+from neural_network import NeuralNetwork
+from training_session import FINISHED, TrainingSession
+
+X = np.array([[0, 0], [0, 1], [1, 0], [1, 1]], dtype=float)
+Y = np.array([[0], [1], [1], [0]], dtype=float)
+
+
+def test_loss_is_recorded_per_snapshot_interval_not_per_epoch():
+    np.random.seed(0)
+    nn = NeuralNetwork()
+    session = TrainingSession(nn, X, Y, max_epochs=20000, snapshot_interval=0.25, records_per_snapshot=2)
+    session.start()
+    deadline = time.monotonic() + 30
+    while session.active and time.monotonic() < deadline:
+        time.sleep(0.01)
+    session.stop(timeout=5)
+
+    snapshot = session.snapshot()
+    assert snapshot.state == FINISHED
+    assert nn.epoch == 20000
+    # Far fewer records than epochs, and the final epoch is always among them
+    assert len(nn.loss_history) < nn.epoch / 10
+    assert nn.loss_history.epochs[-1] == nn.epoch
+    assert snapshot.loss_epochs[-1] == nn.epoch
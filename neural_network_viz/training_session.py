@@ -0,0 +1,191 @@
+"""Background training for the Streamlit app.
+
+A TrainingSession runs NeuralNetwork.fit on its own thread in short chunks of
+epochs and publishes an immutable TrainingSnapshot (parameter copies, loss,
+epoch, downsampled loss curve and predictions) at most every
+snapshot_interval seconds. The loss is recorded about records_per_snapshot
+times per snapshot interval rather than every epoch, so the raw history
+grows with wall time instead of with the epoch rate. The UI only ever reads the latest snapshot, so it
+never touches the network while the worker is updating it. Between chunks
+the worker checks for pause/resume/stop requests.
+"""
+import threading
+import time
+from typing import List, NamedTuple, Optional
+
+import numpy as np
+
+IDLE, RUNNING, PAUSED, STOPPED, FINISHED, FAILED = 'idle', 'running', 'paused', 'stopped', 'finished', 'failed'
+
+
+class TrainingSnapshot(NamedTuple):
+    """Copy of the training state at one point in time."""
+    state: str
+    epoch: int
+    loss: Optional[float]
+    epochs_per_second: float
+    layer_sizes: tuple
+    weights: List[np.ndarray]
+    biases: List[np.ndarray]
+    previous_weights: Optional[List[np.ndarray]]
+    previous_biases: Optional[List[np.ndarray]]
+    loss_epochs: np.ndarray
+    loss_values: np.ndarray
+    predictions: Optional[np.ndarray]
+    error: Optional[str] = None
+
+
+class TrainingSession:
+    """Trains a network on a background thread until max_epochs, tol or stop().
+
+    Each chunk of epochs is sized from the measured epoch time so that it
+    takes about chunk_seconds, which bounds how long pause() and stop() take
+    to be honoured. With checkpoint_path set, NeuralNetwork.save runs between
+    chunks on a schedule and once more at the end. The network belongs to the
+    worker while the session is running or paused; use it directly again
+    only after stop() returns.
+    """
+
+    def __init__(self, nn, X, y, learning_rate=0.1, max_epochs=None, tol=None,
+                 snapshot_interval=0.25, chunk_seconds=0.05, max_chunk_epochs=10000,
+                 checkpoint_path=None, checkpoint_interval=60.0, records_per_snapshot=10):
+        self.nn = nn
+        self.X = nn._as_compute(X)
+        self.y = nn._as_compute(y)
+        self.learning_rate = learning_rate
+        self.max_epochs = max_epochs
+        self.tol = tol
+        self.snapshot_interval = snapshot_interval
+        self.chunk_seconds = chunk_seconds
+        self.max_chunk_epochs = max_chunk_epochs
+        self.records_per_snapshot = records_per_snapshot
+        # With a path, the network is saved every checkpoint_interval seconds and when the session ends
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval
+        self._lock = threading.Lock()
+        self._resume = threading.Event()
+        self._resume.set()
+        self._stop = threading.Event()
+        self._thread = None
+        self._state = IDLE
+        self._epochs_per_second = 0.0
+        self._snapshot = self._take_snapshot(IDLE)
+
+    @property
+    def state(self):
+        return self._state
+
+    @property
+    def active(self):
+        """True while the worker thread owns the network (running or paused)."""
+        return self._state in (RUNNING, PAUSED)
+
+    def snapshot(self):
+        """The most recently published snapshot."""
+        with self._lock:
+            return self._snapshot
+
+    def start(self):
+        if self._thread is not None:
+            raise RuntimeError("TrainingSession can only be started once")
+        self._state = RUNNING
+        self._thread = threading.Thread(target=self._run, name="TrainingSession", daemon=True)
+        self._thread.start()
+
+    def pause(self):
+        if self._state == RUNNING:
+            self._resume.clear()
+
+    def resume(self):
+        if self._state in (RUNNING, PAUSED):
+            self._resume.set()
+
+    def stop(self, timeout=None):
+        """Ask the worker to stop after its current chunk and wait for it."""
+        self._stop.set()
+        self._resume.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        nn = self.nn
+        start_epoch = nn.epoch
+        chunk = 1
+        last_publish = 0.0
+        last_checkpoint = time.monotonic()
+        state = RUNNING
+        try:
+            while not self._stop.is_set():
+                if not self._resume.is_set():
+                    self._set_state(PAUSED)
+                    self._resume.wait()
+                    self._set_state(RUNNING)
+                    continue
+                if self.max_epochs is not None:
+                    remaining = self.max_epochs - (nn.epoch - start_epoch)
+                    if remaining <= 0:
+                        state = FINISHED
+                        break
+                    chunk = min(chunk, remaining)
+                # Epochs between loss records, from the measured rate; every epoch until it is known
+                record_every = max(1, int(self._epochs_per_second * self.snapshot_interval
+                                          / self.records_per_snapshot))
+                started = time.perf_counter()
+                result = nn.fit(self.X, self.y, chunk, learning_rate=self.learning_rate, tol=self.tol,
+                                record_every=record_every)
+                elapsed = time.perf_counter() - started
+                self._epochs_per_second = result['epochs'] / elapsed if elapsed > 0 else 0.0
+                # Aim for chunks of about chunk_seconds
+                if elapsed > 0:
+                    chunk = int(min(self.max_chunk_epochs, max(1, chunk * self.chunk_seconds / elapsed)))
+                if result['stopped_early']:
+                    state = FINISHED
+                    break
+                now = time.monotonic()
+                if now - last_publish >= self.snapshot_interval:
+                    self._publish(RUNNING)
+                    last_publish = now
+                if self.checkpoint_path and now - last_checkpoint >= self.checkpoint_interval:
+                    nn.save(self.checkpoint_path)
+                    last_checkpoint = now
+            else:
+                state = STOPPED
+            if self.checkpoint_path:
+                nn.save(self.checkpoint_path)
+            self._publish(state)
+        except Exception as e:
+            self._publish(FAILED, error=str(e))
+
+    def _set_state(self, state):
+        with self._lock:
+            self._state = state
+            self._snapshot = self._snapshot._replace(state=state)
+
+    def _publish(self, state, error=None):
+        snapshot = self._take_snapshot(state, error)
+        with self._lock:
+            self._snapshot = snapshot
+            self._state = state
+
+    def _take_snapshot(self, state, error=None):
+        nn = self.nn
+        copy_all = lambda arrays: None if arrays is None else [a.copy() for a in arrays]
+        loss_epochs, loss_values = nn.loss_history.downsampled()
+        # After fit, nn.output holds the forward pass for the current parameters
+        predictions = nn.output.copy() if getattr(nn, 'output', None) is not None and \
+            nn._activations_input is self.X else None
+        return TrainingSnapshot(
+            state=state,
+            epoch=nn.epoch,
+            loss=float(loss_values[-1]) if len(loss_values) else None,
+            epochs_per_second=self._epochs_per_second,
+            layer_sizes=nn.layer_sizes,
+            weights=copy_all(nn.weights),
+            biases=copy_all(nn.biases),
+            previous_weights=copy_all(nn.previous_weights),
+            previous_biases=copy_all(nn.previous_biases),
+            loss_epochs=loss_epochs,
+            loss_values=loss_values,
+            predictions=predictions,
+            error=error,
+        )
@@ -0,0 +1,142 @@
+import re
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, NamedTuple, Type
+
+
+class MessageAnalysis(NamedTuple):
+    """Counts produced for one message (or summed over many)."""
+    words: int = 0
+    characters: int = 0
+    mentions: int = 0
+    links: int = 0
+    emoji: int = 0
+    code_spans: int = 0
+
+    def __add__(self, other: "MessageAnalysis") -> "MessageAnalysis":
+        return MessageAnalysis(*(a + b for a, b in zip(self, other)))
+
+
+# One pass over the text: at each position the first matching alternative wins,
+# so Slack entities are recognised before the catch-all word pattern. Slack
+# escapes literal "<" and ">" as &lt; / &gt;, so a raw "<" always opens an entity.
+# A word needs at least one word character: punctuation on its own (such as the
+# comma in "<@U123>,") is not a word. A "<" or "`" that opens nothing is a stray.
+# Strays and punctuation join the word they touch and are never words themselves.
+_TOKEN_RE = re.compile(
+    r"(?P<code>```.*?```|`[^`\n]+`)"
+    r"|(?P<mention><[@!#][^>\n]*>)"
+    r"|(?P<link><[^>\n]+>)"
+    r"|(?P<emoji>:[A-Za-z0-9_+'-]+:)"
+    r"|(?P<word>[^\s<`\w]*\w[^\s<`]*)"
+    r"|(?P<punct>[^\s<`]+)"
+    r"|(?P<stray>[<`])",
+    re.DOTALL,
+)
+
+# Characters that can start a Slack entity; text without any of them needs no regex
+_MARKUP_CHARS = frozenset("<`:")
+# A whitespace-separated token without any word character, e.g. " - "
+_BARE_PUNCTUATION_RE = re.compile(r"(?<!\S)[^\w\s]+(?!\S)")
+
+_WORD_RE = re.compile(r"\S+")
+# Any whitespace other than a single space between words
+_IRREGULAR_SPACE_RE = re.compile(r"[^\S ]| {2}")
+
+
+def count_words(text: str) -> int:
+    """Count whitespace-separated words without building a list of them.
+
+    Single-spaced text (the common case) is counted with ``str.count``; other
+    text falls back to iterating over the matches.
+    """
+    text = text.strip()
+    if not text:
+        return 0
+    if _IRREGULAR_SPACE_RE.search(text) is None:
+        return text.count(" ") + 1
+    return sum(1 for _ in _WORD_RE.finditer(text))
+
+
+class TextAnalyzer(ABC):
+    """Base class for analysis engines."""
+
+    @abstractmethod
+    def analyze(self, text: str) -> MessageAnalysis:
+        """Count words, characters and Slack entities in one message."""
+
+    def analyze_batch(self, texts: Iterable[str]) -> List[MessageAnalysis]:
+        """Analyze many messages in one call."""
+        analyze = self.analyze
+        return [analyze(text) for text in texts]
+
+    def aggregate(self, texts: Iterable[str]) -> MessageAnalysis:
+        """Sum the analysis of many messages without keeping per-message results."""
+        words = characters = mentions = links = emoji = code_spans = 0
+        analyze = self.analyze
+        for text in texts:
+            result = analyze(text)
+            words += result.words
+            characters += result.characters
+            mentions += result.mentions
+            links += result.links
+            emoji += result.emoji
+            code_spans += result.code_spans
+        return MessageAnalysis(words, characters, mentions, links, emoji, code_spans)
+
+
+class WhitespaceAnalyzer(TextAnalyzer):
+    """The original behaviour: every whitespace-separated token is a word."""
+
+    def analyze(self, text: str) -> MessageAnalysis:
+        return MessageAnalysis(words=count_words(text), characters=len(text))
+
+
+class SlackMarkupAnalyzer(TextAnalyzer):
+    """Understands Slack mrkdwn entities.
+
+    User/channel mentions (``<@U123>``, ``<#C123|general>``, ``<!here>``),
+    links (``<https://...|label>``), ``:emoji:`` and inline or fenced code are
+    counted separately and not as words. Tokens made only of punctuation are
+    not words either.
+    """
+
+    def analyze(self, text: str) -> MessageAnalysis:
+        if _MARKUP_CHARS.isdisjoint(text) and _BARE_PUNCTUATION_RE.search(text) is None:
+            return MessageAnalysis(words=count_words(text), characters=len(text))
+        words = mentions = links = emoji = code_spans = 0
+        # Adjacent words, punctuation and strays form one run, which is one word
+        # if any piece of it is a word
+        run_end = -1
+        run_counted = False
+        for match in _TOKEN_RE.finditer(text):
+            kind = match.lastgroup
+            if kind == "word" or kind == "punct" or kind == "stray":
+                if match.start() != run_end:
+                    run_counted = False
+                if kind == "word" and not run_counted:
+                    words += 1
+                    run_counted = True
+                run_end = match.end()
+            elif kind == "mention":
+                mentions += 1
+            elif kind == "link":
+                links += 1
+            elif kind == "emoji":
+                emoji += 1
+            else:
+                code_spans += 1
+        return MessageAnalysis(words, len(text), mentions, links, emoji, code_spans)
+
+
+ANALYZERS: Dict[str, Type[TextAnalyzer]] = {
+    "slack": SlackMarkupAnalyzer,
+    "whitespace": WhitespaceAnalyzer,
+}
+
+
+def get_analyzer(name: str = "slack") -> TextAnalyzer:
+    """Create an analyzer by name (see ANALYZERS)."""
+    try:
+        return ANALYZERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown analyzer '{name}', expected one of {sorted(ANALYZERS)}")
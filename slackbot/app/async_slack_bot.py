@@ -0,0 +1,262 @@
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING, Optional, Set
+from slack_sdk.web.async_client import AsyncWebClient
+from slack_sdk.socket_mode.response import SocketModeResponse
+from slack_sdk.socket_mode.request import SocketModeRequest
+from .analysis import get_analyzer
+from .dedup import EventDeduplicator
+from .dispatcher import LatencyRecorder
+from .logging_config import Redacted, log_event_summary, payload_logger
+from .outbound import AsyncOutboundScheduler
+from .profile_cache import AsyncUserProfileCache, display_name_from_user
+from .slack_bot import format_message_analysis
+
+if TYPE_CHECKING:
+    import aiohttp
+
+logger = logging.getLogger('SlackWordCountBot')
+
+class AsyncSlackWordCountBot:
+    """asyncio-native SlackWordCountBot built on AsyncWebClient and the aiohttp Socket Mode client.
+
+    Each acknowledged event runs as its own task on the event loop, so many
+    events can wait on Web API round-trips at once without a thread each.
+    ``max_concurrency`` bounds how many are in flight and ``max_queue_size``
+    how many more may wait for a slot; events beyond that are rejected.
+    """
+
+    def __init__(
+        self,
+        bot_token: str,
+        app_token: str = None,
+        max_concurrency: int = 100,
+        max_queue_size: int = 100,
+        profile_cache_size: int = 1000,
+        profile_cache_ttl: float = 3600.0,
+        deduplicator: EventDeduplicator = None,
+        coalesce_replies: bool = False,
+        analyzer: str = "slack"
+    ):
+        """Initialize the bot with bot token and optionally app token for socket mode."""
+        logger.info("[SlackBot] Initializing async bot with provided tokens")
+        self.client = AsyncWebClient(token=bot_token)
+        self.app_token = app_token
+        # The aiohttp Socket Mode client needs a running loop, so it is created in start()
+        self.socket_client = None
+        self.latency = LatencyRecorder()
+        self.profile_cache = AsyncUserProfileCache(
+            self.fetch_display_name,
+            max_size=profile_cache_size,
+            ttl=profile_cache_ttl
+        )
+        # Socket Mode redelivers unacked envelopes; skip ones already handled
+        self.deduplicator = deduplicator or EventDeduplicator()
+        # All replies go through per-channel and global rate limits
+        self.outbound = AsyncOutboundScheduler(self.client, coalesce=coalesce_replies)
+        self.analyzer = get_analyzer(analyzer)
+        self.max_concurrency = max_concurrency
+        self.max_queue_size = max_queue_size
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._running_events = 0
+        self._counters = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0}
+        # Shared by every Web API call once start() runs on the loop; closed by stop()
+        self._session: Optional["aiohttp.ClientSession"] = None
+        self._bot_user_id_task: Optional[asyncio.Task] = None
+        logger.info("[SlackBot] Initialization complete")
+
+    def count_words(self, text: str) -> int:
+        """Count words in a message."""
+        return self.analyzer.analyze(text).words
+
+    async def process_event(self, client, req: SocketModeRequest):
+        """Acknowledge a Socket Mode request and schedule it as a task."""
+        logger.debug("[SlackBot] Received event: %s", req.type)
+        payload_logger.debug("[SlackBot] Full event payload: %s", Redacted(req.payload))
+
+        if req.type == "events_api":
+            with self.latency.time("ack"):
+                await client.send_socket_mode_response(SocketModeResponse(envelope_id=req.envelope_id))
+            logger.debug("[SlackBot] Acknowledged event request")
+            if not self.deduplicator.claim(req.payload, req.retry_attempt):
+                return
+            # The envelope is already acked, so a rejected event is not redelivered: submit
+            # logs and counts it, and its dedup claim is kept
+            self.submit(req.payload["event"])
+
+    def submit(self, event: dict) -> Optional[asyncio.Task]:
+        """Schedule an event for handling on the running loop; returns None if too many are pending."""
+        if len(self._tasks) >= self.max_concurrency + self.max_queue_size:
+            logger.warning("[SlackBot] %d events pending, dropping event", len(self._tasks))
+            self._counters["rejected"] += 1
+            return None
+        task = asyncio.get_running_loop().create_task(self._run_event(event, time.perf_counter()))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        self._counters["submitted"] += 1
+        return task
+
+    async def _run_event(self, event: dict, submitted_at: float):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            self.latency.record("queue_wait", time.perf_counter() - submitted_at)
+            self._running_events += 1
+            try:
+                with self.latency.time("handle"):
+                    await self.handle_event(event)
+                self._counters["completed"] += 1
+            except Exception as e:
+                logger.error("[SlackBot] Error handling event: %s", e)
+                self._counters["failed"] += 1
+            finally:
+                self._running_events -= 1
+
+    async def handle_event(self, event: dict):
+        """Handle a single acknowledged Events API event."""
+        logger.debug("[SlackBot] Event type: %s", event.get('type'))
+
+        # Handle both regular messages and DM messages
+        if (event["type"] == "message" or event["type"] == "message.im") and "subtype" not in event:
+            logger.debug("[SlackBot] Processing event type: %s in channel type: %s", event['type'], event.get('channel_type', 'unknown'))
+            # Failures propagate to _run_event, which logs and counts them
+            await self.process_message_event(event)
+        else:
+            logger.debug("[SlackBot] Skipping non-message event or message with subtype: %s", event.get('subtype', 'no subtype'))
+
+    async def process_message_event(self, event: dict):
+        """Process a single message event."""
+        started = time.perf_counter()
+        channel = event.get("channel")
+        user = event.get("user")
+        text = event.get("text")
+        outcome = "failed"
+        analysis = None
+        try:
+            # Ignore messages from the bot itself
+            with self.latency.time("self_check"):
+                from_self = user == await self.get_bot_user_id()
+            if from_self:
+                outcome = "self"
+                return
+
+            if not (channel and user and text):
+                logger.warning("[SlackBot] Incomplete message event received: channel=%s, user=%s, has_text=%s",
+                               channel, user, bool(text))
+                outcome = "incomplete"
+                return
+
+            payload_logger.debug("[SlackBot] Processing message %s from user %s in channel %s",
+                                 Redacted(text), user, channel)
+            # Get user info for display name (falls back to the user ID if the lookup failed)
+            with self.latency.time("profile_lookup"):
+                display_name = await self.profile_cache.get(user) or user
+
+            # Format response with metadata
+            with self.latency.time("analysis"):
+                analysis = self.analyzer.analyze(text)
+            response = format_message_analysis(event, display_name, analysis)
+
+            try:
+                with self.latency.time("post"):
+                    await self.outbound.post(
+                        channel,
+                        response,
+                        mrkdwn=True  # Enable Slack markdown formatting
+                    )
+            except Exception as e:
+                logger.error("[SlackBot] Error sending response: %s", e)
+                raise
+            payload_logger.debug("[SlackBot] Sent response: %s", Redacted(response))
+            outcome = "replied"
+        finally:
+            log_event_summary(event, outcome, started, analysis)
+
+    async def get_bot_user_id(self):
+        """Return the bot's own user ID, calling auth.test once and sharing the result."""
+        if self._bot_user_id_task is None:
+            self._bot_user_id_task = asyncio.ensure_future(self._fetch_bot_user_id())
+        return await asyncio.shield(self._bot_user_id_task)
+
+    async def _fetch_bot_user_id(self):
+        try:
+            with self.latency.time("auth_test"):
+                auth_response = await self.client.auth_test()
+            self.bot_user_id = auth_response["user_id"]
+            logger.info("[SlackBot] Bot user ID: %s", self.bot_user_id)
+        except Exception as e:
+            logger.error("[SlackBot] Error getting bot user ID: %s", e)
+            self.bot_user_id = None
+        return self.bot_user_id
+
+    async def fetch_display_name(self, user: str) -> str:
+        """Look up a user's display name with users.info (used on profile cache misses)."""
+        with self.latency.time("users_info"):
+            user_info = await self.client.users_info(user=user)
+        return display_name_from_user(user_info["user"])
+
+    async def start(self, warm_profile_cache: bool = False):
+        """Connect the aiohttp Socket Mode client on the running loop."""
+        # Only needed for the shared session; main.py imports this module only when the async bot is enabled
+        import aiohttp
+
+        if self.client.session is None:
+            # One connection pool for every Web API call instead of a new session per request
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.client.timeout))
+            self.client.session = self._session
+        if warm_profile_cache:
+            await self.profile_cache.warm(self.client)
+        if not self.app_token:
+            logger.info("[SlackBot] Not starting Socket Mode - running in Lambda mode")
+            return
+
+        # Imported here so the Socket Mode client is only loaded when an app token is given
+        from slack_sdk.socket_mode.aiohttp import SocketModeClient
+
+        logger.info("[SlackBot] Starting async Socket Mode client...")
+        try:
+            self.socket_client = SocketModeClient(
+                app_token=self.app_token,
+                web_client=self.client
+            )
+            self.socket_client.socket_mode_request_listeners.append(self.process_event)
+            logger.info("[SlackBot] Added event listener")
+            await self.socket_client.connect()
+            logger.info("[SlackBot] Socket Mode connection initiated")
+        except Exception as e:
+            logger.error("[SlackBot] Failed to start Socket Mode client: %s", e)
+            raise
+
+    async def stop(self, timeout: float = 10.0):
+        """Close the Socket Mode connection and wait for in-flight events to finish."""
+        if self.socket_client:
+            logger.info("[SlackBot] Closing Socket Mode client...")
+            await self.socket_client.close()
+        if self._tasks:
+            done, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+            for task in pending:
+                task.cancel()
+            if pending:
+                logger.warning("[SlackBot] Cancelled %d events still running on shutdown", len(pending))
+                await asyncio.wait(pending)
+        await self.outbound.shutdown(drain=False)
+        if self._session is not None:
+            self.client.session = None
+            await self._session.close()
+            self._session = None
+
+    def stats(self) -> dict:
+        """Running and waiting event counts, per-stage latency and profile cache statistics."""
+        return {
+            "in_flight": self._running_events,
+            "queue_depth": len(self._tasks) - self._running_events,
+            "queue_capacity": self.max_queue_size,
+            "max_concurrency": self.max_concurrency,
+            **self._counters,
+            "stages": self.latency.snapshot(),
+            "profile_cache": self.profile_cache.stats(),
+            "dedup": self.deduplicator.stats(),
+            "outbound": self.outbound.stats()
+        }
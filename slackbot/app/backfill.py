@@ -0,0 +1,234 @@
+"""Backfill word statistics for past channel messages.
+
+Pages through conversations.history (and optionally conversations.replies)
+for the given channels, runs every message through the same analyzer as live
+events, and keeps per-channel totals in a JSON checkpoint that is rewritten
+after each page. An interrupted run picks up from the stored cursor.
+
+Usage:
+    python -m app.backfill C0123 C0456 --checkpoint backfill.json --replies
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from slack_sdk import WebClient
+from .analysis import MessageAnalysis, TextAnalyzer, get_analyzer
+from .outbound import TokenBucket, is_retryable, retry_delay
+
+logger = logging.getLogger('SlackWordCountBot')
+
+
+class BackfillCheckpoint:
+    """Per-channel cursor and running totals, persisted as one JSON file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.channels: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.channels = json.load(f).get("channels", {})
+
+    def get(self, channel: str) -> Dict[str, Any]:
+        """Return the stored state for a channel, creating an empty one."""
+        with self._lock:
+            state = self.channels.get(channel)
+            if state is None:
+                state = self.channels[channel] = {
+                    "cursor": None,
+                    "done": False,
+                    "messages": 0,
+                    "totals": MessageAnalysis()._asdict(),
+                }
+            return state
+
+    def update(self, channel: str, cursor: Optional[str], messages: int, totals: MessageAnalysis, done: bool):
+        """Record progress for a channel and rewrite the file atomically."""
+        with self._lock:
+            self.channels[channel] = {
+                "cursor": cursor,
+                "done": done,
+                "messages": messages,
+                "totals": totals._asdict(),
+                "updated_at": time.time(),
+            }
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"channels": self.channels}, f, indent=2)
+            os.replace(tmp_path, self.path)
+
+
+class ChannelBackfill:
+    """Runs the backfill for a set of channels, several at a time, under a shared rate limit."""
+
+    def __init__(
+        self,
+        client: WebClient,
+        checkpoint: BackfillCheckpoint,
+        analyzer: Optional[TextAnalyzer] = None,
+        include_replies: bool = False,
+        oldest: Optional[str] = None,
+        latest: Optional[str] = None,
+        page_size: int = 200,
+        concurrency: int = 4,
+        requests_per_second: float = 0.8,
+        max_retries: int = 5,
+        sleep: Callable[[float], None] = time.sleep,
+        bot_user_id: Optional[str] = None,
+    ):
+        self.client = client
+        self.checkpoint = checkpoint
+        self.analyzer = analyzer or get_analyzer()
+        self.include_replies = include_replies
+        self.oldest = oldest
+        self.latest = latest
+        self.page_size = page_size
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self._sleep = sleep
+        # The bot's own replies are not counted; looked up with auth.test by run() when not given
+        self.bot_user_id = bot_user_id
+        # conversations.history / .replies are Tier 3 (about 50 calls per minute)
+        self.limiter = TokenBucket(requests_per_second, burst=max(1.0, requests_per_second * 5))
+
+    def run(self, channels: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Backfill every channel and return the final per-channel state."""
+        if self.bot_user_id is None:
+            self.bot_user_id = self._call("auth_test")["user_id"]
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="SlackBotBackfill") as pool:
+            for channel, error in zip(channels, pool.map(self._run_channel_safely, channels)):
+                if error:
+                    logger.error("[SlackBot] Backfill of %s stopped: %s", channel, error)
+        return {channel: self.checkpoint.get(channel) for channel in channels}
+
+    def _run_channel_safely(self, channel: str) -> Optional[str]:
+        try:
+            self.run_channel(channel)
+            return None
+        except Exception as e:
+            return str(e)
+
+    def run_channel(self, channel: str):
+        """Backfill one channel, resuming from its checkpointed cursor."""
+        state = self.checkpoint.get(channel)
+        if state["done"]:
+            logger.info("[SlackBot] Backfill of %s already complete", channel)
+            return
+        messages = state["messages"]
+        totals = MessageAnalysis(**state["totals"])
+        logger.info("[SlackBot] Backfilling %s from cursor %s", channel, state['cursor'])
+        for page, next_cursor in self.iter_history_pages(channel, state["cursor"]):
+            for message in page:
+                page_messages, page_totals = self.analyze_thread(channel, message)
+                messages += page_messages
+                totals += page_totals
+            self.checkpoint.update(channel, next_cursor, messages, totals, done=next_cursor is None)
+        logger.info("[SlackBot] Backfill of %s complete: %s messages, %s words", channel, messages, totals.words)
+
+    def iter_history_pages(self, channel: str, cursor: Optional[str]) -> Iterator[Tuple[List[dict], Optional[str]]]:
+        """Yield (messages, next_cursor) for each conversations.history page."""
+        while True:
+            response = self._call(
+                "conversations_history",
+                channel=channel,
+                cursor=cursor,
+                limit=self.page_size,
+                oldest=self.oldest,
+                latest=self.latest,
+            )
+            cursor = (response.get("response_metadata") or {}).get("next_cursor") or None
+            yield response.get("messages", []), cursor
+            if cursor is None:
+                return
+
+    def iter_replies(self, channel: str, thread_ts: str) -> Iterator[dict]:
+        """Yield the replies in a thread, excluding the parent message."""
+        cursor = None
+        while True:
+            response = self._call(
+                "conversations_replies",
+                channel=channel,
+                ts=thread_ts,
+                cursor=cursor,
+                limit=self.page_size,
+            )
+            for reply in response.get("messages", []):
+                if reply.get("ts") != thread_ts:
+                    yield reply
+            cursor = (response.get("response_metadata") or {}).get("next_cursor") or None
+            if cursor is None:
+                return
+
+    def analyze_thread(self, channel: str, message: dict) -> Tuple[int, MessageAnalysis]:
+        """Analyze a top-level message and, if enabled, its thread replies."""
+        count, totals = self._analyze_message(message)
+        if self.include_replies and message.get("reply_count") and message.get("thread_ts") == message.get("ts"):
+            for reply in self.iter_replies(channel, message["ts"]):
+                reply_count, reply_totals = self._analyze_message(reply)
+                count += reply_count
+                totals += reply_totals
+        return count, totals
+
+    def _analyze_message(self, message: dict) -> Tuple[int, MessageAnalysis]:
+        # Same filter as live events: plain user messages with text, not from a bot. Replies
+        # posted with a bot token carry bot_id but usually no subtype
+        if (message.get("subtype") or message.get("bot_id") or not message.get("text")
+                or message.get("user") == self.bot_user_id):
+            return 0, MessageAnalysis()
+        return 1, self.analyzer.analyze(message["text"])
+
+    def _call(self, method: str, **kwargs) -> Any:
+        kwargs = {k: v for k, v in kwargs.items() if v is not None}
+        for attempt in range(self.max_retries + 1):
+            wait = self.limiter.reserve()
+            if wait > 0:
+                self._sleep(wait)
+            try:
+                return getattr(self.client, method)(**kwargs)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                delay, rate_limited = retry_delay(e, attempt)
+                if rate_limited:
+                    self.limiter.pause(delay)
+                logger.warning("[SlackBot] %s failed, retrying in %.2fs: %s", method, delay, e)
+                self._sleep(delay)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Backfill word statistics from channel history")
+    parser.add_argument("channels", nargs="+", help="Channel IDs to backfill")
+    parser.add_argument("--checkpoint", default="backfill.json", help="Checkpoint/results file")
+    parser.add_argument("--replies", action="store_true", help="Include thread replies")
+    parser.add_argument("--oldest", help="Only messages after this Unix timestamp")
+    parser.add_argument("--latest", help="Only messages before this Unix timestamp")
+    parser.add_argument("--concurrency", type=int, default=4, help="Channels processed in parallel")
+    parser.add_argument("--rate", type=float, default=0.8, help="Web API calls per second across all channels")
+    parser.add_argument("--analyzer", default="slack", help="Text analyzer (slack or whitespace)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    backfill = ChannelBackfill(
+        WebClient(token=os.environ["SLACK_BOT_TOKEN"]),
+        BackfillCheckpoint(args.checkpoint),
+        analyzer=get_analyzer(args.analyzer),
+        include_replies=args.replies,
+        oldest=args.oldest,
+        latest=args.latest,
+        concurrency=args.concurrency,
+        requests_per_second=args.rate,
+    )
+    results = backfill.run(args.channels)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger('SlackWordCountBot')
+
+
+class InMemoryDedupStore:
+    """Bounded LRU of recently seen keys with TTL expiry (per process)."""
+
+    def __init__(self, max_size: int = 10000, ttl: float = 3600.0, clock: Callable[[], float] = time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._keys: "OrderedDict[str, float]" = OrderedDict()
+
+    def claim(self, key: str) -> bool:
+        """Mark a key as seen. Returns False if it was already seen and has not expired."""
+        now = self._clock()
+        with self._lock:
+            expires_at = self._keys.get(key)
+            if expires_at is not None and expires_at > now:
+                self._keys.move_to_end(key)
+                return False
+            self._keys[key] = now + self.ttl
+            self._keys.move_to_end(key)
+            while len(self._keys) > self.max_size:
+                self._keys.popitem(last=False)
+            return True
+
+    def release(self, key: str):
+        """Forget a key so a later retry is processed again."""
+        with self._lock:
+            self._keys.pop(key, None)
+
+
+class SQLiteDedupStore:
+    """Dedup keys in a SQLite file, shared by every process that opens it."""
+
+    def __init__(self, path: str, ttl: float = 3600.0):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen_events (key TEXT PRIMARY KEY, expires_at REAL NOT NULL)"
+        )
+        self._claims = 0
+
+    def claim(self, key: str) -> bool:
+        """Mark a key as seen. Returns False if it was already seen and has not expired."""
+        now = time.time()
+        with self._lock:
+            self._claims += 1
+            # Expired rows are purged now and then rather than on every claim
+            if self._claims % 1000 == 0:
+                self._conn.execute("DELETE FROM seen_events WHERE expires_at <= ?", (now,))
+            inserted = self._conn.execute(
+                "INSERT INTO seen_events (key, expires_at) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET expires_at = excluded.expires_at "
+                "WHERE seen_events.expires_at <= ?",
+                (key, now + self.ttl, now)
+            ).rowcount
+        return inserted == 1
+
+    def release(self, key: str):
+        """Forget a key so a later retry is processed again."""
+        with self._lock:
+            self._conn.execute("DELETE FROM seen_events WHERE key = ?", (key,))
+
+
+class EventDeduplicator:
+    """Suppresses Slack events that have already been handled.
+
+    Keys come from ``event_id`` (Events API envelope), then the message's
+    ``client_msg_id``, then channel + ts. A local LRU answers repeats cheaply;
+    the optional shared store catches duplicates delivered to other processes
+    or Lambda containers.
+    """
+
+    def __init__(self, local: Optional[InMemoryDedupStore] = None, shared: Any = None):
+        self.local = local or InMemoryDedupStore()
+        self.shared = shared
+        self._lock = threading.Lock()
+        self._counters = {"unique": 0, "suppressed": 0, "retries": 0, "unkeyed": 0}
+
+    @staticmethod
+    def event_key(envelope: Dict[str, Any]) -> Optional[str]:
+        """Derive the idempotency key for an Events API envelope (or a bare event)."""
+        if envelope.get("event_id"):
+            return envelope["event_id"]
+        event = envelope.get("event", envelope)
+        if event.get("client_msg_id"):
+            return f"msg:{event['client_msg_id']}"
+        if event.get("channel") and event.get("ts"):
+            return f"ts:{event['channel']}:{event['ts']}"
+        return None
+
+    def claim(self, envelope: Dict[str, Any], retry_num: Any = None) -> bool:
+        """Return True if the event is new and should be processed."""
+        if retry_num not in (None, "", 0, "0"):
+            self._increment("retries")
+        key = self.event_key(envelope)
+        if key is None:
+            self._increment("unkeyed")
+            return True
+        if not self.local.claim(key) or (self.shared is not None and not self.shared.claim(key)):
+            self._increment("suppressed")
+            logger.info("[SlackBot] Suppressed duplicate event %s (retry %s)", key, retry_num)
+            return False
+        self._increment("unique")
+        return True
+
+    def release(self, envelope: Dict[str, Any]):
+        """Undo a claim after a failure so Slack's retry is processed."""
+        key = self.event_key(envelope)
+        if key is None:
+            return
+        self.local.release(key)
+        if self.shared is not None:
+            self.shared.release(key)
+
+    def stats(self) -> Dict[str, int]:
+        """Return unique, suppressed, retry and unkeyed event counts."""
+        with self._lock:
+            return dict(self._counters)
+
+    def _increment(self, counter: str):
+        with self._lock:
+            self._counters[counter] += 1
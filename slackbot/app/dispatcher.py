@@ -0,0 +1,219 @@
+import bisect
+import itertools
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger('SlackWordCountBot')
+
+# Sentinel pushed onto the queue to tell a worker to exit
+_STOP = object()
+
+# Upper bounds (seconds) of the latency histogram buckets; a final +Inf bucket is implied
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class LatencyRecorder:
+    """Thread-safe running latency statistics and histograms keyed by stage name."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Dict[str, float]] = {}
+        # stage -> per-bucket (non-cumulative) counts, the last slot being +Inf
+        self._histograms: Dict[str, List[int]] = {}
+
+    def record(self, stage: str, seconds: float):
+        """Record one observation for a stage."""
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = {"count": 0, "total": 0.0, "max": 0.0, "last": 0.0}
+                self._histograms[stage] = [0] * (len(self.buckets) + 1)
+            stats["count"] += 1
+            stats["total"] += seconds
+            stats["last"] = seconds
+            if seconds > stats["max"]:
+                stats["max"] = seconds
+            self._histograms[stage][index] += 1
+
+    @contextmanager
+    def time(self, stage: str):
+        """Context manager that records how long its body took."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Return count, average, max and last latency (ms) per stage."""
+        with self._lock:
+            return {
+                stage: {
+                    "count": int(stats["count"]),
+                    "avg_ms": (stats["total"] / stats["count"]) * 1000 if stats["count"] else 0.0,
+                    "max_ms": stats["max"] * 1000,
+                    "last_ms": stats["last"] * 1000,
+                }
+                for stage, stats in self._stages.items()
+            }
+
+    def histograms(self) -> Dict[str, Tuple[List[int], int, float]]:
+        """Return (cumulative bucket counts ending with +Inf, count, total seconds) per stage."""
+        with self._lock:
+            return {
+                stage: (list(itertools.accumulate(self._histograms[stage])), int(stats["count"]), stats["total"])
+                for stage, stats in self._stages.items()
+            }
+
+    def totals(self) -> Dict[str, Tuple[int, float]]:
+        """Return (count, total seconds) per stage."""
+        with self._lock:
+            return {stage: (int(stats["count"]), stats["total"]) for stage, stats in self._stages.items()}
+
+
+class EventDispatcher:
+    """Bounded worker pool that runs event handlers off the Socket Mode listener thread.
+
+    Events are put on a bounded queue and picked up by a fixed number of worker
+    threads. When the queue is full, ``submit`` blocks for up to
+    ``submit_timeout`` seconds (backpressure on the listener) and then rejects
+    the event.
+
+    With a ``key`` function each worker has its own queue and events with the
+    same key always go to the same worker, so they are handled in arrival
+    order (used to keep replies in a channel in order).
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Dict[str, Any]], None],
+        workers: int = 4,
+        max_queue_size: int = 100,
+        submit_timeout: float = 1.0,
+        key: Optional[Callable[[Dict[str, Any]], Any]] = None,
+    ):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.handler = handler
+        self.workers = workers
+        self.submit_timeout = submit_timeout
+        self.key = key
+        self.latency = LatencyRecorder()
+        n_queues = workers if key is not None else 1
+        per_queue = max(1, -(-max_queue_size // n_queues))
+        self._queues: List["queue.Queue[Any]"] = [queue.Queue(maxsize=per_queue) for _ in range(n_queues)]
+        self._threads = []
+        self._lock = threading.Lock()
+        self._running = False
+        self._in_flight = 0
+        self._counters = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0}
+
+    def start(self):
+        """Start the worker threads."""
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            for i in range(self.workers):
+                thread = threading.Thread(
+                    target=self._worker,
+                    args=(self._queues[i % len(self._queues)],),
+                    name=f"SlackBotWorker-{i}",
+                    daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+        logger.info("[SlackBot] Dispatcher started with %s workers", self.workers)
+
+    def submit(self, event: Dict[str, Any]) -> bool:
+        """Queue an event for processing. Returns False if it was rejected."""
+        if not self._running:
+            logger.warning("[SlackBot] Dispatcher is not running, rejecting event")
+            self._increment("rejected")
+            return False
+        if self.key is None:
+            target = self._queues[0]
+        else:
+            target = self._queues[hash(self.key(event)) % len(self._queues)]
+        try:
+            target.put((time.perf_counter(), event), timeout=self.submit_timeout)
+        except queue.Full:
+            logger.warning("[SlackBot] Dispatcher queue full (%s), dropping event", target.maxsize)
+            self._increment("rejected")
+            return False
+        self._increment("submitted")
+        return True
+
+    def shutdown(self, drain: bool = True, timeout: Optional[float] = None):
+        """Stop the workers, optionally processing everything still queued first."""
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+        if not drain:
+            dropped = 0
+            for pending in self._queues:
+                while True:
+                    try:
+                        pending.get_nowait()
+                        pending.task_done()
+                        dropped += 1
+                    except queue.Empty:
+                        break
+            if dropped:
+                logger.warning("[SlackBot] Discarded %s queued events on shutdown", dropped)
+        for i, _ in enumerate(self._threads):
+            self._queues[i % len(self._queues)].put(_STOP)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            thread.join(remaining)
+        self._threads = []
+        logger.info("[SlackBot] Dispatcher stopped")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth, counters and per-stage latency."""
+        with self._lock:
+            counters = dict(self._counters)
+            in_flight = self._in_flight
+        return {
+            "running": self._running,
+            "workers": self.workers,
+            "queue_depth": sum(q.qsize() for q in self._queues),
+            "queue_capacity": sum(q.maxsize for q in self._queues),
+            "in_flight": in_flight,
+            **counters,
+            "stages": self.latency.snapshot(),
+        }
+
+    def _increment(self, counter: str, amount: int = 1):
+        with self._lock:
+            self._counters[counter] += amount
+
+    def _worker(self, work: "queue.Queue[Any]"):
+        while True:
+            item = work.get()
+            if item is _STOP:
+                work.task_done()
+                return
+            enqueued_at, event = item
+            self.latency.record("queue_wait", time.perf_counter() - enqueued_at)
+            with self._lock:
+                self._in_flight += 1
+            try:
+                with self.latency.time("handle"):
+                    self.handler(event)
+                self._increment("completed")
+            except Exception as e:
+                logger.error("[SlackBot] Error handling event: %s", e)
+                self._increment("failed")
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+                work.task_done()
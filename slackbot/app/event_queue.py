@@ -0,0 +1,223 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Tuple
+
+logger = logging.getLogger('SlackWordCountBot')
+
+# A queued item as handed to workers: (receipt, payload)
+QueuedItem = Tuple[Any, Dict[str, Any]]
+
+
+class EventQueue(ABC):
+    """Interface for the queue between the ack-first handler and the reply worker.
+
+    ``get_batch`` claims up to ``max_items`` payloads. Claimed items must be
+    passed to ``ack`` once handled; anything not acked becomes visible again
+    after the backend's visibility timeout.
+    """
+
+    @abstractmethod
+    def put(self, payload: Dict[str, Any]):
+        """Enqueue one payload."""
+
+    @abstractmethod
+    def get_batch(self, max_items: int = 10) -> List[QueuedItem]:
+        """Claim up to ``max_items`` visible payloads as (receipt, payload) pairs."""
+
+    @abstractmethod
+    def ack(self, receipts: List[Any]):
+        """Delete handled items by the receipts ``get_batch`` returned."""
+
+    @abstractmethod
+    def size(self) -> int:
+        """Number of items queued, claimed or not."""
+
+
+class InMemoryEventQueue(EventQueue):
+    """Process-local queue. Only useful when producer and worker share a process.
+
+    Follows the same claim/ack contract as SQLiteEventQueue: claimed items are
+    hidden for ``visibility_timeout`` seconds and handed out again unless
+    acked, up to ``max_attempts`` times.
+    """
+
+    def __init__(self, visibility_timeout: float = 30.0, max_attempts: int = 3,
+                 clock: Callable[[], float] = time.monotonic):
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self._clock = clock
+        # id -> [payload, visible_at, attempts], oldest first
+        self._items: "OrderedDict[int, list]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._next_id = 0
+
+    def put(self, payload: Dict[str, Any]):
+        now = self._clock()
+        with self._lock:
+            self._next_id += 1
+            self._items[self._next_id] = [payload, now, 0]
+
+    def get_batch(self, max_items: int = 10) -> List[QueuedItem]:
+        now = self._clock()
+        batch = []
+        dropped = 0
+        with self._lock:
+            for item_id, item in list(self._items.items()):
+                if len(batch) >= max_items:
+                    break
+                if item[1] > now:
+                    continue
+                if item[2] >= self.max_attempts:
+                    del self._items[item_id]
+                    dropped += 1
+                    continue
+                item[1] = now + self.visibility_timeout
+                item[2] += 1
+                batch.append((item_id, item[0]))
+        if dropped:
+            logger.warning("[SlackBot] Dropped %s queued events after %s attempts", dropped, self.max_attempts)
+        return batch
+
+    def ack(self, receipts: List[Any]):
+        with self._lock:
+            for receipt in receipts:
+                self._items.pop(receipt, None)
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+
+class SQLiteEventQueue(EventQueue):
+    """File-backed queue for local runs and tests.
+
+    Claimed rows are hidden for ``visibility_timeout`` seconds; rows that have
+    been claimed ``max_attempts`` times without an ack are dropped.
+    """
+
+    def __init__(self, path: str, visibility_timeout: float = 30.0, max_attempts: int = 3):
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS events ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " payload TEXT NOT NULL,"
+            " enqueued_at REAL NOT NULL,"
+            " visible_at REAL NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS events_visible_at ON events (visible_at)")
+
+    def put(self, payload: Dict[str, Any]):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO events (payload, enqueued_at, visible_at) VALUES (?, ?, ?)",
+                (json.dumps(payload), now, now)
+            )
+
+    def get_batch(self, max_items: int = 10) -> List[QueuedItem]:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                dropped = self._conn.execute(
+                    "DELETE FROM events WHERE visible_at <= ? AND attempts >= ?",
+                    (now, self.max_attempts)
+                ).rowcount
+                rows = self._conn.execute(
+                    "SELECT id, payload FROM events WHERE visible_at <= ? ORDER BY id LIMIT ?",
+                    (now, max_items)
+                ).fetchall()
+                if rows:
+                    self._conn.executemany(
+                        "UPDATE events SET visible_at = ?, attempts = attempts + 1 WHERE id = ?",
+                        [(now + self.visibility_timeout, row[0]) for row in rows]
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if dropped:
+            logger.warning("[SlackBot] Dropped %s queued events after %s attempts", dropped, self.max_attempts)
+        return [(row[0], json.loads(row[1])) for row in rows]
+
+    def ack(self, receipts: List[Any]):
+        if not receipts:
+            return
+        with self._lock:
+            self._conn.executemany("DELETE FROM events WHERE id = ?", [(r,) for r in receipts])
+
+    def size(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+
+class SQSEventQueue(EventQueue):
+    """Amazon SQS backend for deployed Lambdas."""
+
+    def __init__(self, queue_url: str):
+        # Imported here so boto3 is only needed when SQS is configured
+        import boto3
+        self.queue_url = queue_url
+        self._sqs = boto3.client('sqs')
+
+    def put(self, payload: Dict[str, Any]):
+        self._sqs.send_message(QueueUrl=self.queue_url, MessageBody=json.dumps(payload))
+
+    def get_batch(self, max_items: int = 10) -> List[QueuedItem]:
+        response = self._sqs.receive_message(
+            QueueUrl=self.queue_url,
+            MaxNumberOfMessages=min(max_items, 10),
+            WaitTimeSeconds=0
+        )
+        return [(m['ReceiptHandle'], json.loads(m['Body'])) for m in response.get('Messages', [])]
+
+    def ack(self, receipts: List[Any]):
+        for start in range(0, len(receipts), 10):
+            chunk = receipts[start:start + 10]
+            self._sqs.delete_message_batch(
+                QueueUrl=self.queue_url,
+                Entries=[{'Id': str(i), 'ReceiptHandle': r} for i, r in enumerate(chunk)]
+            )
+
+    def size(self) -> int:
+        attributes = self._sqs.get_queue_attributes(
+            QueueUrl=self.queue_url,
+            AttributeNames=['ApproximateNumberOfMessages']
+        )
+        return int(attributes['Attributes']['ApproximateNumberOfMessages'])
+
+
+def queue_from_url(url: str) -> EventQueue:
+    """Build a queue from a URL: ``memory://``, ``sqlite:///path/to.db`` or an ``https://sqs...`` queue URL."""
+    if url.startswith('memory://'):
+        return InMemoryEventQueue()
+    if url.startswith('sqlite://'):
+        return SQLiteEventQueue(url[len('sqlite://'):])
+    if url.startswith('https://sqs.') or url.startswith('sqs://'):
+        return SQSEventQueue(url.replace('sqs://', 'https://', 1))
+    raise ValueError(f"Unsupported event queue URL: {url}")
+
+
+def queue_from_env() -> EventQueue:
+    """Build the queue configured by SLACK_EVENT_QUEUE_URL.
+
+    There is no default: a file in one Lambda container's /tmp is invisible to
+    the worker function, so every queued event would be acked and then lost.
+    """
+    url = os.environ.get('SLACK_EVENT_QUEUE_URL')
+    if not url:
+        raise ValueError("SLACK_EVENT_QUEUE_URL must be set when SLACK_ACK_FIRST is on "
+                         "(an SQS queue URL, or sqlite:///path / memory:// for local runs)")
+    return queue_from_url(url)
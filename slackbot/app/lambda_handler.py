@@ -3,15 +3,95 @@ import os
 import hmac
 import hashlib
 import time
-from typing import Dict, Any
-from base64 import b64decode
-from slack_sdk import WebClient
-from slack_sdk.errors import SlackApiError
-from .slack_bot import SlackWordCountBot
+from typing import TYPE_CHECKING, Dict, Any
+from .event_queue import EventQueue, queue_from_env
+from .dedup import EventDeduplicator, SQLiteDedupStore
+from .logging_config import configure_logging
+from .metrics import counters_since, invocation_counters
+
+if TYPE_CHECKING:
+    from .slack_bot import SlackWordCountBot
+
+# Records are written synchronously so nothing is left queued when the container is frozen
+configure_logging(
+    level=os.environ.get('SLACK_LOG_LEVEL', 'INFO'),
+    payload_sample_rate=float(os.environ.get('SLACK_LOG_PAYLOAD_SAMPLE', '0.01')),
+    redact_text=not os.environ.get('SLACK_LOG_MESSAGE_TEXT')
+)
+
+# Module-scope state survives across warm invocations of the same container
+_signing_secret = None
+_bot = None
+_event_queue = None
+_deduplicator = None
+_cold_start = True
+
+def get_signing_secret() -> bytes:
+    """Return the encoded signing secret, reading the environment only once per container"""
+    global _signing_secret
+    if _signing_secret is None:
+        _signing_secret = os.environ['SLACK_SIGNING_SECRET'].encode('utf-8')
+    return _signing_secret
+
+def get_bot() -> "SlackWordCountBot":
+    """Return the container-wide bot, creating it on first use.
+
+    Reusing it keeps the WebClient, the cached bot user ID and the user
+    profile cache warm between invocations. slack_bot (and with it slack_sdk)
+    is only imported here, so URL verification, rejected signatures,
+    duplicates and ack-first requests never pay for loading it.
+    """
+    global _bot
+    if _bot is None:
+        from .slack_bot import SlackWordCountBot
+        _bot = SlackWordCountBot(
+            os.environ['SLACK_BOT_TOKEN'],
+            analyzer=os.environ.get('SLACK_TEXT_ANALYZER', 'slack')
+        )
+    return _bot
+
+def get_event_queue() -> EventQueue:
+    """Return the queue used by ack-first mode (configured by SLACK_EVENT_QUEUE_URL)"""
+    global _event_queue
+    if _event_queue is None:
+        _event_queue = queue_from_env()
+    return _event_queue
+
+def get_deduplicator() -> EventDeduplicator:
+    """Return the container-wide deduplicator.
+
+    Seen event IDs are kept in memory per container; set SLACK_DEDUP_DB to a
+    SQLite path to also share them with other processes on the same host.
+    """
+    global _deduplicator
+    if _deduplicator is None:
+        dedup_db = os.environ.get('SLACK_DEDUP_DB')
+        _deduplicator = EventDeduplicator(shared=SQLiteDedupStore(dedup_db) if dedup_db else None)
+    return _deduplicator
+
+def ack_first_enabled() -> bool:
+    """True when SLACK_ACK_FIRST is set, i.e. replies are posted by worker_handler"""
+    return os.environ.get('SLACK_ACK_FIRST', '').lower() in ('1', 'true', 'yes')
+
+def emit_invocation_metric(cold_start: bool, init_ms: float, duration_ms: float, status_code: int,
+                           counters: Dict[str, Any] = None):
+    """Print one JSON line per invocation so cold and warm latency can be compared in CloudWatch.
+
+    counters (see metrics.counters_since) adds the time spent in each handling
+    stage and the cache and Web API counts for this invocation.
+    """
+    print(json.dumps({
+        'metric': 'slackbot_invocation',
+        'cold_start': cold_start,
+        'init_ms': round(init_ms, 3),
+        'duration_ms': round(duration_ms, 3),
+        'status_code': status_code,
+        **(counters or {})
+    }))
 
 def verify_slack_signature(event: Dict[str, Any]) -> bool:
     """Verify that the request actually came from Slack"""
-    slack_signing_secret = os.environ['SLACK_SIGNING_SECRET'].encode('utf-8')
+    slack_signing_secret = get_signing_secret()
     slack_signature = event['headers'].get('x-slack-signature', '')
     slack_request_timestamp = event['headers'].get('x-slack-request-timestamp', '')
     
@@ -30,6 +110,24 @@ def verify_slack_signature(event: Dict[str, Any]) -> bool:
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """AWS Lambda handler for Slack events"""
+    global _cold_start
+    started = time.perf_counter()
+    cold_start, _cold_start = _cold_start, False
+    timings = {'init_ms': 0.0}
+    # A container handles one invocation at a time, so the change in the bot's counters is this invocation's
+    before = invocation_counters(_bot)
+    response = handle_request(event, timings)
+    emit_invocation_metric(
+        cold_start,
+        timings['init_ms'],
+        (time.perf_counter() - started) * 1000,
+        response['statusCode'],
+        counters_since(before, invocation_counters(_bot))
+    )
+    return response
+
+def handle_request(event: Dict[str, Any], timings: Dict[str, float]) -> Dict[str, Any]:
+    """Verify, parse and process one Slack Events API request"""
     # Initialize response
     response = {
         'statusCode': 200,
@@ -50,27 +148,108 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         response['body'] = json.dumps({'challenge': body['challenge']})
         return response
     
-    # Initialize Slack client
-    slack_bot_token = os.environ['SLACK_BOT_TOKEN']
-    bot = SlackWordCountBot(slack_bot_token)
+    if 'event' not in body or not is_replyable_message(body['event']):
+        return response
+    slack_event = body['event']
     
-    # Process the event
-    if 'event' in body:
-        slack_event = body['event']
-        
-        # Handle message events (both channel messages and DMs)
-        if (slack_event['type'] == 'message' or slack_event['type'] == 'message.im') and 'subtype' not in slack_event:
-            channel = slack_event.get('channel')
-            user = slack_event.get('user')
-            text = slack_event.get('text')
-            
-            if channel and user and text:
-                try:
-                    # Process the message using existing SlackWordCountBot logic
-                    bot.process_message_event(slack_event)
-                except Exception as e:
-                    print(f"Error processing message: {str(e)}")
-                    response['statusCode'] = 500
-                    response['body'] = json.dumps({'error': 'Internal server error'})
+    # Slack retries anything not acked within 3 seconds; answer duplicates with 200 and do nothing
+    deduplicator = get_deduplicator()
+    if not deduplicator.claim(body, event['headers'].get('x-slack-retry-num')):
+        return response
+    
+    # In ack-first mode the reply is left to worker_handler; just queue the event
+    if ack_first_enabled():
+        try:
+            get_event_queue().put({'event_id': body.get('event_id'), 'event': slack_event})
+        except Exception:
+            deduplicator.release(body)
+            raise
+        return response
+    
+    # Reuse the Slack client from a previous invocation if the container is warm
+    init_started = time.perf_counter()
+    bot = get_bot()
+    timings['init_ms'] = (time.perf_counter() - init_started) * 1000
+    
+    try:
+        # Process the message using existing SlackWordCountBot logic
+        bot.process_message_event(slack_event)
+    except Exception as e:
+        print(f"Error processing message: {str(e)}")
+        # Let Slack's retry through
+        deduplicator.release(body)
+        response['statusCode'] = 500
+        response['body'] = json.dumps({'error': 'Internal server error'})
     
     return response
+
+def is_replyable_message(slack_event: Dict[str, Any]) -> bool:
+    """True for plain channel or DM messages that carry a channel, user and text"""
+    # Handle message events (both channel messages and DMs)
+    if (slack_event['type'] == 'message' or slack_event['type'] == 'message.im') and 'subtype' not in slack_event:
+        return bool(slack_event.get('channel') and slack_event.get('user') and slack_event.get('text'))
+    return False
+
+def worker_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """Lambda entry point that posts replies for events queued in ack-first mode.
+
+    When triggered by SQS the records in the invocation are processed and
+    failures are reported back as a partial batch response. Otherwise (for
+    example on a schedule) the configured queue is drained in batches until
+    it is empty or the invocation is close to its time limit.
+    """
+    started = time.perf_counter()
+    bot = get_bot()
+    before = invocation_counters(bot)
+    processed = failed = 0
+    
+    if 'Records' in event:
+        failures = []
+        for record in event['Records']:
+            if process_queued_event(bot, json.loads(record['body'])):
+                processed += 1
+            else:
+                failed += 1
+                failures.append({'itemIdentifier': record['messageId']})
+        result = {'batchItemFailures': failures}
+    else:
+        queue = get_event_queue()
+        batch_size = int(os.environ.get('SLACK_WORKER_BATCH_SIZE', '10'))
+        while has_time_left(context):
+            batch = queue.get_batch(batch_size)
+            if not batch:
+                break
+            done = []
+            for receipt, payload in batch:
+                if process_queued_event(bot, payload):
+                    done.append(receipt)
+                    processed += 1
+                else:
+                    # Left un-acked so the queue hands it out again later
+                    failed += 1
+            queue.ack(done)
+        result = {'processed': processed, 'failed': failed}
+    
+    print(json.dumps({
+        'metric': 'slackbot_worker',
+        'processed': processed,
+        'failed': failed,
+        'duration_ms': round((time.perf_counter() - started) * 1000, 3),
+        **counters_since(before, invocation_counters(bot))
+    }))
+    return result
+
+def process_queued_event(bot: "SlackWordCountBot", payload: Dict[str, Any]) -> bool:
+    """Post the reply for one queued event; returns False if it should be retried"""
+    try:
+        bot.process_message_event(payload['event'])
+        return True
+    except Exception as e:
+        print(f"Error processing queued message: {str(e)}")
+        return False
+
+def has_time_left(context: Any, margin_ms: int = 5000) -> bool:
+    """True unless the Lambda context says fewer than margin_ms remain"""
+    if context is None or not hasattr(context, 'get_remaining_time_in_millis'):
+        return True
+    return context.get_remaining_time_in_millis() > margin_ms
@@ -0,0 +1,143 @@
+"""Logging setup and helpers for the bot's event hot path.
+
+``configure_logging`` replaces the import-time ``basicConfig`` the bot used
+to do. With ``use_queue`` the root logger only enqueues records; a
+QueueListener thread formats and writes them, so event handlers never wait on
+log I/O or pay for formatting. Handlers log one INFO summary per event (see
+``log_event_summary``); full payloads, message text and replies go to the
+``SlackWordCountBot.payload`` logger at DEBUG, where only a sample of records
+is kept and message text is redacted unless ``redact_text=False``.
+"""
+import atexit
+import logging
+import queue
+import random
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Optional
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+logger = logging.getLogger('SlackWordCountBot')
+payload_logger = logging.getLogger('SlackWordCountBot.payload')
+
+# Keys whose values hold user-written text in Events API payloads
+TEXT_KEYS = frozenset(("text", "blocks", "attachments", "files"))
+
+_redact = True
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+
+
+class SamplingFilter(logging.Filter):
+    """Lets through a random fraction of records (rate 1 keeps all, 0 none)."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return self.rate >= 1 or random.random() < self.rate
+
+
+class DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread.
+
+    The stock handler formats each record on the logging thread before
+    queueing it. Here the record is queued as-is, so logging arguments must
+    not be mutated after the call (the hot path only passes strings, numbers,
+    and payloads it no longer changes).
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class Redacted:
+    """Message text or a payload, rendered with user text removed only if the record is emitted."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def __str__(self) -> str:
+        return str(redact(self.value)) if _redact else str(self.value)
+
+
+def redact(value: Any) -> Any:
+    """Replace message text, or the text fields inside a payload, with placeholders."""
+    if isinstance(value, str):
+        return f"<redacted {len(value)} chars>"
+    return _strip_text(value)
+
+
+def _strip_text(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: f"<redacted {key}>" if key in TEXT_KEYS else _strip_text(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_strip_text(item) for item in value]
+    return value
+
+
+def log_event_summary(event: dict, outcome: str, started: float, analysis: Any = None):
+    """Log one structured INFO line for a handled message event, without its text."""
+    logger.info(
+        "[SlackBot] event channel=%s user=%s ts=%s outcome=%s words=%s chars=%s duration_ms=%.2f",
+        event.get("channel"), event.get("user"), event.get("ts"), outcome,
+        analysis.words if analysis is not None else "-",
+        analysis.characters if analysis is not None else "-",
+        (time.perf_counter() - started) * 1000
+    )
+
+
+def configure_logging(
+    level: str = "INFO",
+    use_queue: bool = False,
+    payload_sample_rate: float = 0.01,
+    redact_text: bool = True,
+) -> Optional[QueueListener]:
+    """Set up the bot's log handling. Returns the QueueListener when ``use_queue`` is on.
+
+    Like ``basicConfig``, a stderr handler is only added to the root logger
+    if it has none (AWS Lambda installs its own). With ``use_queue`` the root
+    logger's handlers are moved behind a QueueListener.
+    """
+    global _redact, _listener, _queue_handler
+    _redact = redact_text
+    root = logging.getLogger()
+    if not root.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        root.addHandler(handler)
+        root.setLevel(level)
+    logger.setLevel(level)
+
+    for existing in [f for f in payload_logger.filters if isinstance(f, SamplingFilter)]:
+        payload_logger.removeFilter(existing)
+    payload_logger.addFilter(SamplingFilter(payload_sample_rate))
+
+    if use_queue and _listener is None:
+        handlers = [h for h in root.handlers if not isinstance(h, QueueHandler)]
+        for handler in handlers:
+            root.removeHandler(handler)
+        records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        _queue_handler = DeferredQueueHandler(records)
+        root.addHandler(_queue_handler)
+        _listener = QueueListener(records, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+    return _listener
+
+
+def stop_logging():
+    """Flush queued records, stop the listener thread and give the handlers back to the root logger."""
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    root = logging.getLogger()
+    root.removeHandler(_queue_handler)
+    _listener.stop()
+    for handler in _listener.handlers:
+        root.addHandler(handler)
+    _listener = _queue_handler = None
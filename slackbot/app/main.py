@@ -1,13 +1,25 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 import os
 import asyncio
 from dotenv import load_dotenv
 from .slack_bot import SlackWordCountBot
+from .logging_config import configure_logging, stop_logging
+from .metrics import CONTENT_TYPE, render_metrics
+from .supervisor import SocketModeSupervisor
 
 # Load environment variables
 load_dotenv()
 
+# One summary line per event; SLACK_LOG_QUEUE writes log records from a background thread
+log_settings = dict(
+    level=os.getenv("SLACK_LOG_LEVEL", "INFO"),
+    use_queue=bool(os.getenv("SLACK_LOG_QUEUE")),
+    payload_sample_rate=float(os.getenv("SLACK_LOG_PAYLOAD_SAMPLE", "0.01")),
+    redact_text=not os.getenv("SLACK_LOG_MESSAGE_TEXT")
+)
+configure_logging(**log_settings)
+
 app = FastAPI()
 
 # Disable CORS. Do not remove this for full-stack development.
@@ -27,13 +39,85 @@ if not slack_bot_token:
     raise ValueError("Missing required SLACK_BOT_TOKEN in .env file")
 
 # Initialize bot with both tokens if running in socket mode, otherwise just bot token
-slack_bot = SlackWordCountBot(slack_bot_token, slack_app_token if os.getenv("USE_SOCKET_MODE") else None)
+use_async_bot = bool(os.getenv("USE_ASYNC_BOT"))
+# Socket Mode allows several connections per app; each one gets its own worker process
+socket_connections = int(os.getenv("SLACK_SOCKET_CONNECTIONS", "1"))
+use_supervisor = bool(os.getenv("USE_SOCKET_MODE")) and socket_connections > 1 and not use_async_bot
+if use_supervisor:
+    slack_bot = SocketModeSupervisor(
+        slack_bot_token,
+        slack_app_token,
+        connections=socket_connections,
+        bot_kwargs=dict(
+            workers=int(os.getenv("SLACK_BOT_WORKERS", "4")),
+            max_queue_size=int(os.getenv("SLACK_BOT_QUEUE_SIZE", "100")),
+            profile_cache_size=int(os.getenv("SLACK_PROFILE_CACHE_SIZE", "1000")),
+            profile_cache_ttl=float(os.getenv("SLACK_PROFILE_CACHE_TTL", "3600")),
+            coalesce_replies=bool(os.getenv("SLACK_COALESCE_REPLIES")),
+            analyzer=os.getenv("SLACK_TEXT_ANALYZER", "slack")
+        ),
+        log_settings=log_settings
+    )
+elif use_async_bot:
+    # Imported only here: the async bot needs aiohttp, which the thread-based bot does not
+    from .async_slack_bot import AsyncSlackWordCountBot
+
+    # One event loop handles every event; no worker threads
+    slack_bot = AsyncSlackWordCountBot(
+        slack_bot_token,
+        slack_app_token if os.getenv("USE_SOCKET_MODE") else None,
+        max_concurrency=int(os.getenv("SLACK_BOT_MAX_CONCURRENCY", "100")),
+        max_queue_size=int(os.getenv("SLACK_BOT_QUEUE_SIZE", "100")),
+        profile_cache_size=int(os.getenv("SLACK_PROFILE_CACHE_SIZE", "1000")),
+        profile_cache_ttl=float(os.getenv("SLACK_PROFILE_CACHE_TTL", "3600")),
+        coalesce_replies=bool(os.getenv("SLACK_COALESCE_REPLIES")),
+        analyzer=os.getenv("SLACK_TEXT_ANALYZER", "slack")
+    )
+else:
+    slack_bot = SlackWordCountBot(
+        slack_bot_token,
+        slack_app_token if os.getenv("USE_SOCKET_MODE") else None,
+        workers=int(os.getenv("SLACK_BOT_WORKERS", "4")),
+        max_queue_size=int(os.getenv("SLACK_BOT_QUEUE_SIZE", "100")),
+        profile_cache_size=int(os.getenv("SLACK_PROFILE_CACHE_SIZE", "1000")),
+        profile_cache_ttl=float(os.getenv("SLACK_PROFILE_CACHE_TTL", "3600")),
+        coalesce_replies=bool(os.getenv("SLACK_COALESCE_REPLIES")),
+        analyzer=os.getenv("SLACK_TEXT_ANALYZER", "slack")
+    )
 
 @app.on_event("startup")
 async def startup_event():
     """Start the Slack bot when the FastAPI app starts."""
-    slack_bot.start()
+    warm_profile_cache = bool(os.getenv("SLACK_PROFILE_CACHE_WARM"))
+    if use_async_bot:
+        await slack_bot.start(warm_profile_cache=warm_profile_cache)
+    else:
+        slack_bot.start(warm_profile_cache=warm_profile_cache)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the Slack bot and drain queued events when the FastAPI app stops."""
+    if use_async_bot:
+        await slack_bot.stop()
+    else:
+        await asyncio.to_thread(slack_bot.stop)
+    stop_logging()
 
 @app.get("/healthz")
-async def healthz():
-    return {"status": "ok"}
+async def healthz(response: Response):
+    if not use_supervisor:
+        return {"status": "ok"}
+    health = slack_bot.health()
+    if health["status"] != "ok":
+        response.status_code = 503
+    return health
+
+@app.get("/stats")
+async def stats():
+    """Event handling and user profile cache statistics."""
+    return slack_bot.stats()
+
+@app.get("/metrics")
+async def metrics():
+    """Per-stage latency histograms, cache, Web API and in-flight metrics in Prometheus text format."""
+    return Response(render_metrics(slack_bot), media_type=CONTENT_TYPE)
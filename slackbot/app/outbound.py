@@ -0,0 +1,512 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import socket
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+from urllib.error import URLError
+from slack_sdk.errors import SlackApiError
+from .dispatcher import LatencyRecorder
+
+logger = logging.getLogger('SlackWordCountBot')
+
+# Separator placed between replies merged into one message
+COALESCE_SEPARATOR = "\n\n"
+
+
+class TokenBucket:
+    """Classic token bucket. ``reserve`` takes a token and says how long to wait before using it."""
+
+    def __init__(self, rate: float, burst: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._tokens = burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self) -> float:
+        """Seconds until a token is available, without taking one."""
+        with self._lock:
+            self._refill(self._clock())
+            return 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+
+    def reserve(self) -> float:
+        """Take a token (possibly borrowing from the future) and return the wait before using it."""
+        with self._lock:
+            self._refill(self._clock())
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def pause(self, seconds: float):
+        """Empty the bucket so no token is available for ``seconds`` (used for Retry-After)."""
+        with self._lock:
+            self._refill(self._clock())
+            self._tokens = min(self._tokens, 1 - seconds * self.rate)
+
+    def is_full(self) -> bool:
+        with self._lock:
+            self._refill(self._clock())
+            return self._tokens >= self.burst
+
+
+def retry_delay(error: Exception, attempt: int, base: float = 0.5, cap: float = 30.0) -> Tuple[float, bool]:
+    """Return (seconds to wait, was_rate_limited) before retrying a failed post."""
+    response = getattr(error, "response", None)
+    if isinstance(error, SlackApiError) and response is not None and response.status_code == 429:
+        retry_after = float(response.headers.get("Retry-After", response.headers.get("retry-after", 1)))
+        # Small jitter so throttled senders don't all come back on the same tick
+        return retry_after + random.uniform(0, 0.25), True
+    # Full jitter exponential backoff for other transient failures
+    return random.uniform(0, min(cap, base * (2 ** attempt))), False
+
+
+def is_retryable(error: Exception) -> bool:
+    """429s, 5xx and failures to connect are retried; anything else is not.
+
+    chat.postMessage is not idempotent: after a read timeout or a dropped
+    connection the message may already have been posted, so only errors raised
+    before the request went out are safe to retry.
+    """
+    if isinstance(error, SlackApiError):
+        response = getattr(error, "response", None)
+        status = getattr(response, "status_code", None)
+        return status == 429 or (status is not None and status >= 500)
+    # WebClient (urllib) wraps errors raised while connecting in URLError
+    if isinstance(error, URLError):
+        error = error.reason
+    if isinstance(error, (ConnectionRefusedError, socket.gaierror)):
+        return True
+    # AsyncWebClient: only check for aiohttp's connect error if aiohttp is already loaded
+    aiohttp = sys.modules.get("aiohttp")
+    return aiohttp is not None and isinstance(error, aiohttp.ClientConnectorError)
+
+
+class BucketTable:
+    """Per-channel token buckets that do not grow without bound.
+
+    A bucket that has refilled completely carries no state, so idle ones are
+    swept out whenever the table has doubled since the last sweep.
+    """
+
+    def __init__(self, rate: float, burst: float, min_sweep: int = 1024):
+        self.rate = rate
+        self.burst = burst
+        self.min_sweep = min_sweep
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._sweep_at = min_sweep
+
+    def get(self, channel: str, *active: Any) -> TokenBucket:
+        """Bucket for a channel. Channels in any of the ``active`` containers are never swept."""
+        bucket = self._buckets.get(channel)
+        if bucket is None:
+            if len(self._buckets) >= self._sweep_at:
+                idle = [c for c, b in self._buckets.items()
+                        if b.is_full() and not any(c in group for group in active)]
+                for c in idle:
+                    del self._buckets[c]
+                self._sweep_at = max(self.min_sweep, 2 * len(self._buckets))
+            bucket = self._buckets[channel] = TokenBucket(self.rate, self.burst)
+        return bucket
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+def take_batch(pending: Deque, coalesce: bool, coalesce_after: int, coalesce_max: int, max_text_length: int) -> List:
+    """Pop the next message, or several compatible ones merged, from a channel's pending queue.
+
+    Items are ``(enqueued_at, text, kwargs, future)``. Messages are only merged
+    once at least ``coalesce_after`` are waiting, share the same keyword
+    arguments and fit in ``max_text_length`` together.
+    """
+    batch = [pending.popleft()]
+    if not coalesce or len(pending) + 1 < coalesce_after:
+        return batch
+    length = len(batch[0][1])
+    while pending and len(batch) < coalesce_max:
+        candidate = pending[0]
+        if candidate[2] != batch[0][2]:
+            break
+        length += len(COALESCE_SEPARATOR) + len(candidate[1])
+        if length > max_text_length:
+            break
+        batch.append(pending.popleft())
+    return batch
+
+
+class OutboundScheduler:
+    """Rate-limited, order-preserving sender for chat.postMessage.
+
+    Each channel has its own token bucket (Slack allows about one message per
+    second per channel) and all channels share a global bucket. A small pool
+    of sender threads works through channels whose bucket has a token; a
+    channel is only ever handled by one sender at a time, so replies keep
+    their order. When ``coalesce`` is on and a channel falls behind, queued
+    replies are merged into a single message. At most ``max_pending``
+    replies wait at once; beyond that ``post`` blocks for up to
+    ``enqueue_timeout`` seconds (backpressure on the caller) and then fails.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        per_channel_rate: float = 1.0,
+        per_channel_burst: float = 1.0,
+        global_rate: float = 20.0,
+        global_burst: float = 20.0,
+        senders: int = 4,
+        max_retries: int = 3,
+        coalesce: bool = False,
+        coalesce_after: int = 3,
+        coalesce_max: int = 10,
+        max_text_length: int = 3900,
+        max_pending: int = 1000,
+        enqueue_timeout: float = 5.0,
+    ):
+        self.client = client
+        self.per_channel_rate = per_channel_rate
+        self.per_channel_burst = per_channel_burst
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self.senders = senders
+        self.max_pending = max_pending
+        self.enqueue_timeout = enqueue_timeout
+        self.max_retries = max_retries
+        self.coalesce = coalesce
+        self.coalesce_after = coalesce_after
+        self.coalesce_max = coalesce_max
+        self.max_text_length = max_text_length
+        self.latency = LatencyRecorder()
+        lock = threading.RLock()
+        self._cond = threading.Condition(lock)
+        # Signalled when replies leave the queue; kept apart from _cond so posters never take a sender's wakeup
+        self._space = threading.Condition(lock)
+        self._pending: Dict[str, Deque] = {}
+        self._buckets = BucketTable(per_channel_rate, per_channel_burst)
+        # (ready_at, seq, channel) for idle channels with pending messages
+        self._ready: List[Tuple[float, int, str]] = []
+        self._seq = itertools.count()
+        self._busy = set()
+        self._depth = 0
+        self._threads: List[threading.Thread] = []
+        self._running = False
+        self._counters = {
+            "enqueued": 0,
+            "sent": 0,
+            "coalesced": 0,
+            "throttled": 0,
+            "rate_limited": 0,
+            "retries": 0,
+            "failed": 0,
+            "dropped": 0,
+        }
+
+    def start(self):
+        """Start the sender threads (called automatically by the first post)."""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+            for i in range(self.senders):
+                thread = threading.Thread(target=self._sender, name=f"SlackBotSender-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def post(self, channel: str, text: str, **kwargs) -> Future:
+        """Queue a message. The returned future resolves to the chat.postMessage response."""
+        if not self._running:
+            self.start()
+        future: Future = Future()
+        with self._cond:
+            if self._depth >= self.max_pending:
+                deadline = time.monotonic() + self.enqueue_timeout
+                while self._depth >= self.max_pending and self._running:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._space.wait(remaining)
+            if self._depth >= self.max_pending:
+                self._counters["dropped"] += 1
+                future.set_exception(RuntimeError(f"Outbound queue full ({self.max_pending})"))
+                return future
+            pending = self._pending.get(channel)
+            if pending is None:
+                pending = self._pending[channel] = deque()
+            pending.append((time.monotonic(), text, kwargs, future))
+            self._depth += 1
+            self._counters["enqueued"] += 1
+            if len(pending) == 1 and channel not in self._busy:
+                self._schedule(channel)
+            self._cond.notify()
+        return future
+
+    def shutdown(self, drain: bool = True, timeout: Optional[float] = None):
+        """Stop the senders, by default after everything queued has been sent."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if drain:
+            with self._cond:
+                while self._pending and (deadline is None or time.monotonic() < deadline):
+                    self._cond.wait(0.05)
+        with self._cond:
+            self._running = False
+            for pending in self._pending.values():
+                for item in pending:
+                    item[3].set_exception(RuntimeError("Outbound scheduler shut down"))
+            self._pending.clear()
+            self._depth = 0
+            self._ready.clear()
+            self._cond.notify_all()
+            self._space.notify_all()
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        self._threads = []
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, throttle/retry counters and queue latency."""
+        with self._cond:
+            counters = dict(self._counters)
+            depth = self._depth
+            channels = len(self._pending)
+        return {
+            "queue_depth": depth,
+            "channels_pending": channels,
+            **counters,
+            "stages": self.latency.snapshot(),
+        }
+
+    def _bucket(self, channel: str) -> TokenBucket:
+        # Caller holds self._cond; channels being sent to or with queued replies keep their bucket
+        return self._buckets.get(channel, self._pending, self._busy)
+
+    def _schedule(self, channel: str):
+        # Caller holds self._cond
+        delay = self._bucket(channel).delay()
+        if delay > 0:
+            self._counters["throttled"] += 1
+        heapq.heappush(self._ready, (time.monotonic() + delay, next(self._seq), channel))
+
+    def _sender(self):
+        while True:
+            with self._cond:
+                channel = None
+                while self._running:
+                    if self._ready:
+                        wait = self._ready[0][0] - time.monotonic()
+                        if wait <= 0:
+                            channel = heapq.heappop(self._ready)[2]
+                            break
+                        self._cond.wait(wait)
+                    else:
+                        self._cond.wait()
+                if channel is None:
+                    return
+                self._busy.add(channel)
+                bucket = self._bucket(channel)
+                batch = take_batch(
+                    self._pending[channel],
+                    self.coalesce,
+                    self.coalesce_after,
+                    self.coalesce_max,
+                    self.max_text_length
+                )
+                self._depth -= len(batch)
+                self._space.notify(len(batch))
+            try:
+                self._send(channel, bucket, batch)
+            finally:
+                with self._cond:
+                    self._busy.discard(channel)
+                    if self._pending.get(channel):
+                        self._schedule(channel)
+                        self._cond.notify()
+                    else:
+                        self._pending.pop(channel, None)
+                        self._cond.notify_all()
+
+    def _send(self, channel: str, bucket: TokenBucket, batch: List):
+        now = time.monotonic()
+        for item in batch:
+            self.latency.record("outbound_queue", now - item[0])
+        text = COALESCE_SEPARATOR.join(item[1] for item in batch)
+        kwargs = batch[0][2]
+        bucket.reserve()
+        for attempt in range(self.max_retries + 1):
+            wait = self.global_bucket.reserve()
+            if wait > 0:
+                self._increment("throttled")
+                time.sleep(wait)
+            try:
+                with self.latency.time("chat_postMessage"):
+                    response = self.client.chat_postMessage(channel=channel, text=text, **kwargs)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    logger.error("[SlackBot] Giving up posting to %s: %s", channel, e)
+                    self._increment("failed", len(batch))
+                    for item in batch:
+                        item[3].set_exception(e)
+                    return
+                delay, rate_limited = retry_delay(e, attempt)
+                if rate_limited:
+                    self._increment("rate_limited")
+                    bucket.pause(delay)
+                self._increment("retries")
+                logger.warning("[SlackBot] Retrying post to %s in %.2fs: %s", channel, delay, e)
+                time.sleep(delay)
+                continue
+            self._increment("sent")
+            if len(batch) > 1:
+                self._increment("coalesced", len(batch))
+            for item in batch:
+                item[3].set_result(response)
+            return
+
+    def _increment(self, counter: str, amount: int = 1):
+        with self._cond:
+            self._counters[counter] += amount
+
+
+class AsyncOutboundScheduler:
+    """asyncio counterpart of OutboundScheduler for AsyncWebClient.
+
+    A per-channel lock keeps replies in order; whoever holds it sends the
+    head of that channel's queue, merging waiting replies when coalescing.
+    A channel's lock and bucket are dropped once no post for it is running.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        per_channel_rate: float = 1.0,
+        per_channel_burst: float = 1.0,
+        global_rate: float = 20.0,
+        global_burst: float = 20.0,
+        max_retries: int = 3,
+        coalesce: bool = False,
+        coalesce_after: int = 3,
+        coalesce_max: int = 10,
+        max_text_length: int = 3900,
+    ):
+        self.client = client
+        self.per_channel_rate = per_channel_rate
+        self.per_channel_burst = per_channel_burst
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self.max_retries = max_retries
+        self.coalesce = coalesce
+        self.coalesce_after = coalesce_after
+        self.coalesce_max = coalesce_max
+        self.max_text_length = max_text_length
+        self.latency = LatencyRecorder()
+        self._pending: Dict[str, Deque] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._buckets = BucketTable(per_channel_rate, per_channel_burst)
+        # Posts running per channel; the channel's state is dropped when this reaches zero
+        self._posters: Dict[str, int] = {}
+        self._closed = False
+        self._counters = {
+            "enqueued": 0,
+            "sent": 0,
+            "coalesced": 0,
+            "throttled": 0,
+            "rate_limited": 0,
+            "retries": 0,
+            "failed": 0,
+            "dropped": 0,
+        }
+
+    async def post(self, channel: str, text: str, **kwargs):
+        """Send a message once the rate limits allow; returns the chat.postMessage response."""
+        if self._closed:
+            self._counters["dropped"] += 1
+            raise RuntimeError("Outbound scheduler shut down")
+        future = asyncio.get_running_loop().create_future()
+        pending = self._pending.setdefault(channel, deque())
+        pending.append((time.monotonic(), text, kwargs, future))
+        self._counters["enqueued"] += 1
+        self._posters[channel] = self._posters.get(channel, 0) + 1
+        lock = self._locks.setdefault(channel, asyncio.Lock())
+        try:
+            async with lock:
+                while not future.done() and pending:
+                    batch = take_batch(pending, self.coalesce, self.coalesce_after, self.coalesce_max,
+                                       self.max_text_length)
+                    await self._send(channel, batch)
+        finally:
+            self._posters[channel] -= 1
+            if not self._posters[channel]:
+                # Nobody else is queued on this channel's lock, so its state can go
+                del self._posters[channel]
+                self._locks.pop(channel, None)
+                if not self._pending.get(channel):
+                    self._pending.pop(channel, None)
+        return await future
+
+    async def shutdown(self, drain: bool = True, timeout: Optional[float] = None):
+        """Refuse new posts and, by default, wait for queued ones; fail whatever is still queued after that."""
+        self._closed = True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if drain:
+            while self._posters and (deadline is None or time.monotonic() < deadline):
+                await asyncio.sleep(0.05)
+        for pending in self._pending.values():
+            for item in pending:
+                if not item[3].done():
+                    item[3].set_exception(RuntimeError("Outbound scheduler shut down"))
+            pending.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, throttle/retry counters and queue latency."""
+        return {
+            "queue_depth": sum(len(p) for p in self._pending.values()),
+            "channels_pending": len(self._pending),
+            **self._counters,
+            "stages": self.latency.snapshot(),
+        }
+
+    async def _send(self, channel: str, batch: List):
+        now = time.monotonic()
+        for item in batch:
+            self.latency.record("outbound_queue", now - item[0])
+        text = COALESCE_SEPARATOR.join(item[1] for item in batch)
+        kwargs = batch[0][2]
+        bucket = self._buckets.get(channel, self._posters)
+        wait = bucket.reserve()
+        for attempt in range(self.max_retries + 1):
+            wait = max(wait, self.global_bucket.reserve())
+            if wait > 0:
+                self._counters["throttled"] += 1
+                await asyncio.sleep(wait)
+            wait = 0.0
+            try:
+                with self.latency.time("chat_postMessage"):
+                    response = await self.client.chat_postMessage(channel=channel, text=text, **kwargs)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    logger.error("[SlackBot] Giving up posting to %s: %s", channel, e)
+                    self._counters["failed"] += len(batch)
+                    for item in batch:
+                        item[3].set_exception(e)
+                    return
+                delay, rate_limited = retry_delay(e, attempt)
+                if rate_limited:
+                    self._counters["rate_limited"] += 1
+                    bucket.pause(delay)
+                self._counters["retries"] += 1
+                logger.warning("[SlackBot] Retrying post to %s in %.2fs: %s", channel, delay, e)
+                await asyncio.sleep(delay)
+                continue
+            self._counters["sent"] += 1
+            if len(batch) > 1:
+                self._counters["coalesced"] += len(batch)
+            for item in batch:
+                item[3].set_result(response)
+            return
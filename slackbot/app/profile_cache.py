@@ -0,0 +1,235 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger('SlackWordCountBot')
+
+
+class _PendingFetch:
+    """A lookup in progress that other callers for the same user can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Optional[str] = None
+
+
+class UserProfileCache:
+    """Size-bounded LRU cache of display names with TTL expiry.
+
+    Failed lookups are cached as ``None`` for ``negative_ttl`` seconds so a
+    broken user ID does not hit the Web API on every message. Concurrent
+    misses for the same user share a single fetch.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str], Optional[str]],
+        max_size: int = 1000,
+        ttl: float = 3600.0,
+        negative_ttl: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.fetch = fetch
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        # user_id -> (display_name or None, expires_at)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._pending: Dict[str, _PendingFetch] = {}
+        self._counters = {
+            "hits": 0,
+            "negative_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "fetch_errors": 0,
+        }
+
+    def get(self, user: str) -> Optional[str]:
+        """Return the cached display name for a user, fetching it on a miss."""
+        with self._lock:
+            entry = self._entries.get(user)
+            if entry is not None:
+                if entry[1] > self._clock():
+                    self._entries.move_to_end(user)
+                    self._counters["hits" if entry[0] is not None else "negative_hits"] += 1
+                    return entry[0]
+                del self._entries[user]
+                self._counters["expirations"] += 1
+            pending = self._pending.get(user)
+            if pending is not None:
+                self._counters["coalesced"] += 1
+                leader = False
+            else:
+                pending = self._pending[user] = _PendingFetch()
+                self._counters["misses"] += 1
+                leader = True
+
+        if not leader:
+            pending.done.wait()
+            return pending.value
+
+        try:
+            try:
+                value = self.fetch(user)
+                ttl = self.ttl if value is not None else self.negative_ttl
+            except Exception as e:
+                logger.error("[SlackBot] Error fetching user info: %s", e)
+                value = None
+                ttl = self.negative_ttl
+                with self._lock:
+                    self._counters["fetch_errors"] += 1
+            with self._lock:
+                self._store(user, value, ttl)
+            pending.value = value
+        finally:
+            # Also on KeyboardInterrupt/SystemExit, so waiters and later lookups never hang
+            with self._lock:
+                self._pending.pop(user, None)
+            pending.done.set()
+        return value
+
+    def put(self, user: str, display_name: Optional[str]):
+        """Insert or replace a cache entry."""
+        ttl = self.ttl if display_name is not None else self.negative_ttl
+        with self._lock:
+            self._store(user, display_name, ttl)
+
+    def invalidate(self, user: str):
+        """Drop a single user from the cache."""
+        with self._lock:
+            self._entries.pop(user, None)
+
+    def clear(self):
+        """Drop every cached entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def warm(self, client: Any, page_size: int = 200) -> int:
+        """Pre-populate the cache from users.list. Returns the number of users loaded."""
+        loaded = 0
+        cursor = None
+        try:
+            while True:
+                response = client.users_list(limit=page_size, cursor=cursor)
+                for member in response.get("members", []):
+                    if member.get("deleted"):
+                        continue
+                    self.put(member["id"], display_name_from_user(member))
+                    loaded += 1
+                cursor = (response.get("response_metadata") or {}).get("next_cursor")
+                if not cursor:
+                    break
+        except Exception as e:
+            logger.error("[SlackBot] Error warming user profile cache: %s", e)
+        logger.info("[SlackBot] Warmed user profile cache with %s users", loaded)
+        return loaded
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters, current size and hit rate."""
+        with self._lock:
+            counters = dict(self._counters)
+            size = len(self._entries)
+        lookups = counters["hits"] + counters["negative_hits"] + counters["misses"] + counters["coalesced"]
+        return {
+            "size": size,
+            "max_size": self.max_size,
+            **counters,
+            "hit_rate": (counters["hits"] + counters["negative_hits"]) / lookups if lookups else 0.0,
+        }
+
+    def _store(self, user: str, value: Optional[str], ttl: float):
+        # Caller holds self._lock
+        self._entries[user] = (value, self._clock() + ttl)
+        self._entries.move_to_end(user)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+
+class AsyncUserProfileCache(UserProfileCache):
+    """UserProfileCache for an asyncio event loop.
+
+    ``fetch`` is a coroutine function, and concurrent misses for the same user
+    await one shared future instead of blocking a thread.
+    """
+
+    def __init__(self, fetch: Callable[[str], Awaitable[Optional[str]]], **kwargs):
+        super().__init__(fetch, **kwargs)
+        self._futures: Dict[str, "asyncio.Future[Optional[str]]"] = {}
+
+    async def get(self, user: str) -> Optional[str]:
+        """Return the cached display name for a user, fetching it on a miss."""
+        with self._lock:
+            entry = self._entries.get(user)
+            if entry is not None:
+                if entry[1] > self._clock():
+                    self._entries.move_to_end(user)
+                    self._counters["hits" if entry[0] is not None else "negative_hits"] += 1
+                    return entry[0]
+                del self._entries[user]
+                self._counters["expirations"] += 1
+            future = self._futures.get(user)
+            if future is not None:
+                self._counters["coalesced"] += 1
+            else:
+                self._counters["misses"] += 1
+
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = self._futures[user] = asyncio.get_running_loop().create_future()
+        try:
+            value = await self.fetch(user)
+            ttl = self.ttl if value is not None else self.negative_ttl
+        except Exception as e:
+            logger.error("[SlackBot] Error fetching user info: %s", e)
+            value = None
+            ttl = self.negative_ttl
+            with self._lock:
+                self._counters["fetch_errors"] += 1
+        except BaseException:
+            # Cancelled mid-fetch: waiters get no name, as for a failed lookup, but nothing is cached
+            # and only this caller sees the cancellation
+            self._futures.pop(user, None)
+            future.set_result(None)
+            raise
+
+        with self._lock:
+            self._store(user, value, ttl)
+        self._futures.pop(user, None)
+        future.set_result(value)
+        return value
+
+    async def warm(self, client: Any, page_size: int = 200) -> int:
+        """Pre-populate the cache from users.list. Returns the number of users loaded."""
+        loaded = 0
+        cursor = None
+        try:
+            while True:
+                response = await client.users_list(limit=page_size, cursor=cursor)
+                for member in response.get("members", []):
+                    if member.get("deleted"):
+                        continue
+                    self.put(member["id"], display_name_from_user(member))
+                    loaded += 1
+                cursor = (response.get("response_metadata") or {}).get("next_cursor")
+                if not cursor:
+                    break
+        except Exception as e:
+            logger.error("[SlackBot] Error warming user profile cache: %s", e)
+        logger.info("[SlackBot] Warmed user profile cache with %s users", loaded)
+        return loaded
+
+
+def display_name_from_user(user: Dict[str, Any]) -> str:
+    """Pick the display name from a users.info / users.list user object."""
+    return user["profile"].get("display_name") or user["name"]
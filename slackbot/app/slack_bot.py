@@ -1,24 +1,82 @@
-import asyncio
 import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Optional
 from slack_sdk import WebClient
-from slack_sdk.socket_mode import SocketModeClient
-from slack_sdk.socket_mode.response import SocketModeResponse
-from slack_sdk.socket_mode.request import SocketModeRequest
 from slack_sdk.errors import SlackApiError
+from .analysis import MessageAnalysis, get_analyzer
+from .dedup import EventDeduplicator
+from .dispatcher import EventDispatcher
+from .logging_config import Redacted, log_event_summary, payload_logger
+from .outbound import OutboundScheduler
+from .profile_cache import UserProfileCache, display_name_from_user
+
+if TYPE_CHECKING:
+    from slack_sdk.socket_mode import SocketModeClient
+    from slack_sdk.socket_mode.request import SocketModeRequest
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger('SlackWordCountBot')
 
+def format_message_analysis(event: dict, display_name: str, analysis: MessageAnalysis) -> str:
+    """Build the mrkdwn reply describing a message event."""
+    channel_type = "DM" if event.get("channel_type") == "im" else "Channel"
+    return (
+        f"*Message Analysis*\n"
+        f"• Word Count: {analysis.words}\n"
+        f"• Characters: {analysis.characters}\n"
+        f"• Mentions: {analysis.mentions} | Links: {analysis.links} | Emoji: {analysis.emoji} | Code Spans: {analysis.code_spans}\n"
+        f"• Original Text: {event.get('text')}\n"
+        f"• Sent By: {display_name} (ID: {event.get('user')})\n"
+        f"• Timestamp: {event.get('ts', 'N/A')}\n"
+        f"• Channel Type: {channel_type}\n"
+        f"• Channel/DM ID: {event.get('channel')}\n"
+        f"• Team ID: {event.get('team', 'N/A')}"
+    )
+
 class SlackWordCountBot:
-    def __init__(self, bot_token: str, app_token: str = None):
+    def __init__(
+        self,
+        bot_token: str,
+        app_token: str = None,
+        workers: int = 4,
+        max_queue_size: int = 100,
+        profile_cache_size: int = 1000,
+        profile_cache_ttl: float = 3600.0,
+        deduplicator: EventDeduplicator = None,
+        coalesce_replies: bool = False,
+        analyzer: str = "slack",
+        preserve_channel_order: bool = False
+    ):
         """Initialize the bot with bot token and optionally app token for socket mode."""
         logger.info("[SlackBot] Initializing bot with provided tokens")
         self.client = WebClient(token=bot_token)
+        self._bot_user_id_lock = threading.Lock()
+        # Socket Mode events are acked on the listener thread and handled by this pool
+        self.dispatcher = EventDispatcher(
+            self.handle_event,
+            workers=workers,
+            max_queue_size=max_queue_size,
+            # One worker per channel at a time, so replies in a channel keep their order
+            key=(lambda event: event.get("channel")) if preserve_channel_order else None
+        )
+        # Display names keyed by user ID, so repeat posters don't cost a users.info call
+        self.profile_cache = UserProfileCache(
+            self.fetch_display_name,
+            max_size=profile_cache_size,
+            ttl=profile_cache_ttl
+        )
+        # Socket Mode redelivers unacked envelopes; skip ones already handled
+        self.deduplicator = deduplicator or EventDeduplicator()
+        # All replies go through per-channel and global rate limits
+        self.outbound = OutboundScheduler(self.client, coalesce=coalesce_replies)
+        # Replies that failed after their event's handler returned (see _reply_done)
+        self.reply_failures = 0
+        self._reply_failures_lock = threading.Lock()
+        self.analyzer = get_analyzer(analyzer)
         if app_token:
+            # Imported here so the Lambda path never loads the Socket Mode client
+            from slack_sdk.socket_mode import SocketModeClient
             self.socket_client = SocketModeClient(
                 app_token=app_token,
                 web_client=self.client
@@ -27,181 +85,204 @@ class SlackWordCountBot:
             self.socket_client = None
         logger.info("[SlackBot] Initialization complete")
         
+    @property
+    def latency(self):
+        """Per-stage latency recorder shared by the dispatcher and the message handlers."""
+        return self.dispatcher.latency
+
     def count_words(self, text: str) -> int:
         """Count words in a message."""
-        return len(text.split())
+        return self.analyzer.analyze(text).words
     
     async def handle_message(self, channel: str, user: str, text: str):
         """Handle incoming message and respond with word count."""
-        logger.info(f"[SlackBot] Processing message: '{text[:50]}...' from user {user}")
+        payload_logger.debug("[SlackBot] Processing message %s from user %s", Redacted(text), user)
         word_count = self.count_words(text)
         try:
             response = f"Your message contains {word_count} words."
-            logger.info(f"[SlackBot] Sending response to channel {channel}")
+            logger.debug("[SlackBot] Sending response to channel %s", channel)
             await self.client.chat_postMessage(
                 channel=channel,
                 text=response,
                 thread_ts=None  # Will create a new message, not a thread
             )
-            logger.info("[SlackBot] Response sent successfully")
+            logger.debug("[SlackBot] Response sent successfully")
         except SlackApiError as e:
             error_msg = e.response['error']
-            logger.error(f"[SlackBot] Error sending message: {error_msg}")
+            logger.error("[SlackBot] Error sending message: %s", error_msg)
             raise  # Re-raise to allow proper error handling
             
-    def process_event(self, client: SocketModeClient, req: SocketModeRequest):
+    def process_event(self, client: "SocketModeClient", req: "SocketModeRequest"):
         """Process incoming Socket Mode events."""
-        logger.info(f"[SlackBot] Received event: {req.type}")
-        logger.debug(f"[SlackBot] Full event payload: {req.payload}")
+        from slack_sdk.socket_mode.response import SocketModeResponse
+        logger.debug("[SlackBot] Received event: %s", req.type)
+        payload_logger.debug("[SlackBot] Full event payload: %s", Redacted(req.payload))
         
         if req.type == "events_api":
             # Acknowledge the request
-            response = SocketModeResponse(envelope_id=req.envelope_id)
-            client.send_socket_mode_response(response)
-            logger.info("[SlackBot] Acknowledged event request")
-            
-            # Process the event
-            event = req.payload["event"]
-            logger.info(f"[SlackBot] Event type: {event.get('type')}")
-            
-            # Handle both regular messages and DM messages
-            if (event["type"] == "message" or event["type"] == "message.im") and "subtype" not in event:
-                channel = event.get("channel")
-                user = event.get("user")
-                text = event.get("text")
-                
-                # Log the full event type for debugging
-                logger.info(f"[SlackBot] Processing event type: {event['type']} in channel type: {event.get('channel_type', 'unknown')}")
-                
-                # Get bot's own user ID if we haven't stored it yet
-                if not hasattr(self, 'bot_user_id'):
-                    try:
-                        auth_response = self.client.auth_test()
-                        self.bot_user_id = auth_response["user_id"]
-                        logger.info(f"[SlackBot] Bot user ID: {self.bot_user_id}")
-                    except Exception as e:
-                        logger.error(f"[SlackBot] Error getting bot user ID: {str(e)}")
-                        self.bot_user_id = None
+            with self.latency.time("ack"):
+                response = SocketModeResponse(envelope_id=req.envelope_id)
+                client.send_socket_mode_response(response)
+            logger.debug("[SlackBot] Acknowledged event request")
+            self.accept(req.payload, req.retry_attempt)
 
-                # Ignore messages from the bot itself
-                if user == self.bot_user_id:
-                    logger.info("[SlackBot] Ignoring message from self")
-                    return
-                
-                if channel and user and text:
-                    logger.info(f"[SlackBot] Processing message: '{text}' from user {user} in channel {channel}")
-                    # Extract additional metadata
-                    event_ts = event.get("ts", "N/A")
-                    team_id = event.get("team", "N/A")
-                    channel_type = "DM" if event.get("channel_type") == "im" else "Channel"
-                    
-                    # Get user info for display name
-                    try:
-                        user_info = self.client.users_info(user=user)
-                        display_name = user_info["user"]["profile"].get("display_name") or user_info["user"]["name"]
-                    except Exception as e:
-                        logger.error(f"[SlackBot] Error fetching user info: {str(e)}")
-                        display_name = user
-                    
-                    # Format response with metadata
-                    word_count = self.count_words(text)
-                    response = (
-                        f"*Message Analysis*\n"
-                        f"• Word Count: {word_count}\n"
-                        f"• Original Text: {text}\n"
-                        f"• Sent By: {display_name} (ID: {user})\n"
-                        f"• Timestamp: {event_ts}\n"
-                        f"• Channel Type: {channel_type}\n"
-                        f"• Channel/DM ID: {channel}\n"
-                        f"• Team ID: {team_id}"
-                    )
-                    
-                    try:
-                        self.client.chat_postMessage(
-                            channel=channel,
-                            text=response,
-                            mrkdwn=True  # Enable Slack markdown formatting
-                        )
-                        logger.info(f"[SlackBot] Sent response with metadata: {response}")
-                    except Exception as e:
-                        logger.error(f"[SlackBot] Error sending response: {str(e)}")
-                else:
-                    logger.warning(f"[SlackBot] Incomplete message event received: channel={channel}, user={user}, has_text={bool(text)}")
-            else:
-                logger.info(f"[SlackBot] Skipping non-message event or message with subtype: {event.get('subtype', 'no subtype')}")
+    def accept(self, payload: dict, retry_attempt=None) -> bool:
+        """Queue an acknowledged Events API payload for the workers unless it is a duplicate.
+
+        The envelope is already acked, so Slack will not redeliver an event the
+        dispatcher rejects: it is dropped, logged and counted as ``rejected``.
+        Its dedup claim is kept, since releasing it could only let a stray
+        duplicate through.
+        """
+        if not self.deduplicator.claim(payload, retry_attempt):
+            return False
+        # Hand the event to the worker pool so the listener is free for the next one
+        if not self.dispatcher.submit(payload["event"]):
+            logger.warning("[SlackBot] Dropped acknowledged event %s in channel %s",
+                           EventDeduplicator.event_key(payload), payload["event"].get("channel"))
+            return False
+        return True
+
+    def handle_event(self, event: dict):
+        """Handle a single acknowledged Events API event on a dispatcher worker."""
+        logger.debug("[SlackBot] Event type: %s", event.get('type'))
+        
+        # Handle both regular messages and DM messages
+        if (event["type"] == "message" or event["type"] == "message.im") and "subtype" not in event:
+            # Log the full event type for debugging
+            logger.debug("[SlackBot] Processing event type: %s in channel type: %s", event['type'], event.get('channel_type', 'unknown'))
+            # Failures propagate to the dispatcher, which logs and counts them. The reply is
+            # finished by the outbound scheduler, so a rate-limited channel doesn't hold a worker
+            self.process_message_event(event, wait=False)
+        else:
+            logger.debug("[SlackBot] Skipping non-message event or message with subtype: %s", event.get('subtype', 'no subtype'))
                     
-    def start(self):
+    def start(self, warm_profile_cache: bool = False):
         """Start the Socket Mode client if configured for socket mode."""
+        if warm_profile_cache:
+            self.profile_cache.warm(self.client)
         if not self.socket_client:
             logger.info("[SlackBot] Not starting Socket Mode - running in Lambda mode")
             return
             
         logger.info("[SlackBot] Starting Socket Mode client...")
         try:
+            self.dispatcher.start()
             self.socket_client.socket_mode_request_listeners.append(self.process_event)
             logger.info("[SlackBot] Added event listener")
             self.socket_client.connect()
             logger.info("[SlackBot] Socket Mode connection initiated")
         except Exception as e:
-            logger.error(f"[SlackBot] Failed to start Socket Mode client: {str(e)}")
+            logger.error("[SlackBot] Failed to start Socket Mode client: %s", e)
             raise
+
+    def stop(self, drain: bool = True, timeout: float = 10.0):
+        """Close the Socket Mode connection and drain queued events."""
+        if self.socket_client:
+            logger.info("[SlackBot] Closing Socket Mode client...")
+            self.socket_client.close()
+        self.dispatcher.shutdown(drain=drain, timeout=timeout)
+        self.outbound.shutdown(drain=drain, timeout=timeout)
+
+    def stats(self) -> dict:
+        """Event dispatcher and user profile cache statistics."""
+        return {
+            **self.dispatcher.stats(),
+            # The dispatcher counts an event as completed once its reply is queued
+            "reply_failed": self.reply_failures,
+            "profile_cache": self.profile_cache.stats(),
+            "dedup": self.deduplicator.stats(),
+            "outbound": self.outbound.stats()
+        }
+
+    def get_bot_user_id(self):
+        """Return the bot's own user ID, calling auth.test once and caching the result."""
+        if not hasattr(self, 'bot_user_id'):
+            with self._bot_user_id_lock:
+                if not hasattr(self, 'bot_user_id'):
+                    try:
+                        with self.latency.time("auth_test"):
+                            auth_response = self.client.auth_test()
+                        self.bot_user_id = auth_response["user_id"]
+                        logger.info("[SlackBot] Bot user ID: %s", self.bot_user_id)
+                    except Exception as e:
+                        logger.error("[SlackBot] Error getting bot user ID: %s", e)
+                        self.bot_user_id = None
+        return self.bot_user_id
+
+    def fetch_display_name(self, user: str) -> str:
+        """Look up a user's display name with users.info (used on profile cache misses)."""
+        with self.latency.time("users_info"):
+            user_info = self.client.users_info(user=user)
+        return display_name_from_user(user_info["user"])
             
-    def process_message_event(self, event: dict):
-        """Process a single message event from Lambda."""
+    def process_message_event(self, event: dict, wait: bool = True) -> Optional[Future]:
+        """Process a single message event and queue its reply.
+
+        With ``wait`` (the Lambda path) this returns once the reply is sent and
+        raises if sending failed. Otherwise it returns the outbound future right
+        away; the outcome is logged and timed when the future completes.
+        """
+        started = time.perf_counter()
         channel = event.get("channel")
         user = event.get("user")
         text = event.get("text")
-        
-        # Get bot's own user ID if we haven't stored it yet
-        if not hasattr(self, 'bot_user_id'):
-            try:
-                auth_response = self.client.auth_test()
-                self.bot_user_id = auth_response["user_id"]
-                logger.info(f"[SlackBot] Bot user ID: {self.bot_user_id}")
-            except Exception as e:
-                logger.error(f"[SlackBot] Error getting bot user ID: {str(e)}")
-                self.bot_user_id = None
-
-        # Ignore messages from the bot itself
-        if user == self.bot_user_id:
-            logger.info("[SlackBot] Ignoring message from self")
-            return
-        
-        if channel and user and text:
-            logger.info(f"[SlackBot] Processing message: '{text}' from user {user} in channel {channel}")
-            # Extract additional metadata
-            event_ts = event.get("ts", "N/A")
-            team_id = event.get("team", "N/A")
-            channel_type = "DM" if event.get("channel_type") == "im" else "Channel"
-            
-            # Get user info for display name
-            try:
-                user_info = self.client.users_info(user=user)
-                display_name = user_info["user"]["profile"].get("display_name") or user_info["user"]["name"]
-            except Exception as e:
-                logger.error(f"[SlackBot] Error fetching user info: {str(e)}")
-                display_name = user
-            
+        outcome = "failed"
+        analysis = None
+        try:
+            # Ignore messages from the bot itself
+            with self.latency.time("self_check"):
+                from_self = user == self.get_bot_user_id()
+            if from_self:
+                outcome = "self"
+                return
+
+            if not (channel and user and text):
+                logger.warning("[SlackBot] Incomplete message event received: channel=%s, user=%s, has_text=%s",
+                               channel, user, bool(text))
+                outcome = "incomplete"
+                return
+
+            payload_logger.debug("[SlackBot] Processing message %s from user %s in channel %s",
+                                 Redacted(text), user, channel)
+            # Get user info for display name (falls back to the user ID if the lookup failed)
+            with self.latency.time("profile_lookup"):
+                display_name = self.profile_cache.get(user) or user
+
             # Format response with metadata
-            word_count = self.count_words(text)
-            response = (
-                f"*Message Analysis*\n"
-                f"• Word Count: {word_count}\n"
-                f"• Original Text: {text}\n"
-                f"• Sent By: {display_name} (ID: {user})\n"
-                f"• Timestamp: {event_ts}\n"
-                f"• Channel Type: {channel_type}\n"
-                f"• Channel/DM ID: {channel}\n"
-                f"• Team ID: {team_id}"
+            with self.latency.time("analysis"):
+                analysis = self.analyzer.analyze(text)
+            response = format_message_analysis(event, display_name, analysis)
+
+            posted = time.perf_counter()
+            future = self.outbound.post(
+                channel,
+                response,
+                mrkdwn=True  # Enable Slack markdown formatting
             )
-            
-            try:
-                self.client.chat_postMessage(
-                    channel=channel,
-                    text=response,
-                    mrkdwn=True  # Enable Slack markdown formatting
-                )
-                logger.info(f"[SlackBot] Sent response with metadata: {response}")
-            except Exception as e:
-                logger.error(f"[SlackBot] Error sending response: {str(e)}")
-                raise
+            # The summary line is logged by _reply_done once the send finishes
+            outcome = "queued"
+            future.add_done_callback(
+                lambda done: self._reply_done(done, event, response, started, posted, analysis)
+            )
+        finally:
+            if outcome != "queued":
+                log_event_summary(event, outcome, started, analysis)
+        if wait:
+            future.result()
+        return future
+
+    def _reply_done(self, future: Future, event: dict, response: str, started: float, posted: float,
+                    analysis: MessageAnalysis):
+        """Record the post latency and log the event's outcome when its reply is sent or given up on."""
+        self.latency.record("post", time.perf_counter() - posted)
+        error = future.exception()
+        if error is not None:
+            logger.error("[SlackBot] Error sending response: %s", error)
+            with self._reply_failures_lock:
+                self.reply_failures += 1
+            outcome = "failed"
+        else:
+            payload_logger.debug("[SlackBot] Sent response: %s", Redacted(response))
+            outcome = "replied"
+        log_event_summary(event, outcome, started, analysis)
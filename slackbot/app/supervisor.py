@@ -0,0 +1,468 @@
+"""Several Socket Mode connections served by a pool of worker processes.
+
+SocketModeSupervisor starts one worker process per connection. Each worker
+opens its own Socket Mode connection (Slack spreads an app's events across
+all of them) and owns one shard of channels. The worker that receives an
+event acks it and, through the supervisor, forwards it to the process that
+owns the event's channel, which deduplicates it and hands it to
+channel-ordered dispatcher workers. Slack's retries are therefore caught
+whichever connection they arrive on. Replies in a channel keep their order
+among events that arrive on one connection; events that arrive on different
+connections race each other, as they would with separate bots.
+
+Every worker talks only to the supervisor, over pipes created for that
+worker incarnation, so a crashed worker cannot wedge the others. The
+supervisor restarts workers that exit unexpectedly and merges the stats and
+latency histograms they report, so ``stats()``, ``/metrics`` and
+``/healthz`` cover the whole pool.
+"""
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import zlib
+from multiprocessing.connection import wait
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .dispatcher import LATENCY_BUCKETS
+from .slack_bot import SlackWordCountBot
+
+logger = logging.getLogger('SlackWordCountBot')
+
+
+class Mailbox:
+    """Sending end of a pipe, shared by the threads of the one process that writes to it.
+
+    Every pipe has exactly one writing and one reading process, and a
+    restarted worker gets new pipes. No lock is shared between processes, so
+    a worker that dies mid-write (holding the lock, or leaving half a frame
+    in the pipe) only breaks pipes that are then thrown away. ``put`` returns
+    False once the reader is gone.
+    """
+
+    def __init__(self, connection: Any):
+        self._connection = connection
+        self._lock = threading.Lock()
+
+    def put(self, item: Any) -> bool:
+        try:
+            with self._lock:
+                self._connection.send(item)
+        except (OSError, ValueError):
+            return False
+        return True
+
+    def close(self):
+        self._connection.close()
+
+
+def shard_for(channel: Optional[str], shards: int) -> int:
+    """Shard that owns a channel. Stable across processes, unlike hash()."""
+    if not channel or shards <= 1:
+        return 0
+    return zlib.crc32(channel.encode("utf-8")) % shards
+
+
+class ShardWorkerBot(SlackWordCountBot):
+    """SlackWordCountBot for one shard: hands events for other shards' channels to the supervisor.
+
+    ``alive`` holds one flag per shard, set while that shard's worker can take
+    events; events for a shard that is down are dropped (and counted) here
+    instead of being queued behind it.
+    """
+
+    def __init__(self, bot_token: str, app_token: Optional[str], shard: int, incarnation: int,
+                 outbox: Mailbox, alive: Sequence[int], **kwargs):
+        super().__init__(bot_token, app_token, preserve_channel_order=True, **kwargs)
+        self.shard = shard
+        self.incarnation = incarnation
+        self.outbox = outbox
+        self.alive = alive
+        self.forwarded = 0
+        self.forward_dropped = 0
+
+    def accept(self, payload: dict, retry_attempt=None) -> bool:
+        """Handle an event for this shard's channels; forward anything else to its owner."""
+        owner = shard_for((payload.get("event") or {}).get("channel"), len(self.alive))
+        if owner == self.shard:
+            return super().accept(payload, retry_attempt)
+        if not self.alive[owner] or not self.outbox.put(("event", owner, payload, retry_attempt)):
+            self.forward_dropped += 1
+            logger.warning("[SlackBot] Shard %s worker unavailable, dropping event", owner)
+            return False
+        self.forwarded += 1
+        return True
+
+    def read_inbox(self, inbox: Any, stop: threading.Event):
+        """Accept events forwarded by the supervisor until it sends None or goes away."""
+        while True:
+            try:
+                item = inbox.recv()
+            except (EOFError, OSError):
+                item = None
+            if item is None:
+                stop.set()
+                return
+            self.accept(*item)
+
+    def report(self) -> Dict[str, Any]:
+        """Stats and latency histograms sent to the supervisor."""
+        return {
+            "shard": self.shard,
+            "incarnation": self.incarnation,
+            "pid": os.getpid(),
+            "time": time.time(),
+            "stats": {**self.stats(), "forwarded": self.forwarded, "forward_dropped": self.forward_dropped},
+            "latency": self.latency.histograms(),
+            "outbound_latency": self.outbound.latency.histograms(),
+        }
+
+
+def _worker_main(
+    shard: int,
+    incarnation: int,
+    inbox: Any,
+    outbox: Any,
+    alive: Sequence[int],
+    bot_token: str,
+    app_token: Optional[str],
+    bot_factory: Callable[..., ShardWorkerBot],
+    bot_kwargs: Dict[str, Any],
+    log_settings: Dict[str, Any],
+    report_interval: float,
+    warm_profile_cache: bool,
+):
+    # Spawned processes start with default logging
+    from .logging_config import configure_logging
+    configure_logging(**log_settings)
+
+    outbox = Mailbox(outbox)
+    bot = bot_factory(bot_token, app_token, shard=shard, incarnation=incarnation, outbox=outbox, alive=alive,
+                      **bot_kwargs)
+    stop = threading.Event()
+    # Forwarded events may already be waiting, so the dispatcher has to run before the inbox is read
+    bot.dispatcher.start()
+    threading.Thread(target=bot.read_inbox, args=(inbox, stop), name="SlackBotInbox", daemon=True).start()
+    alive[shard] = 1
+    bot.start(warm_profile_cache=warm_profile_cache)
+    logger.info("[SlackBot] Shard %s worker running in process %s", shard, os.getpid())
+    while not stop.wait(report_interval):
+        outbox.put(("report", bot.report()))
+    alive[shard] = 0
+    bot.stop(drain=True)
+    outbox.put(("report", bot.report()))
+
+
+class _MergedLatency:
+    """LatencyRecorder look-alike over the histograms the workers last reported."""
+
+    buckets = LATENCY_BUCKETS
+
+    def __init__(self, supervisor: "SocketModeSupervisor", field: str):
+        self._supervisor = supervisor
+        self._field = field
+
+    def histograms(self) -> Dict[str, Tuple[List[int], int, float]]:
+        merged: Dict[str, Tuple[List[int], int, float]] = {}
+        for report in self._supervisor.reports_snapshot():
+            for stage, (cumulative, count, total) in report[self._field].items():
+                if stage in merged:
+                    previous = merged[stage]
+                    cumulative = [a + b for a, b in zip(previous[0], cumulative)]
+                    count += previous[1]
+                    total += previous[2]
+                merged[stage] = (list(cumulative), count, total)
+        return merged
+
+
+def merge_stats(items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine stats() dicts from several bots: counters and gauges add up, stage latency is pooled."""
+    merged: Dict[str, Any] = {}
+    for key in items[0] if items else ():
+        values = [item[key] for item in items if key in item]
+        if key == "stages":
+            merged[key] = _merge_stages(values)
+        elif all(isinstance(value, dict) for value in values):
+            merged[key] = merge_stats(values)
+        elif all(isinstance(value, bool) for value in values):
+            merged[key] = all(values)
+        elif all(isinstance(value, (int, float)) for value in values):
+            merged[key] = sum(values)
+    cache = merged.get("profile_cache")
+    if cache is not None:
+        lookups = cache["hits"] + cache["negative_hits"] + cache["misses"] + cache["coalesced"]
+        cache["hit_rate"] = (cache["hits"] + cache["negative_hits"]) / lookups if lookups else 0.0
+    return merged
+
+
+def _merge_stages(snapshots: List[Dict[str, Dict[str, float]]]) -> Dict[str, Dict[str, float]]:
+    merged: Dict[str, Dict[str, float]] = {}
+    for snapshot in snapshots:
+        for stage, stats in snapshot.items():
+            current = merged.get(stage)
+            if current is None:
+                merged[stage] = dict(stats)
+                continue
+            count = current["count"] + stats["count"]
+            current["avg_ms"] = ((current["avg_ms"] * current["count"] + stats["avg_ms"] * stats["count"]) / count
+                                 if count else 0.0)
+            current["count"] = count
+            current["max_ms"] = max(current["max_ms"], stats["max_ms"])
+            current["last_ms"] = stats["last_ms"]
+    return merged
+
+
+class SocketModeSupervisor:
+    """Runs ``connections`` ShardWorkerBot processes and keeps them alive.
+
+    Exposes the parts of the SlackWordCountBot interface main.py uses:
+    ``start``, ``stop``, ``stats`` and, for metrics.render_metrics,
+    ``latency`` and ``outbound.latency``.
+    """
+
+    def __init__(
+        self,
+        bot_token: str,
+        app_token: Optional[str],
+        connections: int = 2,
+        bot_kwargs: Optional[Dict[str, Any]] = None,
+        log_settings: Optional[Dict[str, Any]] = None,
+        report_interval: float = 2.0,
+        restart_delay: float = 1.0,
+        max_restart_delay: float = 60.0,
+        forward_queue_size: int = 1000,
+        bot_factory: Callable[..., ShardWorkerBot] = ShardWorkerBot,
+    ):
+        if connections < 1:
+            raise ValueError("connections must be at least 1")
+        self.bot_token = bot_token
+        self.app_token = app_token
+        self.connections = connections
+        self.bot_kwargs = bot_kwargs or {}
+        self.log_settings = log_settings or {}
+        self.report_interval = report_interval
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.bot_factory = bot_factory
+        self.latency = _MergedLatency(self, "latency")
+        self.outbound = SimpleNamespace(latency=_MergedLatency(self, "outbound_latency"))
+        # spawn: workers must not inherit the supervisor's threads and locks
+        self._context = multiprocessing.get_context("spawn")
+        # One flag per shard, written without a lock: set by a worker once it reads its inbox,
+        # cleared when it stops or the supervisor sees it exit
+        self._alive = self._context.RawArray("b", connections)
+        # Forwarded events waiting for each shard's sender thread, and the pipe it writes to
+        self._forward_queues = [queue.Queue(maxsize=forward_queue_size) for _ in range(connections)]
+        self._inboxes: List[Optional[Mailbox]] = [None] * connections
+        # Pipes read by the collector thread: connection -> (shard, incarnation)
+        self._outboxes: Dict[Any, Tuple[int, int]] = {}
+        self._processes: List[Optional[multiprocessing.Process]] = [None] * connections
+        self._incarnations = [0] * connections
+        self._started_at = [0.0] * connections
+        self._restarts = [0] * connections
+        self._forward_dropped = [0] * connections
+        self._next_restart = [0.0] * connections
+        self._delays = [restart_delay] * connections
+        self._last_reports: Dict[int, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._running = False
+        self._warm_profile_cache = False
+        self._threads: List[threading.Thread] = []
+
+    def start(self, warm_profile_cache: bool = False):
+        """Start one worker process per connection, plus the monitor, report and forwarding threads."""
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+        self._warm_profile_cache = warm_profile_cache
+        for shard in range(self.connections):
+            self._spawn(shard)
+        targets = [(self._monitor, (), "SlackBotSupervisor"), (self._collect, (), "SlackBotReports")]
+        targets += [(self._send_forwarded, (shard,), f"SlackBotForward-{shard}") for shard in range(self.connections)]
+        for target, args, name in targets:
+            thread = threading.Thread(target=target, args=args, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info("[SlackBot] Supervisor started %s Socket Mode workers", self.connections)
+
+    def stop(self, drain: bool = True, timeout: float = 10.0):
+        """Ask every worker to finish its queued events and exit; terminate any still running at the timeout."""
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+        deadline = time.monotonic() + timeout
+        # Queued behind any forwarded events, so the workers still get those
+        for forward_queue in self._forward_queues:
+            try:
+                forward_queue.put(None, timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Full:
+                pass
+        for shard, process in enumerate(self._processes):
+            if process is None:
+                continue
+            process.join(max(0.0, deadline - time.monotonic()) if drain else 0.1)
+            if process.is_alive():
+                logger.warning("[SlackBot] Terminating shard %s worker (pid %s)", shard, process.pid)
+                process.terminate()
+                process.join(1.0)
+            self._alive[shard] = 0
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()) + self.report_interval)
+        self._threads = []
+        with self._lock:
+            for mailbox in self._inboxes:
+                if mailbox is not None:
+                    mailbox.close()
+            for connection in self._outboxes:
+                connection.close()
+            self._outboxes.clear()
+        logger.info("[SlackBot] Supervisor stopped")
+
+    def reports_snapshot(self) -> List[Dict[str, Any]]:
+        """Latest report from each worker."""
+        with self._lock:
+            return [self._last_reports[shard] for shard in sorted(self._last_reports)]
+
+    def health(self) -> Dict[str, Any]:
+        """Per-worker liveness and report age; status is 'ok' only while every worker is alive."""
+        now = time.time()
+        with self._lock:
+            reports = dict(self._last_reports)
+            processes = list(self._processes)
+            restarts = list(self._restarts)
+            incarnations = list(self._incarnations)
+            dropped = list(self._forward_dropped)
+        shards = []
+        for shard, process in enumerate(processes):
+            report = reports.get(shard)
+            shards.append({
+                "shard": shard,
+                "pid": process.pid if process is not None else None,
+                "incarnation": incarnations[shard],
+                "alive": process is not None and process.is_alive(),
+                "restarts": restarts[shard],
+                "forward_dropped": dropped[shard],
+                "report_age_s": round(now - report["time"], 3) if report else None,
+            })
+        status = "ok" if self._running and all(worker["alive"] for worker in shards) else "degraded"
+        return {"status": status, "connections": self.connections, "shards": shards}
+
+    def stats(self) -> Dict[str, Any]:
+        """Stats summed over the workers' latest reports, plus per-worker health."""
+        reports = self.reports_snapshot()
+        return {
+            # in_flight is listed explicitly so it exists before the first report arrives
+            "in_flight": 0,
+            **merge_stats([report["stats"] for report in reports]),
+            **self.health(),
+        }
+
+    def _spawn(self, shard: int):
+        """Start a new incarnation of a shard's worker, with fresh pipes in both directions."""
+        inbox_reader, inbox_writer = self._context.Pipe(duplex=False)
+        outbox_reader, outbox_writer = self._context.Pipe(duplex=False)
+        with self._lock:
+            self._incarnations[shard] += 1
+            incarnation = self._incarnations[shard]
+            # The previous incarnation's counters restarted from zero with it
+            self._last_reports.pop(shard, None)
+        process = self._context.Process(
+            target=_worker_main,
+            args=(shard, incarnation, inbox_reader, outbox_writer, self._alive, self.bot_token, self.app_token,
+                  self.bot_factory, self.bot_kwargs, self.log_settings, self.report_interval,
+                  self._warm_profile_cache),
+            name=f"SlackBotShard-{shard}",
+            daemon=True
+        )
+        process.start()
+        # Only the worker holds its ends now, so its pipes report EOF/EPIPE once it dies
+        inbox_reader.close()
+        outbox_writer.close()
+        with self._lock:
+            previous = self._inboxes[shard]
+            self._inboxes[shard] = Mailbox(inbox_writer)
+            self._outboxes[outbox_reader] = (shard, incarnation)
+            self._processes[shard] = process
+            self._started_at[shard] = time.monotonic()
+        if previous is not None:
+            previous.close()
+
+    def _monitor(self):
+        while self._running:
+            time.sleep(0.5)
+            for shard, process in enumerate(self._processes):
+                if not self._running or process is None or process.is_alive():
+                    continue
+                now = time.monotonic()
+                if self._next_restart[shard] == 0.0:
+                    self._alive[shard] = 0
+                    # Back off exponentially while a worker keeps dying soon after starting
+                    if now - self._started_at[shard] > self.max_restart_delay:
+                        self._delays[shard] = self.restart_delay
+                    delay = self._delays[shard]
+                    self._delays[shard] = min(self.max_restart_delay, delay * 2)
+                    self._next_restart[shard] = now + delay
+                    logger.warning("[SlackBot] Shard %s worker exited with code %s, restarting in %.1fs",
+                                   shard, process.exitcode, delay)
+                elif now >= self._next_restart[shard]:
+                    self._next_restart[shard] = 0.0
+                    with self._lock:
+                        self._restarts[shard] += 1
+                    self._spawn(shard)
+
+    def _drop_forwarded(self, shard: int):
+        with self._lock:
+            self._forward_dropped[shard] += 1
+
+    def _forward(self, shard: int, payload: dict, retry_attempt: Any):
+        """Queue an event for its owner without blocking; dropped (and counted) while the owner is down or behind."""
+        if not self._alive[shard]:
+            self._drop_forwarded(shard)
+            return
+        try:
+            self._forward_queues[shard].put_nowait((payload, retry_attempt))
+        except queue.Full:
+            self._drop_forwarded(shard)
+
+    def _send_forwarded(self, shard: int):
+        """Write queued events into a shard's inbox, whichever incarnation currently owns it."""
+        forward_queue = self._forward_queues[shard]
+        while True:
+            item = forward_queue.get()
+            with self._lock:
+                inbox = self._inboxes[shard]
+            if (inbox is None or not inbox.put(item)) and item is not None:
+                self._drop_forwarded(shard)
+            if item is None:
+                return
+
+    def _collect(self):
+        """Read every worker's outbox: route forwarded events and keep the latest report per shard."""
+        while self._running or any(p is not None and p.is_alive() for p in self._processes):
+            with self._lock:
+                outboxes = list(self._outboxes)
+            if not outboxes:
+                time.sleep(0.5)
+                continue
+            for connection in wait(outboxes, timeout=0.5):
+                try:
+                    message = connection.recv()
+                except (EOFError, OSError):
+                    # The worker exited (possibly mid-frame); its incarnation's pipe is done
+                    with self._lock:
+                        self._outboxes.pop(connection, None)
+                    connection.close()
+                    continue
+                if message[0] == "event":
+                    self._forward(*message[1:])
+                    continue
+                report = message[1]
+                with self._lock:
+                    # A report from an incarnation that has since been replaced is stale
+                    if report["incarnation"] == self._incarnations[report["shard"]]:
+                        self._last_reports[report["shard"]] = report
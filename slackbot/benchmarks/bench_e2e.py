@@ -0,0 +1,254 @@
+"""End-to-end load test of the bot against a local mock Slack Web API.
+
+Modes:
+    lambda  signed Events API requests into lambda_handler from --concurrency threads
+    socket  Socket Mode envelopes replayed into SlackWordCountBot.process_event
+            on one listener thread, as SocketModeClient would deliver them
+    async   the same replay into AsyncSlackWordCountBot on one event loop
+
+Reports events/s, end-to-end latency (event sent until its reply reaches the
+mock chat.postMessage) as p50/p99, time spent per event in the entry point
+(lambda_handler or process_event), and Web API calls per event by method.
+The outbound rate limits are lifted unless --slack-limits is given, so the
+numbers measure the bot rather than Slack's posting quotas.
+
+Usage (from slackbot/):
+    python -m benchmarks.bench_e2e --mode socket --events 2000 --latency-ms 20
+    python -m benchmarks.bench_e2e --mode lambda --concurrency 16 --ratelimit-rate 0.05
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import os
+import statistics
+import threading
+import time
+from typing import Dict, List
+
+from .events import EventFactory, lambda_event, socket_mode_request
+from .mock_slack import MockSlackServer
+
+SIGNING_SECRET = "bench-signing-secret"
+UNLIMITED = dict(per_channel_rate=1e6, per_channel_burst=1e6, global_rate=1e6, global_burst=1e6)
+
+
+def percentiles_ms(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {"p50_ms": None, "p99_ms": None}
+    if len(samples) == 1:
+        p50 = p99 = samples[0]
+    else:
+        # "inclusive" interpolates between samples like numpy's default percentile
+        cuts = statistics.quantiles(samples, n=100, method="inclusive")
+        p50, p99 = cuts[49], cuts[98]
+    return {"p50_ms": round(p50 * 1000, 3), "p99_ms": round(p99 * 1000, 3)}
+
+
+class FakeSocketClient:
+    """Stands in for SocketModeClient: process_event only needs send_socket_mode_response."""
+
+    def __init__(self):
+        self.acks = 0
+
+    def send_socket_mode_response(self, response):
+        self.acks += 1
+
+
+class FakeAsyncSocketClient:
+    def __init__(self):
+        self.acks = 0
+
+    async def send_socket_mode_response(self, response):
+        self.acks += 1
+
+
+def pace(start: float, n: int, rate: float):
+    """Sleep until event n is due when replaying at `rate` events/s (0 = no pacing)."""
+    if rate > 0:
+        delay = start + n / rate - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def run_lambda(args, envelopes, sent: Dict[int, float], entry_times: List[float]):
+    os.environ["SLACK_SIGNING_SECRET"] = SIGNING_SECRET
+    os.environ.setdefault("SLACK_BOT_TOKEN", "xoxb-bench")
+    from app import lambda_handler as handler_module
+    from app.outbound import OutboundScheduler
+
+    bot = handler_module.get_bot()
+    bot.client.base_url = args.mock.url
+    if not args.slack_limits:
+        bot.outbound.shutdown(drain=False)
+        bot.outbound = OutboundScheduler(bot.client, **UNLIMITED)
+
+    requests = [lambda_event(envelope, SIGNING_SECRET) for envelope in envelopes]
+    lock = threading.Lock()
+    next_index = [0]
+    start = time.perf_counter()
+    failures = []
+
+    def invoke_loop():
+        while True:
+            with lock:
+                n = next_index[0]
+                if n >= len(requests):
+                    return
+                next_index[0] += 1
+            pace(start, n, args.rate)
+            began = time.perf_counter()
+            sent[n] = began
+            response = handler_module.lambda_handler(requests[n], None)
+            entry_times.append(time.perf_counter() - began)
+            if response["statusCode"] != 200:
+                failures.append(response["statusCode"])
+
+    # lambda_handler prints one metric line per invocation; keep them out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        threads = [threading.Thread(target=invoke_loop) for _ in range(args.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return {"non_200_responses": len(failures)}
+
+
+def run_socket(args, envelopes, sent: Dict[int, float], entry_times: List[float]):
+    from app.outbound import OutboundScheduler
+    from app.slack_bot import SlackWordCountBot
+
+    bot = SlackWordCountBot("xoxb-bench", workers=args.workers, max_queue_size=max(100, len(envelopes)))
+    bot.client.base_url = args.mock.url
+    if not args.slack_limits:
+        bot.outbound.shutdown(drain=False)
+        bot.outbound = OutboundScheduler(bot.client, **UNLIMITED)
+    bot.dispatcher.start()
+    socket_client = FakeSocketClient()
+
+    requests = [socket_mode_request(envelope) for envelope in envelopes]
+    start = time.perf_counter()
+    for n, request in enumerate(requests):
+        pace(start, n, args.rate)
+        began = time.perf_counter()
+        sent[n] = began
+        bot.process_event(socket_client, request)
+        entry_times.append(time.perf_counter() - began)
+    args.mock.wait_for_replies(range(len(envelopes)), args.timeout)
+    bot.stop(drain=True, timeout=args.timeout)
+    return {"acks": socket_client.acks, "dispatcher": {k: v for k, v in bot.stats().items() if k == "stages"}}
+
+
+def run_async(args, envelopes, sent: Dict[int, float], entry_times: List[float]):
+    from app.async_slack_bot import AsyncSlackWordCountBot
+    from app.outbound import AsyncOutboundScheduler
+
+    async def replay():
+        bot = AsyncSlackWordCountBot("xoxb-bench", max_concurrency=args.workers,
+                                     max_queue_size=max(100, len(envelopes)))
+        bot.client.base_url = args.mock.url
+        if not args.slack_limits:
+            bot.outbound = AsyncOutboundScheduler(bot.client, **UNLIMITED)
+        await bot.start()
+        socket_client = FakeAsyncSocketClient()
+        requests = [socket_mode_request(envelope) for envelope in envelopes]
+        start = time.perf_counter()
+        for n, request in enumerate(requests):
+            if args.rate > 0:
+                delay = start + n / args.rate - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            began = time.perf_counter()
+            sent[n] = began
+            await bot.process_event(socket_client, request)
+            entry_times.append(time.perf_counter() - began)
+        await bot.stop(timeout=args.timeout)
+        return {"acks": socket_client.acks}
+
+    return asyncio.run(replay())
+
+
+MODES = {"lambda": run_lambda, "socket": run_socket, "async": run_async}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="End-to-end bot benchmark against a mock Slack API")
+    parser.add_argument("--mode", choices=sorted(MODES), default="socket")
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--rate", type=float, default=0.0, help="Events per second to send (0 = as fast as possible)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent lambda_handler invocations")
+    parser.add_argument("--workers", type=int, default=8, help="Dispatcher workers / async concurrency")
+    parser.add_argument("--channels", type=int, default=50)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="Mock Web API latency per call")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls answered with HTTP 500")
+    parser.add_argument("--ratelimit-rate", type=float, default=0.0, help="Fraction of calls answered with 429")
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--slack-limits", action="store_true", help="Keep the production outbound rate limits")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for outstanding replies")
+    parser.add_argument("--log-level", default="WARNING", help="Level for the bot's logger")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger("SlackWordCountBot").setLevel(args.log_level)
+    # lambda_handler configures logging from the environment when imported
+    os.environ["SLACK_LOG_LEVEL"] = args.log_level
+
+    args.mock = MockSlackServer(
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.ratelimit_rate,
+        retry_after=args.retry_after,
+    ).start()
+    factory = EventFactory(channels=args.channels, users=args.users)
+    envelopes = [factory.envelope(n) for n in range(args.events)]
+    sent: Dict[int, float] = {}
+    entry_times: List[float] = []
+
+    try:
+        extra = MODES[args.mode](args, envelopes, sent, entry_times)
+        complete = args.mock.wait_for_replies(range(args.events), args.timeout)
+    finally:
+        args.mock.stop()
+
+    replies = args.mock.replies
+    latencies = [replies[n] - sent[n] for n in sent if n in replies]
+    first_sent = min(sent.values())
+    last_reply = max(replies.values()) if replies else time.perf_counter()
+    calls = dict(args.mock.calls)
+    report = {
+        "mode": args.mode,
+        "events": args.events,
+        "replied": len(replies),
+        "complete": complete,
+        "events_per_second": round(len(replies) / (last_reply - first_sent), 1) if replies else 0.0,
+        "end_to_end": percentiles_ms(latencies),
+        "entry_point": percentiles_ms(entry_times),
+        "api_calls_per_event": {method: round(count / args.events, 3) for method, count in sorted(calls.items())},
+        "api_calls_total_per_event": round(sum(calls.values()) / args.events, 3),
+        "rate_limited": dict(args.mock.rate_limited),
+        "server_errors": dict(args.mock.errors),
+        **extra,
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return report
+    print(f"mode={report['mode']} events={report['events']} replied={report['replied']} complete={report['complete']}")
+    print(f"  events/s            {report['events_per_second']}")
+    print(f"  end-to-end          p50 {report['end_to_end']['p50_ms']} ms   p99 {report['end_to_end']['p99_ms']} ms")
+    print(f"  entry point         p50 {report['entry_point']['p50_ms']} ms   p99 {report['entry_point']['p99_ms']} ms")
+    print(f"  API calls / event   {report['api_calls_total_per_event']}  {report['api_calls_per_event']}")
+    if report["rate_limited"] or report["server_errors"]:
+        print(f"  429s served         {report['rate_limited']}")
+        print(f"  500s served         {report['server_errors']}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Per-event logging cost of the bot's hot path.
+
+Every event is run through SlackWordCountBot.process_event and handle_event
+inline on one thread, with the Web API stubbed out (warm profile cache,
+replies resolved immediately), so the remaining difference between modes is
+logging. Log records go to a file in a temporary directory.
+
+Modes:
+    eager   the f-string INFO lines the handlers logged before the one-line
+            summaries (full text, full reply, payload), synchronous handler
+    off     bot logging at WARNING: the floor
+    sync    one lazy summary line per event, synchronous handler
+    queue   the same through configure_logging(use_queue=True)
+    debug   queue, at DEBUG with every payload record kept (sample rate 1)
+
+Reports microseconds per event on the handling thread (CPU and wall) and,
+for the queue modes, the time the listener needed to drain what was left.
+
+Usage (from slackbot/):
+    python -m benchmarks.bench_logging --events 20000
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import Future
+
+from .bench_e2e import FakeSocketClient
+from .events import EventFactory, socket_mode_request
+
+MODES = ("eager", "off", "sync", "queue", "debug")
+
+
+class InlineOutbound:
+    """Stands in for OutboundScheduler: every reply is 'sent' immediately."""
+
+    def post(self, channel, text, **kwargs):
+        future = Future()
+        future.set_result({"ok": True})
+        return future
+
+    def shutdown(self, drain=True, timeout=None):
+        pass
+
+
+def eager_event_logs(logger, req, response):
+    """The log calls one event used to cost: f-strings built whether or not the level is enabled."""
+    event = req.payload["event"]
+    text, user, channel = event["text"], event["user"], event["channel"]
+    logger.info(f"[SlackBot] Received event: {req.type}")
+    logger.debug(f"[SlackBot] Full event payload: {req.payload}")
+    logger.info("[SlackBot] Acknowledged event request")
+    logger.info(f"[SlackBot] Event type: {event.get('type')}")
+    logger.info(f"[SlackBot] Processing event type: {event['type']} in channel type: {event.get('channel_type', 'unknown')}")
+    logger.info(f"[SlackBot] Processing message: '{text}' from user {user} in channel {channel}")
+    logger.info(f"[SlackBot] Sent response with metadata: {response}")
+
+
+def reset_logging():
+    from app.logging_config import stop_logging
+
+    stop_logging()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+
+
+def run_mode(mode, requests, log_path):
+    from app.logging_config import LOG_FORMAT, configure_logging, stop_logging
+    from app.slack_bot import SlackWordCountBot, format_message_analysis
+
+    reset_logging()
+    handler = logging.FileHandler(log_path, mode="w")
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    logging.getLogger().addHandler(handler)
+    logging.getLogger().setLevel(logging.INFO)
+    level = {"off": "WARNING", "eager": "WARNING", "debug": "DEBUG"}.get(mode, "INFO")
+    configure_logging(level=level, use_queue=mode in ("queue", "debug"),
+                      payload_sample_rate=1.0 if mode == "debug" else 0.01)
+    bot_logger = logging.getLogger("SlackWordCountBot")
+    # The eager baseline logs its own lines at INFO while the bot's current lines stay quiet
+    eager_logger = logging.getLogger("SlackWordCountBot.eager")
+    eager_logger.setLevel(logging.INFO)
+
+    bot = SlackWordCountBot("xoxb-bench")
+    bot.bot_user_id = "UBENCHBOT"
+    bot.outbound = InlineOutbound()
+    # Run handlers inline so every record is logged from this thread
+    bot.dispatcher.submit = bot.handle_event
+    for req in requests:
+        bot.profile_cache.put(req.payload["event"]["user"], "bench-user")
+    socket_client = FakeSocketClient()
+    # The bot formats its reply anyway; only the log calls are extra in the eager baseline
+    replies = [format_message_analysis(req.payload["event"], "bench-user", bot.analyzer.analyze(req.payload["event"]["text"]))
+               for req in requests] if mode == "eager" else None
+
+    cpu_started = time.thread_time()
+    wall_started = time.perf_counter()
+    for n, req in enumerate(requests):
+        bot.process_event(socket_client, req)
+        if replies is not None:
+            eager_event_logs(eager_logger, req, replies[n])
+    cpu = time.thread_time() - cpu_started
+    wall = time.perf_counter() - wall_started
+    drain_started = time.perf_counter()
+    stop_logging()
+    drain = time.perf_counter() - drain_started
+    handler.flush()
+    n = len(requests)
+    result = {
+        "mode": mode,
+        "cpu_us_per_event": round(cpu / n * 1e6, 2),
+        "wall_us_per_event": round(wall / n * 1e6, 2),
+        "listener_drain_ms": round(drain * 1000, 1) if mode in ("queue", "debug") else None,
+        "log_bytes_per_event": round(os.path.getsize(log_path) / n, 1),
+    }
+    bot_logger.setLevel(logging.NOTSET)
+    reset_logging()
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-event logging overhead of the bot hot path")
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--modes", default=",".join(MODES), help="Comma-separated subset of " + ", ".join(MODES))
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args(argv)
+
+    factory = EventFactory()
+    requests = [socket_mode_request(factory.envelope(n)) for n in range(args.events)]
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in args.modes.split(","):
+            results.append(run_mode(mode, requests, os.path.join(tmp, f"{mode}.log")))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return results
+    print(f"{'mode':<8}{'cpu us/event':>14}{'wall us/event':>15}{'drain ms':>10}{'log B/event':>13}")
+    for r in results:
+        drain = "-" if r["listener_drain_ms"] is None else r["listener_drain_ms"]
+        print(f"{r['mode']:<8}{r['cpu_us_per_event']:>14}{r['wall_us_per_event']:>15}{drain:>10}{r['log_bytes_per_event']:>13}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
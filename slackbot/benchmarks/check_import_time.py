@@ -0,0 +1,105 @@
+"""Import-time budget for the Lambda entry point.
+
+Imports the module in fresh interpreters under ``python -X importtime`` and
+fails (exit status 1) when the best cumulative import time is over budget or
+when a module that should only be loaded on demand shows up, e.g. slack_sdk
+pulled in at import instead of by get_bot(). Run it in CI to catch import
+creep that would lengthen Lambda cold starts.
+
+Usage (from slackbot/):
+    python -m benchmarks.check_import_time
+    python -m benchmarks.check_import_time --budget-ms 40 --runs 10 --json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+DEFAULT_MODULE = "app.lambda_handler"
+# Loaded lazily by the Lambda path; importing the handler must not pull these in
+DEFAULT_FORBIDDEN = ("slack_sdk", "app.slack_bot", "app.async_slack_bot", "aiohttp", "websocket", "boto3")
+# slackbot/, where the ``app`` package is importable from whatever directory this is run in
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """Parse ``-X importtime`` output into (module, depth, self_us, cumulative_us) rows."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        module = name.strip()
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        rows.append((module, depth, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def measure(module: str) -> Tuple[int, List[Tuple[str, int, int, int]]]:
+    """Import module in a fresh interpreter; return its cumulative time (us) and every imported row."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=PROJECT_DIR
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    rows = parse_importtime(result.stderr)
+    total = next((cumulative for name, depth, _, cumulative in rows if name == module and depth == 0), None)
+    if total is None:
+        raise RuntimeError(f"{module} missing from -X importtime output (already imported by site?)")
+    return total, rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check a module's import time against a budget")
+    parser.add_argument("--module", default=DEFAULT_MODULE)
+    parser.add_argument("--budget-ms", type=float, default=60.0, help="Allowed cumulative import time")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to measure; the fastest counts")
+    parser.add_argument("--forbid", action="append", default=None,
+                        help="Module (or package prefix) that must not be imported; repeatable")
+    parser.add_argument("--top", type=int, default=10, help="Slowest modules (self time) to list")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+    forbidden = tuple(args.forbid) if args.forbid else DEFAULT_FORBIDDEN
+
+    # The first run also writes bytecode caches; measure after it
+    measure(args.module)
+    best_us, rows = min((measure(args.module) for _ in range(max(1, args.runs))), key=lambda item: item[0])
+
+    # Children are listed before their parent, so the module's own import is the block of rows
+    # after the previous top-level import, up to and including its line
+    end = next(i for i, row in enumerate(rows) if row[0] == args.module and row[1] == 0)
+    start = max((i for i in range(end) if rows[i][1] == 0), default=-1) + 1
+    imported = rows[start:end + 1]
+    names = {name for name, _, _, _ in imported}
+    found = [f for f in forbidden if any(name == f or name.startswith(f + ".") for name in names)]
+    slowest: Dict[str, float] = {
+        name: round(self_us / 1000, 3)
+        for name, _, self_us, _ in sorted(imported, key=lambda row: row[2], reverse=True)[:args.top]
+    }
+    report = {
+        "module": args.module,
+        "import_ms": round(best_us / 1000, 3),
+        "budget_ms": args.budget_ms,
+        "modules_imported": len(imported),
+        "forbidden_imported": found,
+        "slowest_self_ms": slowest,
+        "ok": best_us / 1000 <= args.budget_ms and not found,
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        status = "OK" if report["ok"] else "FAIL"
+        print(f"{status}: import {args.module} took {report['import_ms']} ms "
+              f"(budget {args.budget_ms} ms, best of {args.runs}, {len(imported)} modules)")
+        if found:
+            print(f"  imported modules that should load on demand: {', '.join(found)}")
+        print("  slowest (self ms): " + ", ".join(f"{name} {ms}" for name, ms in slowest.items()))
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""Synthetic Slack events for the benchmarks.
+
+EventFactory builds Events API envelopes for plain channel messages spread
+over a set of channels and users. Every message text starts with a
+``bench-<n>`` marker so the mock server can match replies to events. The
+helpers wrap an envelope as a signed API Gateway request for lambda_handler
+or as a Socket Mode request for process_event.
+"""
+import hashlib
+import hmac
+import json
+import random
+import time
+from typing import Any, Dict, Optional
+
+from slack_sdk.socket_mode.request import SocketModeRequest
+
+WORDS = ("deploy", "review", "the", "build", "is", "green", "again", "please", "check", "logs",
+         "tomorrow", "latency", "looks", "fine", "ship", "it")
+
+
+class EventFactory:
+    def __init__(self, channels: int = 50, users: int = 200, words: int = 12, seed: int = 0):
+        self.channels = [f"C{i:08d}" for i in range(channels)]
+        self.users = [f"U{i:06d}" for i in range(users)]
+        self.words = words
+        self._random = random.Random(seed)
+
+    def text(self, n: int) -> str:
+        rnd = self._random
+        tokens = [f"bench-{n}"] + [rnd.choice(WORDS) for _ in range(self.words)]
+        # Some Slack markup so the analyzer's entity paths are exercised too
+        if n % 3 == 0:
+            tokens.insert(rnd.randrange(1, len(tokens)), f"<@{rnd.choice(self.users)}>")
+        if n % 4 == 0:
+            tokens.append(":rocket:")
+        if n % 5 == 0:
+            tokens.append("<https://example.com/build|build log>")
+        return " ".join(tokens)
+
+    def envelope(self, n: int) -> Dict[str, Any]:
+        """Events API envelope for message number n."""
+        now = time.time()
+        channel = self._random.choice(self.channels)
+        return {
+            "token": "bench",
+            "team_id": "TBENCH",
+            "api_app_id": "ABENCH",
+            "type": "event_callback",
+            "event_id": f"Ev{n:010d}",
+            "event_time": int(now),
+            "event": {
+                "type": "message",
+                "channel": channel,
+                "channel_type": "channel",
+                "user": self._random.choice(self.users),
+                "text": self.text(n),
+                "ts": f"{now:.6f}",
+                "team": "TBENCH",
+            },
+        }
+
+
+def sign(body: str, signing_secret: str, timestamp: Optional[int] = None) -> Dict[str, str]:
+    """Slack request signing headers (v0 HMAC-SHA256) for a raw body."""
+    timestamp = str(int(time.time()) if timestamp is None else timestamp)
+    signature = hmac.new(signing_secret.encode("utf-8"), f"v0:{timestamp}:{body}".encode("utf-8"),
+                         hashlib.sha256).hexdigest()
+    return {"x-slack-request-timestamp": timestamp, "x-slack-signature": f"v0={signature}"}
+
+
+def lambda_event(envelope: Dict[str, Any], signing_secret: str, retry_num: Optional[int] = None) -> Dict[str, Any]:
+    """API Gateway proxy event carrying a signed Events API request."""
+    body = json.dumps(envelope)
+    headers = {"content-type": "application/json", **sign(body, signing_secret)}
+    if retry_num is not None:
+        headers["x-slack-retry-num"] = str(retry_num)
+        headers["x-slack-retry-reason"] = "http_timeout"
+    return {"headers": headers, "body": body}
+
+
+def socket_mode_request(envelope: Dict[str, Any], retry_attempt: Optional[int] = None) -> SocketModeRequest:
+    """Socket Mode events_api request wrapping an envelope."""
+    return SocketModeRequest(
+        type="events_api",
+        envelope_id=f"env-{envelope['event_id']}",
+        payload=envelope,
+        retry_attempt=retry_attempt,
+    )
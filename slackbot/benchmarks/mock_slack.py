@@ -0,0 +1,147 @@
+"""Local stand-in for the Slack Web API used by the benchmarks.
+
+Answers auth.test, users.info, users.list and chat.postMessage from a
+threaded HTTP server, with configurable latency, error and rate-limit rates.
+Point a WebClient at it with ``base_url=server.url``. Every call is counted
+per method, and each chat.postMessage records when the reply for every
+``bench-<n>`` marker in its text arrived, which gives end-to-end latency.
+"""
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+MARKER_RE = re.compile(r"bench-(\d+)")
+
+
+class MockSlackServer:
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: int = 1,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.calls: Counter = Counter()
+        self.rate_limited: Counter = Counter()
+        self.errors: Counter = Counter()
+        # Marker number -> perf_counter() time its reply was received
+        self.replies: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._reply_event = threading.Condition(self._lock)
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api/"
+
+    def start(self) -> "MockSlackServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="MockSlack", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset(self):
+        with self._lock:
+            self.calls.clear()
+            self.rate_limited.clear()
+            self.errors.clear()
+            self.replies.clear()
+
+    def wait_for_replies(self, markers, timeout: float) -> bool:
+        """Block until a reply has been posted for every marker, or the timeout passes."""
+        markers = set(markers)
+        deadline = time.monotonic() + timeout
+        with self._reply_event:
+            while not markers.issubset(self.replies):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._reply_event.wait(remaining)
+        return True
+
+    def respond(self, method: str, params: Dict[str, str]):
+        """Return (status, headers, body) for one API call."""
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            time.sleep(delay)
+        with self._lock:
+            self.calls[method] += 1
+            if self.rate_limit_rate and random.random() < self.rate_limit_rate:
+                self.rate_limited[method] += 1
+                return 429, {"Retry-After": str(self.retry_after)}, {"ok": False, "error": "ratelimited"}
+            if self.error_rate and random.random() < self.error_rate:
+                self.errors[method] += 1
+                return 500, {}, {"ok": False, "error": "internal_error"}
+
+        if method == "auth.test":
+            return 200, {}, {"ok": True, "user_id": "UBENCHBOT", "bot_id": "BBENCH", "team_id": "TBENCH"}
+        if method == "users.info":
+            user = params.get("user", "U0")
+            return 200, {}, {"ok": True, "user": self._user(user)}
+        if method == "users.list":
+            members = [self._user(f"U{i:06d}") for i in range(int(params.get("limit", 200)))]
+            return 200, {}, {"ok": True, "members": members, "response_metadata": {"next_cursor": ""}}
+        if method == "chat.postMessage":
+            received = time.perf_counter()
+            with self._reply_event:
+                for marker in MARKER_RE.findall(params.get("text", "")):
+                    self.replies.setdefault(int(marker), received)
+                self._reply_event.notify_all()
+            return 200, {}, {"ok": True, "channel": params.get("channel"), "ts": f"{time.time():.6f}"}
+        return 200, {}, {"ok": False, "error": "unknown_method"}
+
+    @staticmethod
+    def _user(user_id: str) -> dict:
+        return {"id": user_id, "name": user_id.lower(), "profile": {"display_name": f"user-{user_id}"}}
+
+    def _handler_class(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length).decode("utf-8") if length else ""
+                if self.headers.get("Content-Type", "").startswith("application/json"):
+                    params = json.loads(raw or "{}")
+                else:
+                    params = {key: values[0] for key, values in parse_qs(raw).items()}
+                # AsyncWebClient sends some methods (users.info) as GET with a query string
+                url = urlsplit(self.path)
+                params.update({key: values[0] for key, values in parse_qs(url.query).items()})
+                method = url.path.rsplit("/", 1)[-1]
+                status, headers, body = mock.respond(method, params)
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,16 @@
+import pytest
+
+
+class FakeClock:
+    """Monotonic clock stand-in; tests move time by assigning ``now``."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
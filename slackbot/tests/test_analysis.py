@@ -0,0 +1,65 @@
+import pytest
+
+from app.analysis import (
+    MessageAnalysis,
+    SlackMarkupAnalyzer,
+    TextAnalyzer,
+    WhitespaceAnalyzer,
+    count_words,
+    get_analyzer,
+)
+
+
+@pytest.mark.parametrize("text", [
+    "", "   ", "one", "a b c", "  padded  words ", "tabs\tand\nnewlines", "double  space", "nbsp here",
+])
+def test_count_words_matches_split(text):
+    assert count_words(text) == len(text.split())
+
+
+@pytest.mark.parametrize("text, words", [
+    ("don`t stop", 2),
+    ("```foo bar", 2),
+    ("word`", 1),
+    ("`word", 1),
+    ("x<y", 1),
+    ("< ` alone", 1),
+    ("plain words only", 3),
+    ("<@U123>, thanks!", 1),
+    ("(<https://example.com>) :wave:!", 0),
+    ("before - after", 2),
+    ("!!`abc", 1),
+    ("it's 3:30, ok?", 3),
+])
+def test_stray_markup_and_punctuation_are_not_words(text, words):
+    assert SlackMarkupAnalyzer().analyze(text).words == words
+
+
+def test_entities_are_counted_separately():
+    text = "hi <@U123> and <#C1|general>, see <https://example.com|docs> :wave: `x = 1` ```a\nb```"
+    assert SlackMarkupAnalyzer().analyze(text) == MessageAnalysis(
+        words=3, characters=len(text), mentions=2, links=1, emoji=1, code_spans=2,
+    )
+
+
+def test_whitespace_analyzer_counts_every_token():
+    assert WhitespaceAnalyzer().analyze("hi <@U123> :wave:") == MessageAnalysis(words=3, characters=17)
+
+
+def test_batch_and_aggregate_agree():
+    analyzer = get_analyzer()
+    texts = ["one two", "<@U1> three", ":x: four five six"]
+    results = analyzer.analyze_batch(texts)
+    assert [r.words for r in results] == [2, 1, 3]
+    assert analyzer.aggregate(texts) == sum(results, MessageAnalysis())
+
+
+def test_get_analyzer():
+    assert isinstance(get_analyzer("whitespace"), WhitespaceAnalyzer)
+    with pytest.raises(ValueError):
+        get_analyzer("nope")
+
+
+def test_text_analyzer_is_abstract():
+    with pytest.raises(TypeError):
+        TextAnalyzer()
@@ -0,0 +1,32 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.async_slack_bot import AsyncSlackWordCountBot
+
+
+class FakeSocketClient:
+    def __init__(self):
+        self.acks = 0
+
+    async def send_socket_mode_response(self, response):
+        self.acks += 1
+
+
+def request(n):
+    return SimpleNamespace(type="events_api", envelope_id=f"env{n}", retry_attempt=None,
+                           payload={"event_id": f"Ev{n}", "event": {"type": "message", "channel": "C1"}})
+
+
+def test_rejected_event_is_acked_counted_and_keeps_its_dedup_claim():
+    async def main():
+        bot = AsyncSlackWordCountBot("xoxb-test", max_concurrency=0, max_queue_size=0)
+        client = FakeSocketClient()
+        await bot.process_event(client, request(1))
+        await bot.process_event(client, request(1))
+        return bot, client
+
+    bot, client = asyncio.run(main())
+    assert client.acks == 2
+    stats = bot.stats()
+    assert stats["rejected"] == 1
+    assert stats["dedup"]["suppressed"] == 1
@@ -0,0 +1,124 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from slack_sdk.errors import SlackApiError
+
+from app.analysis import MessageAnalysis
+from app.backfill import BackfillCheckpoint, ChannelBackfill
+
+
+def message(ts, text, **fields):
+    return {"ts": ts, "user": "U1", "text": text, **fields}
+
+
+class FakeHistoryClient:
+    """Serves fixed pages of channel history and thread replies, cursor by cursor."""
+
+    def __init__(self, history, replies=None, fail_first=None):
+        self.history = history
+        self.replies = replies or {}
+        self.fail_first = fail_first
+        self.calls = []
+
+    @staticmethod
+    def _page(pages, cursor):
+        index = int(cursor) if cursor else 0
+        next_cursor = str(index + 1) if index + 1 < len(pages) else ""
+        return {"messages": pages[index], "response_metadata": {"next_cursor": next_cursor}}
+
+    def auth_test(self):
+        self.calls.append(("auth_test", None))
+        return {"user_id": "UBOT"}
+
+    def conversations_history(self, channel, limit, cursor=None, **kwargs):
+        self.calls.append(("conversations_history", cursor))
+        if self.fail_first is not None:
+            error, self.fail_first = self.fail_first, None
+            raise error
+        return self._page(self.history[channel], cursor)
+
+    def conversations_replies(self, channel, ts, limit, cursor=None):
+        self.calls.append(("conversations_replies", cursor))
+        return self._page(self.replies[ts], cursor)
+
+
+def make_backfill(client, tmp_path, **kwargs):
+    checkpoint = BackfillCheckpoint(str(tmp_path / "backfill.json"))
+    return ChannelBackfill(client, checkpoint, requests_per_second=1000, sleep=lambda s: None, **kwargs)
+
+
+def test_pages_are_summed_and_checkpointed(tmp_path):
+    client = FakeHistoryClient({"C1": [
+        [message("1.0", "one two"), message("2.0", "three")],
+        [message("3.0", "four five six")],
+    ]})
+    results = make_backfill(client, tmp_path).run(["C1"])
+
+    assert results["C1"]["done"] is True
+    assert results["C1"]["messages"] == 3
+    assert results["C1"]["totals"]["words"] == 6
+    assert [cursor for method, cursor in client.calls if method == "conversations_history"] == [None, "1"]
+    with open(tmp_path / "backfill.json") as f:
+        assert json.load(f)["channels"]["C1"]["totals"]["words"] == 6
+
+
+def test_interrupted_run_resumes_from_the_stored_cursor(tmp_path):
+    pages = [[message("1.0", "one two")], [message("2.0", "three")]]
+    # State left behind by a run stopped after the first page
+    BackfillCheckpoint(str(tmp_path / "backfill.json")).update("C1", "1", 1, MessageAnalysis(words=2), done=False)
+
+    client = FakeHistoryClient({"C1": pages})
+    results = make_backfill(client, tmp_path).run(["C1"])
+
+    assert [cursor for method, cursor in client.calls if method == "conversations_history"] == ["1"]
+    assert (results["C1"]["messages"], results["C1"]["totals"]["words"]) == (2, 3)
+    # A finished channel is not fetched again
+    client.calls.clear()
+    make_backfill(client, tmp_path).run(["C1"])
+    assert [method for method, _ in client.calls] == ["auth_test"]
+
+
+@pytest.mark.parametrize("include_replies, messages, words", [(False, 1, 1), (True, 4, 6)])
+def test_thread_replies_exclude_the_parent(tmp_path, include_replies, messages, words):
+    parent = message("1.0", "parent", thread_ts="1.0", reply_count=3)
+    client = FakeHistoryClient(
+        {"C1": [[parent]]},
+        replies={"1.0": [[parent, message("1.1", "first reply")], [message("1.2", "second reply"),
+                                                                    message("1.3", "third")]]},
+    )
+    results = make_backfill(client, tmp_path, include_replies=include_replies).run(["C1"])
+    assert (results["C1"]["messages"], results["C1"]["totals"]["words"]) == (messages, words)
+
+
+def test_bot_and_non_user_messages_are_skipped(tmp_path):
+    parent = message("1.0", "counted", thread_ts="1.0", reply_count=2)
+    client = FakeHistoryClient(
+        {"C1": [[
+            parent,
+            message("2.0", "joined", subtype="channel_join"),
+            message("3.0", "integration post", bot_id="B1"),
+            message("4.0", ""),
+            message("5.0", "own reply without subtype", user="UBOT"),
+        ]]},
+        replies={"1.0": [[parent, message("1.1", "also counted"),
+                          message("1.2", "word count reply", user="UBOT", bot_id="B9")]]},
+    )
+    results = make_backfill(client, tmp_path, include_replies=True).run(["C1"])
+    assert (results["C1"]["messages"], results["C1"]["totals"]["words"]) == (2, 3)
+
+
+def test_explicit_bot_user_id_skips_auth_test(tmp_path):
+    client = FakeHistoryClient({"C1": [[message("1.0", "mine", user="UOTHER"), message("2.0", "yours")]]})
+    results = make_backfill(client, tmp_path, bot_user_id="UOTHER").run(["C1"])
+    assert results["C1"]["messages"] == 1
+    assert "auth_test" not in [method for method, _ in client.calls]
+
+
+def test_rate_limited_page_is_retried(tmp_path):
+    error = SlackApiError("ratelimited", SimpleNamespace(status_code=429, headers={"Retry-After": "0"},
+                                                         data={"error": "ratelimited"}))
+    client = FakeHistoryClient({"C1": [[message("1.0", "after retry")]]}, fail_first=error)
+    results = make_backfill(client, tmp_path).run(["C1"])
+    assert results["C1"]["done"] is True
+    assert results["C1"]["totals"]["words"] == 2
@@ -0,0 +1,69 @@
+import time
+
+from app.dedup import EventDeduplicator, InMemoryDedupStore, SQLiteDedupStore
+
+
+def envelope(event_id="Ev1", **event):
+    return {"event_id": event_id, "event": {"type": "message", "channel": "C1", "ts": "1.0", **event}}
+
+
+def test_event_key_fallbacks():
+    assert EventDeduplicator.event_key(envelope("Ev9")) == "Ev9"
+    assert EventDeduplicator.event_key({"event": {"client_msg_id": "abc"}}) == "msg:abc"
+    assert EventDeduplicator.event_key({"channel": "C1", "ts": "2.0"}) == "ts:C1:2.0"
+    assert EventDeduplicator.event_key({"event": {"type": "message"}}) is None
+
+
+def test_in_memory_store_claim_ttl_and_release(clock):
+    store = InMemoryDedupStore(ttl=10, clock=clock)
+    assert store.claim("a")
+    assert not store.claim("a")
+    clock.now = 11
+    assert store.claim("a")
+    store.release("a")
+    assert store.claim("a")
+
+
+def test_in_memory_store_is_bounded():
+    store = InMemoryDedupStore(max_size=2)
+    for key in ("a", "b", "c"):
+        assert store.claim(key)
+    # "a" was evicted, so it is treated as new again
+    assert store.claim("a")
+    assert not store.claim("c")
+
+
+def test_sqlite_store_shared_between_instances(tmp_path):
+    path = str(tmp_path / "dedup.db")
+    first, second = SQLiteDedupStore(path, ttl=0.05), SQLiteDedupStore(path, ttl=0.05)
+    assert first.claim("a")
+    assert not second.claim("a")
+    time.sleep(0.1)
+    assert second.claim("a")
+    second.release("a")
+    assert first.claim("a")
+
+
+def test_deduplicator_suppresses_retries_and_release_lets_them_through():
+    dedup = EventDeduplicator()
+    assert dedup.claim(envelope())
+    assert not dedup.claim(envelope(), retry_num="1")
+    dedup.release(envelope())
+    assert dedup.claim(envelope(), retry_num="2")
+    assert dedup.stats() == {"unique": 2, "suppressed": 1, "retries": 2, "unkeyed": 0}
+
+
+def test_unkeyed_events_are_never_suppressed():
+    dedup = EventDeduplicator()
+    bare = {"event": {"type": "message"}}
+    assert dedup.claim(bare)
+    assert dedup.claim(bare)
+    assert dedup.stats()["unkeyed"] == 2
+
+
+def test_shared_store_catches_duplicates_seen_by_another_process(tmp_path):
+    path = str(tmp_path / "dedup.db")
+    here = EventDeduplicator(shared=SQLiteDedupStore(path))
+    elsewhere = EventDeduplicator(shared=SQLiteDedupStore(path))
+    assert here.claim(envelope())
+    assert not elsewhere.claim(envelope())
@@ -0,0 +1,64 @@
+import time
+
+import pytest
+
+from app.event_queue import (
+    EventQueue,
+    InMemoryEventQueue,
+    SQLiteEventQueue,
+    queue_from_env,
+    queue_from_url,
+)
+
+VISIBILITY = 0.05
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def event_queue(request, tmp_path):
+    if request.param == "memory":
+        return InMemoryEventQueue(visibility_timeout=VISIBILITY, max_attempts=2)
+    return SQLiteEventQueue(str(tmp_path / "events.db"), visibility_timeout=VISIBILITY, max_attempts=2)
+
+
+def test_claimed_items_are_hidden_until_acked(event_queue):
+    for n in range(3):
+        event_queue.put({"n": n})
+    batch = event_queue.get_batch(2)
+    assert [payload["n"] for _, payload in batch] == [0, 1]
+    assert [payload["n"] for _, payload in event_queue.get_batch(10)] == [2]
+    assert event_queue.get_batch(10) == []
+
+    event_queue.ack([receipt for receipt, _ in batch])
+    assert event_queue.size() == 1
+
+
+def test_unacked_items_are_redelivered_then_dropped(event_queue):
+    event_queue.put({"n": 0})
+    assert len(event_queue.get_batch()) == 1
+    time.sleep(VISIBILITY * 2)
+    # Failed once: handed out again
+    assert [payload for _, payload in event_queue.get_batch()] == [{"n": 0}]
+    time.sleep(VISIBILITY * 2)
+    # max_attempts reached: dropped instead of retried forever
+    assert event_queue.get_batch() == []
+    assert event_queue.size() == 0
+
+
+def test_event_queue_is_abstract():
+    with pytest.raises(TypeError):
+        EventQueue()
+
+
+def test_queue_from_url(tmp_path):
+    assert isinstance(queue_from_url("memory://"), InMemoryEventQueue)
+    assert isinstance(queue_from_url(f"sqlite://{tmp_path}/q.db"), SQLiteEventQueue)
+    with pytest.raises(ValueError):
+        queue_from_url("redis://localhost")
+
+
+def test_queue_from_env_requires_a_url(monkeypatch):
+    monkeypatch.delenv("SLACK_EVENT_QUEUE_URL", raising=False)
+    with pytest.raises(ValueError, match="SLACK_EVENT_QUEUE_URL"):
+        queue_from_env()
+    monkeypatch.setenv("SLACK_EVENT_QUEUE_URL", "memory://")
+    assert isinstance(queue_from_env(), InMemoryEventQueue)
@@ -0,0 +1,25 @@
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.check_import_time import DEFAULT_FORBIDDEN, DEFAULT_MODULE, PROJECT_DIR, measure
+
+# Same default as benchmarks.check_import_time; raise it on slow CI machines
+BUDGET_MS = float(os.environ.get("SLACK_IMPORT_BUDGET_MS", "60"))
+
+
+def test_lambda_handler_import_loads_no_slack_sdk():
+    code = f"import json, sys; import {DEFAULT_MODULE}; print(json.dumps(sorted(sys.modules)))"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            cwd=PROJECT_DIR)
+    loaded = json.loads(result.stdout)
+    found = [f for f in DEFAULT_FORBIDDEN if any(name == f or name.startswith(f + ".") for name in loaded)]
+    assert found == []
+
+
+def test_lambda_handler_import_is_within_budget():
+    # The first run writes bytecode caches, then the fastest of a few fresh interpreters counts
+    measure(DEFAULT_MODULE)
+    best_us = min(measure(DEFAULT_MODULE)[0] for _ in range(3))
+    assert best_us / 1000 <= BUDGET_MS
@@ -0,0 +1,170 @@
+import asyncio
+import socket
+import threading
+from collections import deque
+from types import SimpleNamespace
+from urllib.error import URLError
+
+import pytest
+from slack_sdk.errors import SlackApiError
+
+from app.outbound import (
+    COALESCE_SEPARATOR,
+    AsyncOutboundScheduler,
+    BucketTable,
+    OutboundScheduler,
+    TokenBucket,
+    is_retryable,
+    take_batch,
+)
+
+FAST = dict(per_channel_rate=1000, per_channel_burst=1000, global_rate=1000, global_burst=1000)
+
+
+def api_error(status, headers=None):
+    return SlackApiError("error", SimpleNamespace(status_code=status, headers=headers or {}, data={}))
+
+
+class RecordingClient:
+    """chat_postMessage stub; ``errors`` are raised by the first calls, in order."""
+
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def chat_postMessage(self, channel, text, **kwargs):
+        with self.lock:
+            self.calls.append((channel, text))
+            if self.errors:
+                raise self.errors.pop(0)
+        return {"ok": True, "channel": channel}
+
+
+class AsyncRecordingClient(RecordingClient):
+    async def chat_postMessage(self, channel, text, **kwargs):
+        await asyncio.sleep(0)
+        return RecordingClient.chat_postMessage(self, channel, text, **kwargs)
+
+
+def test_token_bucket_reserve_and_pause(clock):
+    bucket = TokenBucket(rate=1.0, burst=2.0, clock=clock)
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == pytest.approx(1.0)
+    assert not bucket.is_full()
+    clock.now = 3.0
+    assert bucket.is_full()
+    bucket.pause(5.0)
+    assert bucket.delay() == pytest.approx(5.0)
+
+
+@pytest.mark.parametrize("error, expected", [
+    (api_error(429), True),
+    (api_error(503), True),
+    (api_error(400), False),
+    (URLError(ConnectionRefusedError()), True),
+    (URLError(socket.gaierror()), True),
+    (ConnectionRefusedError(), True),
+    # The post may already have landed: never retried
+    (TimeoutError(), False),
+    (socket.timeout(), False),
+    (ConnectionResetError(), False),
+    (ValueError("bug"), False),
+])
+def test_is_retryable(error, expected):
+    assert is_retryable(error) is expected
+
+
+def test_take_batch_coalesces_only_compatible_backlog():
+    def item(text, **kwargs):
+        return (0.0, text, kwargs, None)
+
+    pending = deque([item("a"), item("b")])
+    assert [i[1] for i in take_batch(pending, True, 3, 10, 100)] == ["a"]
+
+    pending = deque([item("a"), item("b"), item("c", mrkdwn=True), item("d")])
+    assert [i[1] for i in take_batch(pending, True, 3, 10, 100)] == ["a", "b"]
+    assert [i[1] for i in pending] == ["c", "d"]
+
+    pending = deque([item("x" * 6), item("y" * 6), item("z" * 6)])
+    assert len(take_batch(pending, True, 3, 10, 13)) == 1
+
+
+def test_bucket_table_sweeps_idle_buckets():
+    table = BucketTable(rate=1000, burst=1, min_sweep=4)
+    for n in range(4):
+        table.get(f"C{n}").reserve()
+    busy = {"C0"}
+    # Refilled (idle) buckets are dropped on the next insert past the threshold
+    threading.Event().wait(0.01)
+    table.get("C9", busy)
+    assert len(table) == 2
+
+
+def test_replies_keep_order_and_coalesce_when_backed_up():
+    client = RecordingClient()
+    scheduler = OutboundScheduler(client, per_channel_rate=20, per_channel_burst=1, coalesce=True,
+                                  coalesce_after=2)
+    futures = [scheduler.post("C1", f"m{n}") for n in range(6)]
+    for future in futures:
+        future.result(5)
+    scheduler.shutdown()
+
+    sent = [text for _, text in client.calls]
+    assert COALESCE_SEPARATOR.join(sent).split(COALESCE_SEPARATOR) == [f"m{n}" for n in range(6)]
+    assert len(sent) < 6
+    assert scheduler.stats()["coalesced"] >= 2
+
+
+def test_rate_limited_post_is_retried():
+    client = RecordingClient(errors=[api_error(429, {"Retry-After": "0"})])
+    scheduler = OutboundScheduler(client, **FAST)
+    assert scheduler.post("C1", "hello").result(5)["ok"]
+    scheduler.shutdown()
+    stats = scheduler.stats()
+    assert (stats["rate_limited"], stats["retries"], stats["sent"]) == (1, 1, 1)
+    assert len(client.calls) == 2
+
+
+def test_read_timeout_is_not_retried():
+    client = RecordingClient(errors=[TimeoutError("read timed out")])
+    scheduler = OutboundScheduler(client, **FAST)
+    with pytest.raises(TimeoutError):
+        scheduler.post("C1", "hello").result(5)
+    scheduler.shutdown()
+    assert len(client.calls) == 1
+    assert scheduler.stats()["failed"] == 1
+
+
+def test_posts_beyond_max_pending_fail_fast():
+    release = threading.Event()
+
+    class BlockingClient(RecordingClient):
+        def chat_postMessage(self, channel, text, **kwargs):
+            release.wait(5)
+            return super().chat_postMessage(channel, text, **kwargs)
+
+    scheduler = OutboundScheduler(BlockingClient(), senders=1, max_pending=2, enqueue_timeout=0.05, **FAST)
+    futures = [scheduler.post("C1", f"m{n}") for n in range(4)]
+    with pytest.raises(RuntimeError):
+        futures[-1].result(1)
+    release.set()
+    scheduler.shutdown()
+    assert scheduler.stats()["dropped"] >= 1
+
+
+def test_async_scheduler_drops_channel_state_and_shuts_down():
+    async def main():
+        client = AsyncRecordingClient()
+        scheduler = AsyncOutboundScheduler(client, **FAST)
+        await asyncio.gather(*(scheduler.post(f"C{n % 3}", f"m{n}") for n in range(9)))
+        assert not scheduler._locks and not scheduler._pending and not scheduler._posters
+        await scheduler.shutdown()
+        with pytest.raises(RuntimeError):
+            await scheduler.post("C1", "late")
+        return client, scheduler
+
+    client, scheduler = asyncio.run(main())
+    assert len(client.calls) == 9
+    assert scheduler.stats()["dropped"] == 1
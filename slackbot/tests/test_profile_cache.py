@@ -0,0 +1,148 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.profile_cache import AsyncUserProfileCache, UserProfileCache
+
+
+def test_hit_after_miss_and_ttl_expiry(clock):
+    calls = []
+
+    def fetch(user):
+        calls.append(user)
+        return f"name-{user}"
+
+    cache = UserProfileCache(fetch, ttl=10, clock=clock)
+    assert cache.get("U1") == "name-U1"
+    assert cache.get("U1") == "name-U1"
+    assert calls == ["U1"]
+
+    clock.now = 11
+    assert cache.get("U1") == "name-U1"
+    assert calls == ["U1", "U1"]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"]) == (1, 2, 1)
+
+
+def test_failed_lookup_is_cached_for_negative_ttl(clock):
+    calls = []
+
+    def fetch(user):
+        calls.append(user)
+        raise RuntimeError("user_not_found")
+
+    cache = UserProfileCache(fetch, ttl=100, negative_ttl=5, clock=clock)
+    assert cache.get("U1") is None
+    assert cache.get("U1") is None
+    assert len(calls) == 1
+    assert cache.stats()["negative_hits"] == 1
+    assert cache.stats()["fetch_errors"] == 1
+
+    clock.now = 6
+    assert cache.get("U1") is None
+    assert len(calls) == 2
+
+
+def test_lru_eviction():
+    cache = UserProfileCache(lambda user: user.lower(), max_size=2)
+    cache.get("A")
+    cache.get("B")
+    cache.get("A")
+    cache.get("C")
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["size"] == 2
+    # B was least recently used
+    cache.get("B")
+    assert cache.stats()["misses"] == 4
+
+
+def test_concurrent_misses_share_one_fetch():
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def fetch(user):
+        calls.append(user)
+        started.set()
+        release.wait(5)
+        return "shared"
+
+    cache = UserProfileCache(fetch)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("U1"))) for _ in range(5)]
+    threads[0].start()
+    assert started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    # Wait until every follower is queued on the pending fetch
+    while cache.stats()["coalesced"] < 4:
+        threading.Event().wait(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert calls == ["U1"]
+    assert results == ["shared"] * 5
+
+
+def test_base_exception_in_fetch_does_not_wedge_the_user():
+    attempts = []
+
+    def fetch(user):
+        attempts.append(user)
+        if len(attempts) == 1:
+            raise KeyboardInterrupt
+        return "ok"
+
+    cache = UserProfileCache(fetch)
+    with pytest.raises(KeyboardInterrupt):
+        cache.get("U1")
+    assert cache.get("U1") == "ok"
+    assert attempts == ["U1", "U1"]
+
+
+def test_async_concurrent_misses_share_one_fetch():
+    calls = []
+
+    async def fetch(user):
+        calls.append(user)
+        await asyncio.sleep(0.01)
+        return f"name-{user}"
+
+    async def main():
+        cache = AsyncUserProfileCache(fetch)
+        results = await asyncio.gather(*(cache.get("U1") for _ in range(5)))
+        return cache, results
+
+    cache, results = asyncio.run(main())
+    assert results == ["name-U1"] * 5
+    assert calls == ["U1"]
+    assert cache.stats()["coalesced"] == 4
+
+
+def test_async_cancelled_leader_does_not_cancel_waiters():
+    calls = []
+
+    async def fetch(user):
+        calls.append(user)
+        await asyncio.sleep(10 if len(calls) == 1 else 0)
+        return f"name-{user}"
+
+    async def main():
+        cache = AsyncUserProfileCache(fetch)
+        leader = asyncio.ensure_future(cache.get("U1"))
+        await asyncio.sleep(0)
+        waiters = [asyncio.ensure_future(cache.get("U1")) for _ in range(3)]
+        await asyncio.sleep(0)
+        leader.cancel()
+        results = await asyncio.gather(*waiters)
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        # Nothing was cached, so the next lookup fetches again
+        return results, await cache.get("U1")
+
+    results, after = asyncio.run(main())
+    assert results == [None] * 3
+    assert after == "name-U1"
+    assert calls == ["U1", "U1"]
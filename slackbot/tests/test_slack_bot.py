@@ -0,0 +1,81 @@
+from types import SimpleNamespace
+
+import pytest
+from slack_sdk.errors import SlackApiError
+
+from app.metrics import render_metrics
+from app.outbound import OutboundScheduler
+from app.slack_bot import SlackWordCountBot
+
+FAST = dict(per_channel_rate=1000, per_channel_burst=1000, global_rate=1000, global_burst=1000)
+
+
+class FakeWebClient:
+    def __init__(self, post_error=None):
+        self.post_error = post_error
+        self.posts = []
+
+    def auth_test(self):
+        return {"user_id": "UBOT"}
+
+    def users_info(self, user):
+        return {"user": {"id": user, "profile": {"display_name": f"name-{user}"}}}
+
+    def chat_postMessage(self, channel, text, **kwargs):
+        self.posts.append((channel, text))
+        if self.post_error is not None:
+            raise self.post_error
+        return {"ok": True}
+
+
+def make_bot(client, **kwargs):
+    bot = SlackWordCountBot("xoxb-test", workers=1, **kwargs)
+    bot.client = client
+    bot.outbound = OutboundScheduler(client, **FAST)
+    return bot
+
+
+def envelope(n, channel="C1"):
+    return {"event_id": f"Ev{n}", "event": {"type": "message", "channel": channel, "user": "U1",
+                                            "text": "hello world", "ts": f"{n}.0"}}
+
+
+def test_failed_reply_is_counted_after_the_event_completes():
+    error = SlackApiError("error", SimpleNamespace(status_code=400, headers={}, data={"error": "channel_not_found"}))
+    bot = make_bot(FakeWebClient(post_error=error))
+    bot.dispatcher.start()
+    assert bot.accept(envelope(1))
+    bot.stop(drain=True, timeout=5)
+
+    stats = bot.stats()
+    assert (stats["completed"], stats["failed"], stats["reply_failed"]) == (1, 0, 1)
+    assert 'slackbot_events_total{outcome="reply_failed"} 1' in render_metrics(bot)
+
+
+def test_successful_reply_is_not_a_failure():
+    client = FakeWebClient()
+    bot = make_bot(client)
+    bot.dispatcher.start()
+    assert bot.accept(envelope(1))
+    bot.stop(drain=True, timeout=5)
+    assert bot.stats()["reply_failed"] == 0
+    assert client.posts and "name-U1" in client.posts[0][1]
+
+
+def test_lambda_path_raises_and_counts_a_failed_reply():
+    bot = make_bot(FakeWebClient(post_error=RuntimeError("down")))
+    with pytest.raises(RuntimeError):
+        bot.process_message_event(envelope(1)["event"])
+    bot.stop(timeout=5)
+    assert bot.stats()["reply_failed"] == 1
+
+
+def test_rejected_event_is_counted_and_keeps_its_dedup_claim():
+    bot = make_bot(FakeWebClient())
+    # Dispatcher not started: every submit is rejected
+    assert not bot.accept(envelope(1))
+    assert bot.stats()["rejected"] == 1
+    # A duplicate delivery of the dropped event is still suppressed
+    assert not bot.accept(envelope(1), retry_attempt=1)
+    assert bot.stats()["dedup"]["suppressed"] == 1
+    bot.stop(timeout=1)
@@ -0,0 +1,86 @@
+import os
+import time
+
+from app.supervisor import ShardWorkerBot, SocketModeSupervisor, merge_stats, shard_for
+
+CHANNELS = [f"C{n}" for n in range(20)]
+
+
+class InjectingBot(ShardWorkerBot):
+    """Shard 0 plays the Socket Mode connection: on start it accepts one event per channel."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.handled = 0
+
+    def start(self, warm_profile_cache=False):
+        if self.shard == 0 and self.incarnation == 1:
+            # Events for a shard that is not reading yet would be dropped
+            deadline = time.monotonic() + 30
+            while not all(self.alive) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            for n, channel in enumerate(CHANNELS):
+                self.accept({"event_id": f"Ev{n}", "event": {"type": "message", "channel": channel, "ts": "1.0"}})
+
+    def handle_event(self, event):
+        self.handled += 1
+
+    def stats(self):
+        return {**super().stats(), "handled": self.handled}
+
+
+def wait_for(condition, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_shard_for_is_stable():
+    assert shard_for("C1", 1) == 0
+    assert shard_for(None, 4) == 0
+    assert {shard_for(channel, 3) for channel in CHANNELS} == {0, 1, 2}
+
+
+def test_merge_stats_adds_counters():
+    merged = merge_stats([{"submitted": 2, "outbound": {"sent": 1}}, {"submitted": 3, "outbound": {"sent": 4}}])
+    assert merged == {"submitted": 5, "outbound": {"sent": 5}}
+
+
+def test_events_reach_their_shard_and_restarted_workers_report_afresh():
+    supervisor = SocketModeSupervisor("xoxb-test", None, connections=2, report_interval=0.1, restart_delay=0.1,
+                                      bot_factory=InjectingBot)
+    supervisor.start()
+    try:
+        assert wait_for(lambda: len(supervisor.reports_snapshot()) == 2)
+        assert wait_for(lambda: supervisor.stats().get("handled") == len(CHANNELS))
+        stats = supervisor.stats()
+        assert stats["forwarded"] == sum(shard_for(channel, 2) == 1 for channel in CHANNELS)
+        assert stats["status"] == "ok"
+
+        worker = supervisor._processes[1]
+        os.kill(worker.pid, 9)
+        assert wait_for(lambda: supervisor.health()["shards"][1]["incarnation"] == 2
+                        and supervisor.health()["status"] == "ok")
+        assert wait_for(lambda: any(report["shard"] == 1 for report in supervisor.reports_snapshot()))
+        # The killed worker's last report is gone, so its handled events no longer count
+        shard1 = next(report for report in supervisor.reports_snapshot() if report["shard"] == 1)
+        assert shard1["incarnation"] == 2 and shard1["stats"]["handled"] == 0
+        assert supervisor.health()["shards"][1]["restarts"] == 1
+    finally:
+        supervisor.stop(timeout=5)
+    assert all(not process.is_alive() for process in supervisor._processes)
+
+
+def test_forwarding_never_blocks_on_a_down_or_full_shard():
+    supervisor = SocketModeSupervisor("xoxb-test", None, connections=2, forward_queue_size=1)
+    started = time.monotonic()
+    supervisor._forward(1, {"event": {}}, None)
+    supervisor._alive[1] = 1
+    supervisor._forward(1, {"event": {}}, None)
+    supervisor._forward(1, {"event": {}}, None)
+    assert time.monotonic() - started < 0.5
+    assert supervisor._forward_queues[1].qsize() == 1
+    assert [worker["forward_dropped"] for worker in supervisor.health()["shards"]] == [0, 2]